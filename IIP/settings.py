@@ -12,6 +12,8 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os
+import sys
+import tempfile
 from urllib.parse import urlparse
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -43,12 +45,16 @@ INSTALLED_APPS = [
     'allauth',
     'allauth.account',
     'allauth.socialaccount',
+    'rest_framework',
+    'corsheaders',
     'core',
 ]
 
 MIDDLEWARE = [
+    'core.consultas.PerfilConsultasMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -118,6 +124,100 @@ else:
         }
     }
 
+# Cache: redis://... (ou rediss://), file:///caminho ou locmem://
+# Os contadores de versão de core.cache só invalidam o que outros processos
+# guardaram se o cache for compartilhado: workers do gunicorn e comandos como
+# recalcular_pontuacoes, processar_votos e os importadores precisam ver os
+# mesmos contadores. Por isso, sem CACHE_URL, o padrão é um cache em arquivo
+# comum a todos os processos da máquina (o docker-compose usa Redis). A
+# memória local, que é por processo, fica para os testes (sempre, para nunca
+# limpar um cache real) e para desenvolvimento com CACHE_URL=locmem://.
+TESTANDO = sys.argv[1:2] == ["test"]
+CACHE_URL = os.getenv("CACHE_URL", "") or f"file://{os.path.join(tempfile.gettempdir(), 'iip-cache')}"
+if TESTANDO:
+    CACHE_URL = "locmem://"
+if CACHE_URL.startswith(("redis://", "rediss://")):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+        }
+    }
+elif CACHE_URL.startswith("file://"):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': urlparse(CACHE_URL).path,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'iip',
+        }
+    }
+
+# Tempo (segundos) que o ranking da página inicial fica em cache; a invalidação
+# real é feita pelo contador de versão em core.cache
+RANKING_CACHE_TIMEOUT = int(os.getenv("RANKING_CACHE_TIMEOUT", 3600))
+
+# Idem para a parte anônima da página de cada político (versão por político)
+PERFIL_CACHE_TIMEOUT = int(os.getenv("PERFIL_CACHE_TIMEOUT", 3600))
+
+# Votos assíncronos: avaliar_politico só enfileira o voto (core.VotoPendente) e o
+# comando processar_votos os aplica em lote. Útil em picos de votação.
+VOTOS_ASSINCRONOS = os.getenv("VOTOS_ASSINCRONOS", "").lower() in ("1", "true", "sim")
+
+# Limites de votos (core.limites): (eventos, janela em segundos) por IP e por
+# usuário, e dias entre dois votos do mesmo usuário no mesmo político
+IIP_LIMITES_VOTO = {
+    "ip": (int(os.getenv("IIP_LIMITE_VOTOS_IP", 30)), 60),
+    "usuario": (int(os.getenv("IIP_LIMITE_VOTOS_USUARIO", 10)), 60),
+}
+# O limite por político soma os votos de todos os usuários; fica desligado por
+# padrão para não barrar os picos (ex.: noite de debate) que a fila absorve
+if os.getenv("IIP_LIMITE_VOTOS_POLITICO"):
+    IIP_LIMITES_VOTO["politico"] = (int(os.getenv("IIP_LIMITE_VOTOS_POLITICO")), 60)
+# Endereços ou redes (separados por vírgula) dos proxies reversos à frente da
+# aplicação; só deles o X-Forwarded-For é aceito para achar o IP do cliente.
+# Sem isso, atrás de um proxy todos os usuários dividiriam o limite por IP.
+IIP_PROXIES_CONFIAVEIS = [proxy for proxy in os.getenv("IIP_PROXIES_CONFIAVEIS", "").split(",") if proxy]
+IIP_INTERVALO_REVOTO_DIAS = int(os.getenv("IIP_INTERVALO_REVOTO_DIAS", 30))
+IIP_CACHE_LIMITES = os.getenv("IIP_CACHE_LIMITES", "default")
+
+# Pesos das fórmulas da proposta (ver core.pontuacao):
+#   nota_ia    = dados_oficiais × Nota_Dados_Oficiais + noticias × Sentimento_Notícias
+#   nota_final = ia × Nota_IA + usuario × Nota_Usuário
+# Quando um componente falta, os pesos dos demais são renormalizados.
+IIP_PESOS = {
+    "ia": float(os.getenv("IIP_PESO_IA", 0.5)),
+    "usuario": float(os.getenv("IIP_PESO_USUARIO", 0.5)),
+    "dados_oficiais": float(os.getenv("IIP_PESO_DADOS_OFICIAIS", 0.5)),
+    "noticias": float(os.getenv("IIP_PESO_NOTICIAS", 0.5)),
+}
+
+# Perfil de consultas SQL por requisição (core.consultas): cabeçalhos X-DB-* e
+# aviso no log "core.consultas" acima do orçamento de consultas. Desligado por
+# padrão (inclusive nos testes, que usam orcamento_consultas); ligue com
+# IIP_PERFIL_CONSULTAS=1 ao investigar uma página
+IIP_PERFIL_CONSULTAS = not TESTANDO and os.getenv("IIP_PERFIL_CONSULTAS", "").lower() in ("1", "true", "sim")
+IIP_ORCAMENTO_CONSULTAS = int(os.getenv("IIP_ORCAMENTO_CONSULTAS", 15))
+
+# API somente leitura (core.api): só JSON e sem autenticação, o que poupa a
+# leitura da sessão em cada requisição
+REST_FRAMEWORK = {
+    "DEFAULT_RENDERER_CLASSES": ["rest_framework.renderers.JSONRenderer"],
+    "DEFAULT_AUTHENTICATION_CLASSES": [],
+    "DEFAULT_PERMISSION_CLASSES": ["rest_framework.permissions.AllowAny"],
+    "UNAUTHENTICATED_USER": None,
+}
+
+# Origens (separadas por vírgula) autorizadas a chamar a API pelo navegador
+CORS_ALLOWED_ORIGINS = [origem for origem in os.getenv("CORS_ALLOWED_ORIGINS", "").split(",") if origem]
+CORS_URLS_REGEX = r"^/api/.*$"
+CORS_EXPOSE_HEADERS = ["ETag"]
+
 # Site ID para django-allauth
 SITE_ID = 1
 
@@ -18,10 +18,21 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
-from core.views import HomeView, gerenciar_politico, deletar_politico, detalhes_politico, avaliar_politico
+from core.api import PoliticosAPI, PoliticoAPI, NotasAPI, AvaliacoesAPI, ComentariosAPI, EvolucaoAPI, RankingAPI
+from core.views import HomeView, gerenciar_politico, deletar_politico, detalhes_politico, avaliar_politico, buscar, ranking_poder, api_ranking_poder
 
 urlpatterns = [
     path('', HomeView.as_view(), name='home'),
+    path('buscar/', buscar, name='buscar'),
+    path('ranking/<str:poder>/', ranking_poder, name='ranking_poder'),
+    path('api/ranking/<str:poder>/', api_ranking_poder, name='api_ranking_poder'),
+    path('api/v1/politicos/', PoliticosAPI.as_view(), name='api_politicos'),
+    path('api/v1/politicos/<slug:slug>/', PoliticoAPI.as_view(), name='api_politico'),
+    path('api/v1/politicos/<slug:slug>/notas/', NotasAPI.as_view(), name='api_notas'),
+    path('api/v1/politicos/<slug:slug>/avaliacoes/', AvaliacoesAPI.as_view(), name='api_avaliacoes'),
+    path('api/v1/politicos/<slug:slug>/comentarios/', ComentariosAPI.as_view(), name='api_comentarios'),
+    path('api/v1/politicos/<slug:slug>/evolucao/', EvolucaoAPI.as_view(), name='api_evolucao'),
+    path('api/v1/ranking/<str:poder>/', RankingAPI.as_view(), name='api_v1_ranking'),
     path('politico/novo/', gerenciar_politico, name='novo_politico'),
     path('politico/<int:politico_id>/editar/', gerenciar_politico, name='editar_politico'),
     path('politico/<int:politico_id>/deletar/', deletar_politico, name='deletar_politico'),
@@ -1,6 +1,8 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import CustomUser, Partido, Cargo, Politico, Mandato, Nota, AvaliacaoUsuario
+from .models import CustomUser, Partido, Cargo, Politico, AliasPolitico, Mandato, Nota, Noticia, Mencao, HistoricoPontuacao, AvaliacaoUsuario, VotoPendente
+from .cache import invalidar_perfil
+from .slugs import salvar_com_slug
 
 
 @admin.register(Partido)
@@ -16,13 +18,25 @@ class CargoAdmin(admin.ModelAdmin):
     search_fields = ("nome",)
 
 
+class AliasPoliticoInline(admin.TabularInline):
+    model = AliasPolitico
+    extra = 1
+
+
 @admin.register(Politico)
 class PoliticoAdmin(admin.ModelAdmin):
     list_display = ("nome", "partido", "cargo", "uf", "municipio", "ativo")
     list_filter = ("ativo", "uf", "esfera", "cargo__poder", "cargo__nivel")
     search_fields = ("nome", "slug", "municipio")
     autocomplete_fields = ("partido", "cargo")
-    prepopulated_fields = {"slug": ("nome",)}
+    inlines = (AliasPoliticoInline,)
+
+    def save_model(self, request, obj, form, change):
+        if "foto" in form.changed_data:
+            # Foto enviada à mão: espelhar_fotos_politicos não a substitui
+            obj.foto_checksum = ""
+        # Slug em branco é gerado pelo mesmo alocador dos comandos de importação
+        salvar_com_slug(obj)
 
 
 @admin.register(Mandato)
@@ -41,12 +55,62 @@ class NotaAdmin(admin.ModelAdmin):
     autocomplete_fields = ("politico",)
 
 
+@admin.register(Noticia)
+class NoticiaAdmin(admin.ModelAdmin):
+    list_display = ("titulo", "fonte", "publicada_em", "sentimento")
+    list_filter = ("fonte",)
+    search_fields = ("titulo", "url")
+    date_hierarchy = "publicada_em"
+
+
+@admin.register(Mencao)
+class MencaoAdmin(admin.ModelAdmin):
+    list_display = ("politico", "noticia", "sentimento")
+    list_select_related = ("politico", "noticia")
+    search_fields = ("politico__nome", "noticia__titulo")
+    raw_id_fields = ("politico", "noticia")
+
+
+@admin.register(HistoricoPontuacao)
+class HistoricoPontuacaoAdmin(admin.ModelAdmin):
+    list_display = ("politico", "data", "pontuacao_final", "media_usuarios", "nota_ia", "total_avaliacoes")
+    list_filter = ("data",)
+    search_fields = ("politico__nome",)
+    raw_id_fields = ("politico",)
+
+
 @admin.register(AvaliacaoUsuario)
 class AvaliacaoUsuarioAdmin(admin.ModelAdmin):
-    list_display = ("politico", "usuario", "nota", "criado_em")
-    list_filter = ("nota", "criado_em")
+    list_display = ("politico", "usuario", "nota", "moderacao", "criado_em")
+    list_filter = ("moderacao", "nota", "criado_em")
+    list_select_related = ("politico", "usuario")
     search_fields = ("politico__nome", "usuario__username")
     autocomplete_fields = ("politico", "usuario")
+    actions = ("aprovar_comentarios", "rejeitar_comentarios")
+
+    def _moderar(self, request, queryset, moderacao):
+        queryset = queryset.exclude(comentario="")
+        politicos = set(queryset.values_list("politico_id", flat=True))
+        alterados = queryset.update(moderacao=moderacao)
+        # update() não dispara sinais: descarta o perfil e os comentários em cache
+        for politico_id in politicos:
+            invalidar_perfil(politico_id)
+        self.message_user(request, f"{alterados} comentário(s) marcados como {moderacao.lower()}.")
+
+    @admin.action(description="Aprovar comentários selecionados")
+    def aprovar_comentarios(self, request, queryset):
+        self._moderar(request, queryset, "APROVADO")
+
+    @admin.action(description="Rejeitar comentários selecionados")
+    def rejeitar_comentarios(self, request, queryset):
+        self._moderar(request, queryset, "REJEITADO")
+
+
+@admin.register(VotoPendente)
+class VotoPendenteAdmin(admin.ModelAdmin):
+    list_display = ("politico", "usuario", "nota", "criado_em")
+    list_select_related = ("politico", "usuario")
+    raw_id_fields = ("politico", "usuario")
 
 
 @admin.register(CustomUser)
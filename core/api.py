@@ -0,0 +1,279 @@
+"""API REST somente leitura (``/api/v1/``) para aplicativos e parceiros.
+
+As respostas são montadas direto de ``values()``, sem instanciar modelos
+nem passar por serializers do DRF linha a linha: cada ``serializar_*`` só
+renomeia e converte campos de um dicionário.
+
+Todo GET leva um ETag forte derivado da versão do ranking (core.cache),
+que muda sempre que uma pontuação, nota ou avaliação muda, e da URL
+completa (a série de evolução usa a versão das séries, que só muda no job
+diário). O ETag é calculado antes de qualquer consulta ao banco; um
+cliente que reenvia o valor em ``If-None-Match`` recebe ``304`` sem que a
+resposta seja montada.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+from django.http import Http404
+from django.urls import reverse
+from django.utils.http import parse_etags, urlencode
+from rest_framework import status
+from rest_framework.exceptions import ParseError
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .cache import versao_perfil, versao_ranking, versao_series
+from .comentarios import TAMANHO_PAGINA as COMENTARIOS_POR_PAGINA, obter_comentarios
+from .models import AvaliacaoUsuario, Nota, Politico
+from .ranking import PODERES, TAMANHO_MAXIMO, TAMANHO_PAGINA, filtrar_politicos, pagina_ranking
+from .referencias import opcoes_filtros
+
+VERSAO_API = 'v1'
+
+CAMPOS_RESUMO = ('id', 'nome', 'slug', 'uf', 'partido__sigla', 'cargo__nome', 'pontuacao_final', 'total_avaliacoes')
+CAMPOS_DETALHE = CAMPOS_RESUMO + (
+    'partido__nome', 'cargo__poder', 'esfera', 'municipio', 'ativo', 'foto', 'foto_url',
+    'media_usuarios', 'nota_ia_recente', 'tendencia_7d', 'tendencia_30d', 'tendencia_90d', 'atualizado_em',
+)
+CAMPOS_NOTA = (
+    'periodo_ref', 'nota_dados_oficiais', 'sentimento_noticias', 'nota_usuario', 'nota_ia', 'nota_final',
+)
+
+
+def _numero(valor):
+    return float(valor) if valor is not None else None
+
+
+def serializar_resumo(linha):
+    return {
+        'id': linha['id'],
+        'nome': linha['nome'],
+        'slug': linha['slug'],
+        'partido': linha['partido__sigla'],
+        'cargo': linha['cargo__nome'],
+        'uf': linha['uf'],
+        'pontuacao_final': _numero(linha['pontuacao_final']),
+        'total_avaliacoes': linha['total_avaliacoes'],
+    }
+
+
+def _url_foto(request, linha):
+    """URL absoluta da foto enviada (pelo storage do campo) ou a URL externa"""
+    if not linha['foto']:
+        return linha['foto_url']
+    return request.build_absolute_uri(Politico._meta.get_field('foto').storage.url(linha['foto']))
+
+
+def serializar_detalhe(linha, request):
+    dados = serializar_resumo(linha)
+    dados.update({
+        'partido_nome': linha['partido__nome'],
+        'poder': linha['cargo__poder'],
+        'esfera': linha['esfera'],
+        'municipio': linha['municipio'],
+        'ativo': linha['ativo'],
+        'foto': _url_foto(request, linha),
+        'media_usuarios': _numero(linha['media_usuarios']),
+        'nota_ia': _numero(linha['nota_ia_recente']),
+        'tendencias': {
+            '7d': _numero(linha['tendencia_7d']),
+            '30d': _numero(linha['tendencia_30d']),
+            '90d': _numero(linha['tendencia_90d']),
+        },
+        'atualizado_em': linha['atualizado_em'],
+    })
+    return dados
+
+
+def serializar_nota(linha):
+    return {campo: linha[campo] if campo == 'periodo_ref' else _numero(linha[campo]) for campo in CAMPOS_NOTA}
+
+
+def _tamanho(request):
+    try:
+        tamanho = int(request.query_params.get('tamanho', TAMANHO_PAGINA))
+    except ValueError:
+        tamanho = TAMANHO_PAGINA
+    return max(1, min(tamanho, TAMANHO_MAXIMO))
+
+
+def _filtros(request):
+    return {campo: request.query_params.get(campo) for campo in ('partido', 'cargo', 'esfera', 'uf')}
+
+
+def _url_proxima(request, **parametros):
+    consulta = request.query_params.copy()
+    for chave, valor in parametros.items():
+        consulta[chave] = valor
+    return request.build_absolute_uri(f'{request.path}?{urlencode(sorted(consulta.items()))}')
+
+
+def _politico_id(slug):
+    politico_id = Politico.objects.filter(slug=slug).values_list('id', flat=True).first()
+    if politico_id is None:
+        raise Http404('Político não encontrado')
+    return politico_id
+
+
+class APIVersionada(APIView):
+    """GET somente leitura com ETag pela versão do ranking; subclasses implementam ``dados``"""
+
+    # O cliente pode guardar a resposta, mas deve revalidar antes de usá-la
+    cache_control = 'public, no-cache'
+
+    def versao(self):
+        return versao_ranking()
+
+    def etag(self, request):
+        digest = hashlib.sha1(request.get_full_path().encode('utf-8')).hexdigest()[:16]
+        return f'"{VERSAO_API}-{self.versao()}-{digest}"'
+
+    def get(self, request, **kwargs):
+        etag = self.etag(request)
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            resposta = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            resposta = Response(self.dados(request, **kwargs))
+        resposta['ETag'] = etag
+        resposta['Cache-Control'] = self.cache_control
+        return resposta
+
+    def dados(self, request, **kwargs):
+        raise NotImplementedError
+
+
+class PoliticosAPI(APIVersionada):
+    """Lista de políticos em ordem de id, paginada por chave (``apos``)"""
+
+    def dados(self, request):
+        tamanho = _tamanho(request)
+        queryset = filtrar_politicos(Politico.objects.all(), **_filtros(request))
+        try:
+            apos = int(request.query_params.get('apos', 0))
+        except ValueError:
+            apos = 0
+        linhas = list(queryset.filter(id__gt=apos).order_by('id').values(*CAMPOS_RESUMO)[:tamanho + 1])
+
+        proximo = None
+        if len(linhas) > tamanho:
+            linhas = linhas[:tamanho]
+            proximo = _url_proxima(request, apos=linhas[-1]['id'])
+        return {'resultados': [serializar_resumo(linha) for linha in linhas], 'proximo': proximo}
+
+
+class PoliticoAPI(APIVersionada):
+    def dados(self, request, slug):
+        linha = Politico.objects.filter(slug=slug).values(*CAMPOS_DETALHE).first()
+        if linha is None:
+            raise Http404('Político não encontrado')
+        dados = serializar_detalhe(linha, request)
+        dados['url'] = request.build_absolute_uri(reverse('detalhes_politico', args=[slug]))
+        return dados
+
+
+class NotasAPI(APIVersionada):
+    """Notas por período de um político, da mais recente para a mais antiga"""
+
+    def dados(self, request, slug):
+        notas = Nota.objects.filter(politico_id=_politico_id(slug)).order_by('-periodo_ref').values(*CAMPOS_NOTA)
+        return {'resultados': [serializar_nota(linha) for linha in notas]}
+
+
+def _avaliacoes(politico_id):
+    resumo = Politico.objects.filter(id=politico_id).values('media_usuarios', 'total_avaliacoes').get()
+    contagens = dict(
+        AvaliacaoUsuario.objects.filter(politico_id=politico_id)
+        .values_list('nota').annotate(total=Count('id')).order_by()
+    )
+    return {
+        'media_usuarios': _numero(resumo['media_usuarios']),
+        'total_avaliacoes': resumo['total_avaliacoes'],
+        'distribuicao': {str(nota): contagens.get(nota, 0) for nota in range(0, 11)},
+    }
+
+
+class AvaliacoesAPI(APIVersionada):
+    """Média, total e distribuição das notas dos usuários de um político
+
+    O ETag segue a versão do ranking, que muda com qualquer voto; a
+    contagem por nota fica em cache sob a versão do perfil do político
+    (core.cache), que só muda com os votos dele, como em core.comentarios.
+    """
+
+    def dados(self, request, slug):
+        politico_id = _politico_id(slug)
+        geracao, versao = versao_perfil(politico_id)
+        chave = f'iip:avaliacoes:{politico_id}:v{geracao}.{versao}'
+        avaliacoes = cache.get(chave)
+        if avaliacoes is None:
+            avaliacoes = _avaliacoes(politico_id)
+            cache.set(chave, avaliacoes, settings.PERFIL_CACHE_TIMEOUT)
+        return avaliacoes
+
+
+class EvolucaoAPI(APIVersionada):
+    """Série já reduzida da pontuação final (ver core.evolucao), em uma consulta"""
+
+    # A série só muda no job diário; uma hora sem revalidar é aceitável
+    cache_control = 'public, max-age=3600'
+
+    def versao(self):
+        return versao_series()
+
+    def dados(self, request, slug):
+        linha = Politico.objects.filter(slug=slug).values_list('id', 'serie_evolucao__pontos').first()
+        if linha is None:
+            raise Http404('Político não encontrado')
+        return {'pontos': linha[1] or []}
+
+
+class ComentariosAPI(APIView):
+    """Comentários aprovados de um político, paginados por cursor e em cache por página"""
+
+    def get(self, request, slug):
+        try:
+            tamanho = int(request.query_params.get('tamanho', COMENTARIOS_POR_PAGINA))
+        except ValueError:
+            tamanho = COMENTARIOS_POR_PAGINA
+        try:
+            comentarios, proximo = obter_comentarios(
+                _politico_id(slug), cursor=request.query_params.get('cursor'), tamanho=tamanho,
+            )
+        except ValueError:
+            raise ParseError('Cursor inválido')
+        return Response({
+            'resultados': comentarios,
+            'proximo': _url_proxima(request, cursor=proximo) if proximo else None,
+        })
+
+
+class RankingAPI(APIVersionada):
+    """Ranking completo de um Poder, paginado pelo cursor de core.ranking"""
+
+    def dados(self, request, poder):
+        poder = poder.upper()
+        if poder not in PODERES:
+            raise Http404('Poder desconhecido')
+        try:
+            linhas, proximo, posicao = pagina_ranking(
+                poder,
+                cursor=request.query_params.get('cursor'),
+                tamanho=_tamanho(request),
+                cargos=opcoes_filtros()['cargos'],
+                campos=CAMPOS_RESUMO,
+                **_filtros(request),
+            )
+        except ValueError:
+            raise ParseError('Cursor inválido')
+        resultados = []
+        for indice, linha in enumerate(linhas):
+            dados = serializar_resumo(linha)
+            dados['posicao'] = posicao + indice
+            resultados.append(dados)
+        return {
+            'poder': poder,
+            'resultados': resultados,
+            'proximo': _url_proxima(request, cursor=proximo) if proximo else None,
+        }
@@ -0,0 +1,281 @@
+"""Busca de políticos por nome, sem diferenciar acentos e maiúsculas.
+
+No PostgreSQL a busca usa ``iip_unaccent(lower(nome))``, uma versão
+IMMUTABLE de ``unaccent`` criada na migração 0012, que pode ser indexada:
+termos curtos usam o índice B-tree ``text_pattern_ops`` (``LIKE 'x%'``) e
+os demais o índice GIN de trigramas (``LIKE '%x%'``), ordenando por
+similaridade.
+
+Em outros bancos (SQLite em desenvolvimento) um índice de prefixos em
+memória faz o papel dos índices: uma lista ordenada com o nome normalizado
+a partir de cada palavra, consultada por busca binária. Ele é montado uma
+vez por processo e versionado no cache compartilhado, como as opções de
+filtro em core.referencias. Salvar ou remover um político (ver
+core.signals) publica, após o commit, a alteração daquela linha sob a
+nova versão; os processos atrasados aplicam as alterações que faltam em
+vez de remontar o índice, que só é refeito quando alguma delas já saiu
+do cache ou depois de uma gravação em lote (``invalidar_busca``). O índice
+guarda também a pontuação de cada político, então os ``limite`` melhores
+saem dele sem ida ao banco; só as linhas escolhidas são lidas, e a ordem
+final usa a pontuação atual delas.
+"""
+import bisect
+import heapq
+import threading
+import time
+from array import array
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import CharField, FloatField, Func, Value
+from django.db.models.functions import Lower
+
+from .entidades import normalizar
+from .models import Politico
+
+CHAVE_VERSAO = 'iip:busca:versao'
+CHAVE_ALTERACAO = 'iip:busca:alteracao:{}'
+
+# Alterações publicadas por mais tempo que isso, ou em maior número, remontam o índice
+TEMPO_ALTERACOES = 24 * 60 * 60
+MAXIMO_ALTERACOES = 200
+
+# Abaixo disso os trigramas não ajudam; usa-se só o prefixo do nome
+MINIMO_TRIGRAMA = 3
+
+# Termos com até tantas letras casam com boa parte dos nomes; seus melhores
+# (até GUARDADOS) são calculados na montagem (a partir de MINIMO_BUSCA
+# letras, o mínimo da view) e guardados até uma alteração tocar o prefixo
+MINIMO_BUSCA = 2
+TERMO_CURTO = 3
+GUARDADOS = 50
+
+# Somado ao peso da entrada que começa na primeira palavra: nomes que começam
+# pelo termo vêm antes dos que só o têm no meio (pontuações vão de 0 a 10)
+BONUS_INICIO = 100.0
+
+CAMPOS_RESULTADO = ('id', 'nome', 'slug', 'uf', 'partido__sigla', 'cargo__nome', 'pontuacao_final')
+
+
+class Unaccent(Func):
+    function = 'iip_unaccent'
+    output_field = CharField()
+
+
+class Similaridade(Func):
+    function = 'similarity'
+    output_field = FloatField()
+
+
+class IndicePrefixos:
+    """Nomes normalizados a partir de cada palavra, ordenados para busca binária.
+
+    Cada entrada tem um peso: a pontuação do político (da montagem ou do
+    último save da linha), mais ``BONUS_INICIO`` na entrada do nome inteiro.
+    As entradas de um prefixo ficam contíguas, e os melhores saem delas por
+    ``heapq.nlargest`` sobre fatias dos arrays.
+    """
+
+    def __init__(self, politicos):
+        self.nomes = {}
+        self.pontuacoes = {}
+        entradas = []
+        for politico_id, nome, pontuacao in politicos:
+            self.nomes[politico_id] = normalizar(nome)
+            self.pontuacoes[politico_id] = float(pontuacao or 0)
+            entradas.extend((chave, politico_id, peso) for chave, peso in self._entradas(politico_id))
+        entradas.sort()
+        self.chaves = [chave for chave, _, _ in entradas]
+        self.ids = array('q', (politico_id for _, politico_id, _ in entradas))
+        self.pesos = array('d', (peso for _, _, peso in entradas))
+        self._guardados = {}
+        for tamanho in range(MINIMO_BUSCA, TERMO_CURTO + 1):
+            self._guardar_prefixos(tamanho)
+
+    def _entradas(self, politico_id):
+        palavras = self.nomes.get(politico_id, '').split()
+        pontuacao = self.pontuacoes.get(politico_id, 0.0)
+        return [
+            (' '.join(palavras[inicio:]), pontuacao + (BONUS_INICIO if inicio == 0 else 0.0))
+            for inicio in range(len(palavras))
+        ]
+
+    def _guardar_prefixos(self, tamanho):
+        """Calcula os melhores de todos os prefixos com ``tamanho`` letras"""
+        posicao = 0
+        while posicao < len(self.chaves):
+            prefixo = self.chaves[posicao][:tamanho]
+            fim = bisect.bisect_left(self.chaves, prefixo + '\uffff', posicao)
+            if len(prefixo) == tamanho:
+                self._guardados[prefixo] = self._selecionar(posicao, fim, GUARDADOS)
+            else:
+                # Chave mais curta que o prefixo: só ela, nada a guardar
+                fim = posicao + 1
+            posicao = fim
+
+    def _descartar_guardados(self, chaves):
+        for chave in chaves:
+            for tamanho in range(1, TERMO_CURTO + 1):
+                self._guardados.pop(chave[:tamanho], None)
+
+    def atualizar(self, politico_id, nome, pontuacao=0):
+        """Troca as entradas de um político pelas de ``nome``; ``None`` o remove"""
+        antigas = [chave for chave, _ in self._entradas(politico_id)]
+        for chave in antigas:
+            posicao = bisect.bisect_left(self.chaves, chave)
+            while self.ids[posicao] != politico_id:
+                posicao += 1
+            del self.chaves[posicao]
+            del self.ids[posicao]
+            del self.pesos[posicao]
+        self.nomes.pop(politico_id, None)
+        self.pontuacoes.pop(politico_id, None)
+        self._descartar_guardados(antigas)
+        if nome is None:
+            return
+        self.nomes[politico_id] = normalizar(nome)
+        self.pontuacoes[politico_id] = float(pontuacao or 0)
+        novas = self._entradas(politico_id)
+        for chave, peso in novas:
+            posicao = bisect.bisect_left(self.chaves, chave)
+            self.chaves.insert(posicao, chave)
+            self.ids.insert(posicao, politico_id)
+            self.pesos.insert(posicao, peso)
+        self._descartar_guardados(chave for chave, _ in novas)
+
+    def _selecionar(self, inicio, fim, quantidade):
+        """Os ``quantidade`` ids de maior peso entre as entradas ``inicio:fim``"""
+        # Um político casa no máximo uma vez por palavra: folga para os repetidos
+        folga = quantidade * 4
+        while True:
+            escolhidos = []
+            # Empate de peso: ganha a entrada que vem antes (ordem do nome)
+            for _, negativo in heapq.nlargest(folga, zip(self.pesos[inicio:fim], range(-inicio, -fim, -1))):
+                politico_id = self.ids[-negativo]
+                if politico_id not in escolhidos:
+                    escolhidos.append(politico_id)
+                    if len(escolhidos) == quantidade:
+                        return escolhidos
+            if folga >= fim - inicio:
+                return escolhidos
+            folga = fim - inicio
+
+    def melhores(self, termo, quantidade):
+        """Ids de maior peso cujo nome tem alguma palavra começando por ``termo`` (já normalizado)"""
+        curto = len(termo) <= TERMO_CURTO and quantidade <= GUARDADOS
+        if curto and termo in self._guardados:
+            return self._guardados[termo][:quantidade]
+        inicio = bisect.bisect_left(self.chaves, termo)
+        fim = bisect.bisect_left(self.chaves, termo + '\uffff', inicio)
+        if not curto:
+            return self._selecionar(inicio, fim, quantidade)
+        self._guardados[termo] = self._selecionar(inicio, fim, GUARDADOS)
+        return self._guardados[termo][:quantidade]
+
+
+_lock = threading.Lock()
+_indice = None
+_versao = None
+
+
+def _versao_atual():
+    versao = cache.get(CHAVE_VERSAO)
+    if versao is None:
+        cache.add(CHAVE_VERSAO, time.time_ns() // 1000, None)
+        versao = cache.get(CHAVE_VERSAO)
+    return versao
+
+
+def _aplicar_alteracoes(versao):
+    """Leva o índice deste processo até ``versao``; retorna False se faltar alguma alteração"""
+    global _versao
+
+    if _indice is None or not 0 < versao - _versao <= MAXIMO_ALTERACOES:
+        return False
+    chaves = [CHAVE_ALTERACAO.format(numero) for numero in range(_versao + 1, versao + 1)]
+    alteracoes = cache.get_many(chaves)
+    if len(alteracoes) < len(chaves):
+        return False
+    for chave in chaves:
+        _indice.atualizar(*alteracoes[chave])
+    _versao = versao
+    return True
+
+
+def indice_prefixos():
+    global _indice, _versao
+
+    versao = _versao_atual()
+    if _indice is not None and _versao == versao:
+        return _indice
+
+    with _lock:
+        if _versao != versao and not _aplicar_alteracoes(versao):
+            _indice = IndicePrefixos(
+                Politico.objects.values_list('id', 'nome', 'pontuacao_final').iterator(chunk_size=5000)
+            )
+            _versao = versao
+    return _indice
+
+
+def registrar_alteracao(politico_id, nome, pontuacao=None):
+    """Publica, após o commit, o nome e a pontuação atuais de um político (``nome=None`` se removido)"""
+    def publicar():
+        try:
+            versao = cache.incr(CHAVE_VERSAO)
+        except ValueError:
+            # Sem versão no cache, todo processo remonta o índice
+            _versao_atual()
+            return
+        cache.set(CHAVE_ALTERACAO.format(versao), (politico_id, nome, pontuacao), TEMPO_ALTERACOES)
+
+    transaction.on_commit(publicar)
+
+
+def invalidar_busca():
+    """Força todos os processos a remontar o índice após o commit (gravações em lote)"""
+    transaction.on_commit(_incrementar_versao)
+
+
+def _incrementar_versao():
+    try:
+        cache.incr(CHAVE_VERSAO)
+    except ValueError:
+        _versao_atual()
+
+
+def _buscar_postgres(termo, limite):
+    nome_busca = Unaccent(Lower('nome'))
+    queryset = Politico.objects.annotate(nome_busca=nome_busca)
+    if len(termo) < MINIMO_TRIGRAMA:
+        queryset = queryset.filter(nome_busca__startswith=termo).order_by('-pontuacao_final', 'nome')
+    else:
+        queryset = queryset.filter(nome_busca__contains=termo).annotate(
+            similaridade=Similaridade(nome_busca, Value(termo))
+        ).order_by('-similaridade', '-pontuacao_final', 'nome')
+    return list(queryset.values(*CAMPOS_RESULTADO)[:limite])
+
+
+def _buscar_em_memoria(termo, limite):
+    indice = indice_prefixos()
+    with _lock:
+        ids = indice.melhores(termo, limite)
+    if not ids:
+        return []
+    linhas = {linha['id']: linha for linha in Politico.objects.filter(id__in=ids).values(*CAMPOS_RESULTADO)}
+    resultados = [linhas[politico_id] for politico_id in ids if politico_id in linhas]
+    # Nomes que começam pelo termo vêm antes dos que só o têm no meio
+    resultados.sort(key=lambda r: (
+        not normalizar(r['nome']).startswith(termo), -r['pontuacao_final'], r['nome'],
+    ))
+    return resultados
+
+
+def buscar_politicos(termo, limite=10):
+    """Lista de dicionários com os políticos cujo nome casa com ``termo``"""
+    termo = normalizar(termo)
+    if not termo:
+        return []
+    if connection.vendor == 'postgresql':
+        return _buscar_postgres(termo, limite)
+    return _buscar_em_memoria(termo, limite)
@@ -0,0 +1,170 @@
+"""Cache versionado do ranking da página inicial e dos perfis de políticos.
+
+Cada combinação de filtros é guardada sob uma chave que inclui o número de
+versão atual do ranking. Qualquer alteração em ``Politico``,
+``AvaliacaoUsuario`` ou ``Nota`` incrementa a versão (ver core.signals), o
+que torna todas as entradas antigas inalcançáveis sem precisar apagá-las;
+elas expiram sozinhas pelo timeout do backend. O incremento só acontece
+quando a transação que fez a alteração é confirmada (``on_commit``): antes
+disso, um leitor veria a versão nova com os dados antigos e os guardaria
+sob ela até a próxima escrita.
+
+A parte anônima da página de um político fica sob o slug, marcada com duas
+versões: a do próprio político, incrementada quando ele, seus votos ou
+suas notas mudam, e uma geração comum a todos os perfis, incrementada por
+mudanças em partidos e cargos e por rotinas em lote. Assim um voto só
+descarta o perfil daquele político.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .ranking import ORDENACOES, ORDENACAO_PADRAO
+
+PREFIXO = 'iip:ranking'
+CHAVE_VERSAO = f'{PREFIXO}:versao'
+CHAVE_ACERTOS = f'{PREFIXO}:acertos'
+CHAVE_FALHAS = f'{PREFIXO}:falhas'
+
+PREFIXO_PERFIL = 'iip:perfil'
+CHAVE_GERACAO_PERFIS = f'{PREFIXO_PERFIL}:geracao'
+
+CHAVE_VERSAO_SERIES = 'iip:evolucao:versao'
+
+
+def _incrementar(chave):
+    try:
+        return cache.incr(chave)
+    except ValueError:
+        # Chave ausente (primeiro uso ou despejada pelo backend)
+        cache.add(chave, 0, None)
+        return cache.incr(chave)
+
+
+def _versao(chave):
+    versao = cache.get(chave)
+    if versao is None:
+        # Começa em um valor baseado no relógio para que uma versão despejada
+        # nunca volte a apontar para entradas antigas ainda no cache
+        cache.add(chave, time.time_ns() // 1000, None)
+        versao = cache.get(chave)
+    return versao
+
+
+def _invalidar(chave):
+    try:
+        cache.incr(chave)
+    except ValueError:
+        _versao(chave)
+
+
+def versao_ranking():
+    return _versao(CHAVE_VERSAO)
+
+
+def invalidar_ranking():
+    """Incrementa a versão após o commit, descartando todo o ranking em cache"""
+    transaction.on_commit(lambda: _invalidar(CHAVE_VERSAO))
+
+
+def chave_ranking(filtros, versao):
+    """Chave a partir da tupla normalizada de filtros"""
+    ordenacao = filtros.get('ordenacao')
+    if ordenacao not in ORDENACOES:
+        ordenacao = ORDENACAO_PADRAO
+    normalizado = '|'.join(
+        [(filtros.get(campo) or '').strip() for campo in ('partido', 'cargo', 'esfera', 'uf')] + [ordenacao]
+    )
+    digest = hashlib.md5(normalizado.encode('utf-8')).hexdigest()
+    return f'{PREFIXO}:v{versao}:{digest}'
+
+
+def obter_ranking(filtros, calcular):
+    """Retorna o ranking em cache para ``filtros`` ou o calcula com ``calcular()``"""
+    chave = chave_ranking(filtros, versao_ranking())
+    ranking = cache.get(chave)
+    if ranking is not None:
+        _incrementar(CHAVE_ACERTOS)
+        return ranking
+
+    _incrementar(CHAVE_FALHAS)
+    ranking = calcular()
+    cache.set(chave, ranking, settings.RANKING_CACHE_TIMEOUT)
+    return ranking
+
+
+def _chave_versao_perfil(politico_id):
+    return f'{PREFIXO_PERFIL}:versao:{politico_id}'
+
+
+def versao_perfil(politico_id):
+    chaves = [CHAVE_GERACAO_PERFIS, _chave_versao_perfil(politico_id)]
+    valores = cache.get_many(chaves)
+    return tuple(valores[chave] if chave in valores else _versao(chave) for chave in chaves)
+
+
+def invalidar_perfil(politico_id):
+    """Descarta, após o commit, o perfil em cache de um político"""
+    transaction.on_commit(lambda: _invalidar(_chave_versao_perfil(politico_id)))
+
+
+def invalidar_perfis():
+    """Descarta, após o commit, todos os perfis em cache"""
+    transaction.on_commit(lambda: _invalidar(CHAVE_GERACAO_PERFIS))
+
+
+def obter_perfil(slug, calcular):
+    """Parte anônima do perfil de ``slug`` em cache, ou ``calcular()``.
+
+    ``calcular`` devolve um dicionário com ``politico``. As versões são
+    lidas antes de calcular e só mudam depois que a escrita é confirmada
+    (``invalidar_perfil``), então o perfil guardado sob uma versão já vê
+    toda alteração que a produziu. Resta a janela entre o commit e o
+    incremento, em que leitores ainda recebem o perfil anterior; o
+    incremento o descarta logo em seguida. Na primeira vez que um slug é
+    visto (o id ainda é desconhecido), o perfil é calculado e guardado sem
+    versão e só passa a ser servido do cache a partir da requisição seguinte.
+    """
+    chave = f'{PREFIXO_PERFIL}:{slug}'
+    entrada = cache.get(chave)
+    versao = None
+    if entrada is not None:
+        versao = versao_perfil(entrada['id'])
+        if entrada['versao'] == versao:
+            return entrada['perfil']
+
+    perfil = calcular()
+    cache.set(
+        chave, {'id': perfil['politico'].id, 'versao': versao, 'perfil': perfil}, settings.PERFIL_CACHE_TIMEOUT,
+    )
+    return perfil
+
+
+def versao_series():
+    """Versão das séries de evolução (core.evolucao), que só mudam no job diário"""
+    return _versao(CHAVE_VERSAO_SERIES)
+
+
+def invalidar_series():
+    transaction.on_commit(lambda: _invalidar(CHAVE_VERSAO_SERIES))
+
+
+def estatisticas():
+    """Contadores de acertos/falhas do cache do ranking"""
+    valores = cache.get_many([CHAVE_VERSAO, CHAVE_ACERTOS, CHAVE_FALHAS])
+    acertos = valores.get(CHAVE_ACERTOS, 0)
+    falhas = valores.get(CHAVE_FALHAS, 0)
+    total = acertos + falhas
+    return {
+        'versao': valores.get(CHAVE_VERSAO),
+        'acertos': acertos,
+        'falhas': falhas,
+        'taxa_acerto': acertos / total if total else None,
+    }
+
+
+def zerar_estatisticas():
+    cache.delete_many([CHAVE_ACERTOS, CHAVE_FALHAS])
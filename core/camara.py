@@ -0,0 +1,175 @@
+"""Cliente HTTP da API de Dados Abertos da Câmara dos Deputados.
+
+Usa uma ``requests.Session`` com pool de conexões keep-alive, um limitador
+de taxa adaptativo (token bucket) no lugar de pausas fixas e novas
+tentativas com backoff exponencial. Os detalhes dos deputados são buscados
+em paralelo por um pool de threads; a gravação no banco fica a cargo de
+quem chama, na thread principal.
+"""
+import hashlib
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from requests.adapters import HTTPAdapter
+
+URL_BASE = 'https://dadosabertos.camara.leg.br/api/v2'
+
+STATUS_REPETIVEIS = {429, 500, 502, 503, 504}
+
+
+def hash_registro(dados):
+    """Hash estável de um registro da API, usado para detectar mudanças"""
+    canonico = json.dumps(dados, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(canonico.encode('utf-8')).hexdigest()
+
+
+class LimitadorTaxa:
+    """Token bucket com taxa adaptativa.
+
+    Começa em ``taxa`` requisições por segundo. Cada resposta 429/5xx corta
+    a taxa pela metade (até ``taxa_minima``); cada sucesso a recupera aos
+    poucos, até ``taxa_maxima``.
+    """
+
+    def __init__(self, taxa=5.0, taxa_minima=0.5, taxa_maxima=None, capacidade=None):
+        self.taxa = float(taxa)
+        self.taxa_minima = float(taxa_minima)
+        self.taxa_maxima = float(taxa_maxima or taxa)
+        self.capacidade = float(capacidade or max(1.0, taxa))
+        self._tokens = self.capacidade
+        self._ultimo = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _repor(self):
+        agora = time.monotonic()
+        self._tokens = min(self.capacidade, self._tokens + (agora - self._ultimo) * self.taxa)
+        self._ultimo = agora
+
+    def adquirir(self):
+        """Bloqueia até haver um token disponível"""
+        while True:
+            with self._lock:
+                self._repor()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                espera = (1 - self._tokens) / self.taxa
+            time.sleep(espera)
+
+    def penalizar(self):
+        with self._lock:
+            self.taxa = max(self.taxa_minima, self.taxa / 2)
+
+    def recompensar(self):
+        with self._lock:
+            self.taxa = min(self.taxa_maxima, self.taxa + 0.1)
+
+
+class ErroAPICamara(Exception):
+    pass
+
+
+class ClienteCamara:
+    def __init__(self, url_base=URL_BASE, max_conexoes=10, taxa=5.0, tentativas=4,
+                 backoff=0.5, timeout=30):
+        self.url_base = url_base.rstrip('/')
+        self.tentativas = tentativas
+        self.backoff = backoff
+        self.timeout = timeout
+        self.limitador = LimitadorTaxa(taxa=taxa)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_conexoes)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers['Accept'] = 'application/json'
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _espera(self, tentativa, response=None):
+        if response is not None:
+            retry_after = response.headers.get('Retry-After', '')
+            if retry_after.isdigit():
+                return float(retry_after)
+        return self.backoff * (2 ** tentativa) * (1 + random.random() / 2)
+
+    def get(self, url, params=None):
+        """GET com limite de taxa e novas tentativas; retorna o JSON da resposta"""
+        if not url.startswith(('http://', 'https://')):
+            url = f'{self.url_base}/{url.lstrip("/")}'
+
+        for tentativa in range(self.tentativas):
+            self.limitador.adquirir()
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if tentativa == self.tentativas - 1:
+                    raise ErroAPICamara(f'Falha ao acessar {url}: {e}') from e
+                time.sleep(self._espera(tentativa))
+                continue
+
+            if response.status_code in STATUS_REPETIVEIS:
+                self.limitador.penalizar()
+                if tentativa == self.tentativas - 1:
+                    raise ErroAPICamara(f'{url} respondeu {response.status_code}')
+                time.sleep(self._espera(tentativa, response))
+                continue
+
+            if response.status_code != 200:
+                raise ErroAPICamara(f'{url} respondeu {response.status_code}')
+
+            self.limitador.recompensar()
+            return response.json()
+
+    def paginas_deputados(self, itens=100, url=None):
+        """Percorre a lista de deputados seguindo os links ``next`` da API.
+
+        Gera ``(dados, proxima_url)`` uma página por vez, sem acumular as
+        anteriores. ``url`` permite retomar de uma página já conhecida
+        (por exemplo, a ``proxima_url`` salva em um checkpoint).
+        """
+        params = None
+        if url is None:
+            url = 'deputados'
+            params = {'ordem': 'ASC', 'ordenarPor': 'nome', 'itens': itens, 'pagina': 1}
+
+        while url:
+            resposta = self.get(url, params=params)
+            proxima = next(
+                (link.get('href') for link in resposta.get('links', []) if link.get('rel') == 'next'),
+                None,
+            )
+            yield resposta.get('dados', []), proxima
+            url, params = proxima, None
+
+    def detalhes_deputado(self, id_deputado):
+        return self.get(f'deputados/{id_deputado}').get('dados', {})
+
+    def detalhes_em_paralelo(self, deputados, workers=8):
+        """Busca os detalhes de cada deputado da lista em paralelo.
+
+        Gera ``(deputado, detalhes, erro)`` na ordem em que as respostas
+        chegam; ``erro`` é a exceção levantada ou ``None``.
+        """
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futuros = {
+                executor.submit(self.detalhes_deputado, deputado.get('id')): deputado
+                for deputado in deputados
+            }
+            for futuro in as_completed(futuros):
+                deputado = futuros[futuro]
+                try:
+                    yield deputado, futuro.result(), None
+                except Exception as e:
+                    yield deputado, None, e
@@ -0,0 +1,86 @@
+"""Comentários moderados exibidos no perfil do político.
+
+Só entram comentários com ``moderacao='APROVADO'``, do mais recente para o
+mais antigo. A paginação é por chave em ``(criado_em, id)``, servida pelo
+índice parcial ``core_avaliacao_comentarios_idx`` (só linhas aprovadas),
+então a página 1000 de um político com um milhão de comentários custa o
+mesmo que a primeira. Do usuário só o ``username`` é lido (``only()``).
+
+Cada página fica em cache sob a versão do perfil do político (core.cache),
+que muda a cada voto, comentário ou moderação dele.
+"""
+import base64
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from .cache import versao_perfil
+from .models import AvaliacaoUsuario
+
+TAMANHO_PAGINA = 20
+TAMANHO_MAXIMO = 50
+
+
+def codificar_cursor(avaliacao):
+    dados = [avaliacao.criado_em.isoformat(), avaliacao.id]
+    return base64.urlsafe_b64encode(json.dumps(dados).encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor):
+    """Retorna ``(criado_em, id)``; ValueError se o cursor for inválido"""
+    try:
+        criado_em, avaliacao_id = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        criado_em = parse_datetime(criado_em)
+        if criado_em is None:
+            raise ValueError
+        return criado_em, int(avaliacao_id)
+    except (ValueError, TypeError):
+        raise ValueError('Cursor inválido')
+
+
+def pagina_comentarios(politico_id, cursor=None, tamanho=TAMANHO_PAGINA):
+    """``(comentarios, proximo_cursor)``; ``proximo_cursor`` é ``None`` na última página"""
+    tamanho = max(1, min(tamanho, TAMANHO_MAXIMO))
+    queryset = AvaliacaoUsuario.objects.filter(politico_id=politico_id, moderacao='APROVADO')
+    if cursor:
+        criado_em, avaliacao_id = decodificar_cursor(cursor)
+        # O primeiro termo posiciona a busca no índice; o segundo desempata
+        queryset = queryset.filter(criado_em__lte=criado_em).filter(
+            Q(criado_em__lt=criado_em) | Q(id__lt=avaliacao_id)
+        )
+    avaliacoes = list(
+        queryset.select_related('usuario')
+        .only('id', 'nota', 'comentario', 'criado_em', 'usuario__username')
+        .order_by('-criado_em', '-id')[:tamanho + 1]
+    )
+
+    proximo = None
+    if len(avaliacoes) > tamanho:
+        avaliacoes = avaliacoes[:tamanho]
+        proximo = codificar_cursor(avaliacoes[-1])
+    comentarios = [
+        {
+            'id': avaliacao.id,
+            'usuario': avaliacao.usuario.username if avaliacao.usuario else None,
+            'nota': avaliacao.nota,
+            'comentario': avaliacao.comentario,
+            'criado_em': avaliacao.criado_em.isoformat(),
+        }
+        for avaliacao in avaliacoes
+    ]
+    return comentarios, proximo
+
+
+def obter_comentarios(politico_id, cursor=None, tamanho=TAMANHO_PAGINA):
+    """``pagina_comentarios`` em cache; a versão é lida antes da consulta"""
+    tamanho = max(1, min(tamanho, TAMANHO_MAXIMO))
+    geracao, versao = versao_perfil(politico_id)
+    chave = f'iip:comentarios:{politico_id}:v{geracao}.{versao}:{tamanho}:{cursor or ""}'
+    pagina = cache.get(chave)
+    if pagina is None:
+        pagina = pagina_comentarios(politico_id, cursor, tamanho)
+        cache.set(chave, pagina, settings.PERFIL_CACHE_TIMEOUT)
+    return pagina
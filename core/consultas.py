@@ -0,0 +1,96 @@
+"""Contagem e tempo das consultas SQL por requisição.
+
+``ColetorConsultas`` é instalado com ``connection.execute_wrapper`` (não
+depende de ``DEBUG``) e registra quantas consultas foram feitas, o tempo
+total no banco e as mais lentas. ``PerfilConsultasMiddleware`` o usa em
+cada requisição: com ``settings.IIP_PERFIL_CONSULTAS`` ligado, grava os
+números nos cabeçalhos ``X-DB-Consultas``/``X-DB-Tempo-ms`` e registra no
+log ``core.consultas`` as requisições acima de
+``settings.IIP_ORCAMENTO_CONSULTAS`` consultas, com as mais lentas.
+
+Nos testes, ``orcamento_consultas`` falha quando um trecho (uma view com
+seu template, por exemplo) passa do número de consultas declarado, o que
+denuncia N+1 reintroduzidos em laços de template.
+"""
+import heapq
+import logging
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('core.consultas')
+
+# Consultas mais lentas guardadas por requisição
+MAIS_LENTAS = 5
+
+
+class ColetorConsultas:
+    def __init__(self, guardar=MAIS_LENTAS):
+        self.guardar = guardar
+        self.total = 0
+        self.segundos = 0.0
+        self._lentas = []
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duracao = time.perf_counter() - inicio
+            self.total += 1
+            self.segundos += duracao
+            item = (duracao, self.total, sql)
+            if len(self._lentas) < self.guardar:
+                heapq.heappush(self._lentas, item)
+            elif duracao > self._lentas[0][0]:
+                heapq.heapreplace(self._lentas, item)
+
+    @property
+    def mais_lentas(self):
+        """``[(segundos, sql)]`` da mais lenta para a mais rápida"""
+        return [(duracao, sql) for duracao, _, sql in sorted(self._lentas, reverse=True)]
+
+    @contextmanager
+    def instalar(self):
+        """Coleta as consultas de todas as conexões enquanto o bloco executa"""
+        with ExitStack() as pilha:
+            for conexao in connections.all():
+                pilha.enter_context(conexao.execute_wrapper(self))
+            yield self
+
+
+@contextmanager
+def orcamento_consultas(maximo, mensagem=''):
+    """Levanta AssertionError se o bloco fizer mais de ``maximo`` consultas"""
+    coletor = ColetorConsultas(guardar=maximo + 1)
+    with coletor.instalar():
+        yield coletor
+    if coletor.total > maximo:
+        consultas = '\n'.join(f'  {duracao * 1000:.1f} ms: {sql}' for duracao, sql in coletor.mais_lentas)
+        raise AssertionError(
+            f'{mensagem or "Trecho"} fez {coletor.total} consultas (orçamento: {maximo}):\n{consultas}'
+        )
+
+
+class PerfilConsultasMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.IIP_PERFIL_CONSULTAS:
+            return self.get_response(request)
+
+        with ColetorConsultas().instalar() as coletor:
+            response = self.get_response(request)
+
+        response['X-DB-Consultas'] = str(coletor.total)
+        response['X-DB-Tempo-ms'] = f'{coletor.segundos * 1000:.1f}'
+        if coletor.total > settings.IIP_ORCAMENTO_CONSULTAS:
+            logger.warning(
+                '%s %s: %d consultas em %.1f ms; mais lentas:\n%s',
+                request.method, request.path, coletor.total, coletor.segundos * 1000,
+                '\n'.join(f'  {duracao * 1000:.1f} ms: {sql}' for duracao, sql in coletor.mais_lentas),
+            )
+        return response
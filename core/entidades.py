@@ -0,0 +1,256 @@
+"""Vinculação de textos a políticos (reconhecimento de entidades).
+
+Os nomes são normalizados (minúsculas, sem acentos, pontuação vira espaço)
+e compilados em um autômato de Aho-Corasick sobre palavras, que encontra
+todas as ocorrências de todos os nomes em uma única passada pelo texto.
+
+``IndiceEntidades`` monta o autômato a partir de ``Politico.nome``, do
+slug, de variantes do nome (sem partículas, primeiro + último nome) e da
+tabela ``AliasPolitico``. Quando um termo serve a mais de um político, o
+contexto do documento (UF e partido informados ou rótulos como "(PT-SP)"
+no texto) desempata. O índice pode ser gravado com pickle e recarregado
+enquanto o banco não mudar.
+"""
+import pickle
+import re
+import unicodedata
+from collections import deque, namedtuple
+
+from django.db.models import Count, Max
+
+from .models import Politico, AliasPolitico
+
+_NAO_ALFANUMERICO = re.compile(r'[^0-9a-z]+')
+
+# Rótulos de partido e UF como "(PT-SP)" ou "PL/RJ"
+_ROTULO = re.compile(r'\b([A-Za-z][A-Za-z0-9]{1,14})\s*[-/]\s*([A-Z]{2})\b')
+
+PARTICULAS = {'da', 'das', 'de', 'do', 'dos', 'e'}
+
+UFS = {
+    'AC', 'AL', 'AM', 'AP', 'BA', 'CE', 'DF', 'ES', 'GO', 'MA', 'MG', 'MS', 'MT', 'PA', 'PB', 'PE', 'PI', 'PR',
+    'RJ', 'RN', 'RO', 'RR', 'RS', 'SC', 'SE', 'SP', 'TO',
+}
+
+# Pesos dos termos: nome completo e apelidos valem mais que variantes derivadas
+PESO_NOME = 2
+PESO_VARIANTE = 1
+
+Vinculo = namedtuple('Vinculo', 'politico_id inicio fim termo')
+
+
+def normalizar(texto):
+    """Minúsculas, sem acentos e com qualquer pontuação trocada por um espaço"""
+    texto = unicodedata.normalize('NFKD', texto or '').encode('ascii', 'ignore').decode('ascii')
+    return _NAO_ALFANUMERICO.sub(' ', texto.lower()).strip()
+
+
+def variantes(nome):
+    """Formas derivadas do nome: sem partículas e primeiro + último nome"""
+    palavras = normalizar(nome).split()
+    sem_particulas = [palavra for palavra in palavras if palavra not in PARTICULAS]
+    formas = set()
+    if len(sem_particulas) >= 2:
+        formas.add(' '.join(sem_particulas))
+        formas.add(f'{sem_particulas[0]} {sem_particulas[-1]}')
+    formas.discard(' '.join(palavras))
+    return formas
+
+
+class AutomatoNomes:
+    """Autômato de Aho-Corasick sobre palavras de texto normalizado.
+
+    ``adicionar`` associa um termo a um valor (ex.: o id do político);
+    depois de ``compilar``, ``buscar`` recebe a lista de palavras e devolve
+    ``(inicio, fim, valores)`` em posições de palavra. Andar por palavras,
+    e não por caracteres, dá cerca de dez vezes menos transições e garante
+    as fronteiras de palavra sem verificação extra.
+    """
+
+    def __init__(self):
+        self._transicoes = [{}]
+        self._falhas = [0]
+        self._terminais = [[]]
+        self._saidas = [[]]
+        self._compilado = False
+
+    def adicionar(self, termo, valor):
+        palavras = normalizar(termo).split()
+        if not palavras:
+            return
+        estado = 0
+        for palavra in palavras:
+            proximo = self._transicoes[estado].get(palavra)
+            if proximo is None:
+                proximo = len(self._transicoes)
+                self._transicoes.append({})
+                self._falhas.append(0)
+                self._terminais.append([])
+                self._transicoes[estado][palavra] = proximo
+            estado = proximo
+        if self._terminais[estado]:
+            self._terminais[estado][0][1].add(valor)
+        else:
+            self._terminais[estado].append((len(palavras), {valor}))
+        self._compilado = False
+
+    def compilar(self):
+        """Calcula os links de falha (busca em largura a partir da raiz)"""
+        self._saidas = [list(terminais) for terminais in self._terminais]
+        fila = deque()
+        for estado in self._transicoes[0].values():
+            self._falhas[estado] = 0
+            fila.append(estado)
+        while fila:
+            atual = fila.popleft()
+            for palavra, proximo in self._transicoes[atual].items():
+                fila.append(proximo)
+                falha = self._falhas[atual]
+                while falha and palavra not in self._transicoes[falha]:
+                    falha = self._falhas[falha]
+                self._falhas[proximo] = self._transicoes[falha].get(palavra, 0)
+                # Termos que terminam no estado de falha também terminam aqui
+                self._saidas[proximo] = self._saidas[proximo] + self._saidas[self._falhas[proximo]]
+        self._compilado = True
+        return self
+
+    def __len__(self):
+        return sum(len(terminais) for terminais in self._terminais)
+
+    def buscar(self, palavras):
+        if not self._compilado:
+            self.compilar()
+        transicoes = self._transicoes
+        falhas = self._falhas
+        saidas = self._saidas
+        estado = 0
+        for posicao, palavra in enumerate(palavras):
+            while estado and palavra not in transicoes[estado]:
+                estado = falhas[estado]
+            estado = transicoes[estado].get(palavra, 0)
+            for comprimento, valores in saidas[estado]:
+                yield posicao + 1 - comprimento, posicao + 1, valores
+
+
+class IndiceEntidades:
+    """Índice de vinculação de textos a políticos; ver o docstring do módulo"""
+
+    def __init__(self, automato, politicos, partidos, assinatura=None):
+        self.automato = automato
+        self.politicos = politicos  # {id: (uf, sigla do partido)}
+        self.partidos = partidos
+        self.assinatura = assinatura
+
+    @classmethod
+    def construir(cls):
+        automato = AutomatoNomes()
+        politicos = {}
+        partidos = set()
+        consulta = Politico.objects.values_list('id', 'nome', 'slug', 'uf', 'partido__sigla')
+        for politico_id, nome, slug, uf, sigla in consulta.iterator(chunk_size=2000):
+            politicos[politico_id] = (uf or '', (sigla or '').upper())
+            if sigla:
+                partidos.add(sigla.upper())
+            automato.adicionar(nome, (politico_id, PESO_NOME))
+            if slug:
+                # Sufixos de desempate do slug ("-2") não fazem parte do nome
+                automato.adicionar(re.sub(r'-\d+$', '', slug), (politico_id, PESO_NOME))
+            for variante in variantes(nome):
+                automato.adicionar(variante, (politico_id, PESO_VARIANTE))
+        for politico_id, alias in AliasPolitico.objects.values_list('politico_id', 'alias').iterator(chunk_size=2000):
+            automato.adicionar(alias, (politico_id, PESO_NOME))
+        return cls(automato.compilar(), politicos, partidos, assinatura_banco())
+
+    def salvar(self, caminho):
+        with open(caminho, 'wb') as arquivo:
+            pickle.dump(self, arquivo, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def carregar(cls, caminho):
+        """Índice gravado em ``caminho``, ou ``None`` se o banco mudou depois dele"""
+        with open(caminho, 'rb') as arquivo:
+            indice = pickle.load(arquivo)
+        if not isinstance(indice, cls) or indice.assinatura != assinatura_banco():
+            return None
+        return indice
+
+    @classmethod
+    def carregar_ou_construir(cls, caminho=None):
+        if caminho:
+            try:
+                indice = cls.carregar(caminho)
+            except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+                indice = None
+            if indice is not None:
+                return indice
+        indice = cls.construir()
+        if caminho:
+            indice.salvar(caminho)
+        return indice
+
+    def contexto(self, texto):
+        """UFs e partidos citados em rótulos como "(PT-SP)" no texto original"""
+        ufs = set()
+        partidos = set()
+        for sigla, uf in _ROTULO.findall(texto or ''):
+            if uf in UFS and sigla.upper() in self.partidos:
+                ufs.add(uf)
+                partidos.add(sigla.upper())
+        return ufs, partidos
+
+    def vincular(self, texto, uf=None, partido=None, palavras=None):
+        """Lista de ``Vinculo`` dos políticos citados no texto.
+
+        Entre ocorrências sobrepostas vale a mais longa (mais à esquerda em
+        caso de empate). Termos que servem a vários políticos são
+        desempatados pelo contexto (``uf``/``partido`` informados ou
+        rótulos no texto) e depois pelo peso do termo; se ainda houver
+        empate, a ocorrência é ignorada. ``palavras`` evita normalizar de
+        novo um texto já normalizado.
+        """
+        if palavras is None:
+            palavras = normalizar(texto).split()
+        ocorrencias = sorted(self.automato.buscar(palavras), key=lambda o: (o[0], o[0] - o[1]))
+        if not ocorrencias:
+            return []
+
+        ufs, partidos = self.contexto(texto)
+        if uf:
+            ufs.add(uf.upper())
+        if partido:
+            partidos.add(partido.upper())
+
+        vinculos = []
+        fim_anterior = 0
+        for inicio, fim, valores in ocorrencias:
+            if inicio < fim_anterior:
+                continue
+            fim_anterior = fim
+            politico_id = self._desempatar(valores, ufs, partidos)
+            if politico_id is None:
+                continue
+            vinculos.append(Vinculo(politico_id, inicio, fim, ' '.join(palavras[inicio:fim])))
+        return vinculos
+
+    def _desempatar(self, valores, ufs, partidos):
+        pontos = {}
+        for politico_id, peso in valores:
+            pontos[politico_id] = max(pontos.get(politico_id, 0), peso)
+        if len(pontos) == 1:
+            return next(iter(pontos))
+        for politico_id in pontos:
+            uf, sigla = self.politicos.get(politico_id, ('', ''))
+            pontos[politico_id] += 2 * (uf in ufs) + 2 * (sigla in partidos)
+        melhor = max(pontos.values())
+        vencedores = [politico_id for politico_id, valor in pontos.items() if valor == melhor]
+        return vencedores[0] if len(vencedores) == 1 else None
+
+
+def assinatura_banco():
+    """Resumo que muda quando políticos são criados, alterados ou removidos ou quando apelidos entram ou saem"""
+    politicos = Politico.objects.aggregate(total=Count('id'), ultimo=Max('atualizado_em'), maior_id=Max('id'))
+    aliases = AliasPolitico.objects.aggregate(total=Count('id'), maior_id=Max('id'))
+    return (
+        politicos['total'], politicos['ultimo'], politicos['maior_id'],
+        aliases['total'], aliases['maior_id'],
+    )
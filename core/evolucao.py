@@ -0,0 +1,175 @@
+"""Série reduzida da evolução da pontuação de cada político (gráfico do perfil).
+
+A fonte é o histórico diário de core.tendencias. Em vez de ler todo o
+histórico a cada visita, cada político tem uma ``SerieEvolucao`` com no
+máximo ``2 * LIMITE`` pontos ``[data ISO, pontuação]``, que o endpoint
+devolve como está.
+
+``atualizar_series`` roda junto com a fotografia diária e só acrescenta o
+ponto do dia: dias repetidos substituem o último ponto e patamares (três
+valores iguais seguidos) só estendem a data do último ponto. Quando a série
+passa de ``2 * LIMITE`` pontos ela é reduzida a ``LIMITE`` com LTTB
+(Largest-Triangle-Three-Buckets), que mantém picos e vales visíveis.
+Séries ausentes ou que recebem um dia anterior ao último ponto são
+remontadas a partir do histórico completo.
+"""
+import datetime
+
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import invalidar_series
+from .models import HistoricoPontuacao, SerieEvolucao
+
+LIMITE = 120
+
+
+def lttb(pontos, limite):
+    """Reduz ``[(x, y)]`` ordenados por x a ``limite`` pontos (Largest-Triangle-Three-Buckets)"""
+    if limite >= len(pontos) or limite < 3:
+        return list(pontos)
+
+    reduzidos = [pontos[0]]
+    tamanho_balde = (len(pontos) - 2) / (limite - 2)
+    anterior = 0
+    for balde in range(limite - 2):
+        inicio = int(balde * tamanho_balde) + 1
+        fim = int((balde + 1) * tamanho_balde) + 1
+
+        # Média do balde seguinte (ou o último ponto), terceiro vértice do triângulo
+        proximo_fim = min(int((balde + 2) * tamanho_balde) + 1, len(pontos))
+        seguintes = pontos[fim:proximo_fim] or pontos[-1:]
+        media_x = sum(x for x, _ in seguintes) / len(seguintes)
+        media_y = sum(y for _, y in seguintes) / len(seguintes)
+
+        ax, ay = pontos[anterior]
+        maior_area = -1
+        escolhido = inicio
+        for indice in range(inicio, fim):
+            x, y = pontos[indice]
+            area = abs((ax - media_x) * (y - ay) - (ax - x) * (media_y - ay))
+            if area > maior_area:
+                maior_area = area
+                escolhido = indice
+        reduzidos.append(pontos[escolhido])
+        anterior = escolhido
+    reduzidos.append(pontos[-1])
+    return reduzidos
+
+
+def reduzir(pontos, limite=LIMITE):
+    """Aplica LTTB a pontos ``[data ISO, valor]``"""
+    numericos = [(datetime.date.fromisoformat(dia).toordinal(), valor) for dia, valor in pontos]
+    return [
+        [datetime.date.fromordinal(int(x)).isoformat(), valor]
+        for x, valor in lttb(numericos, limite)
+    ]
+
+
+def acrescentar(pontos, dia, valor, limite=LIMITE):
+    """Série com o ponto de ``dia``, ou ``None`` se ``dia`` for anterior ao último ponto"""
+    dia = dia.isoformat()
+    pontos = list(pontos)
+    if pontos and pontos[-1][0] > dia:
+        return None
+    if pontos and pontos[-1][0] == dia:
+        pontos[-1] = [dia, valor]
+    elif len(pontos) >= 2 and pontos[-1][1] == valor and pontos[-2][1] == valor:
+        pontos[-1] = [dia, valor]
+    else:
+        pontos.append([dia, valor])
+    if len(pontos) > 2 * limite:
+        pontos = reduzir(pontos, limite)
+    return pontos
+
+
+def _series_do_historico(politico_ids, limite):
+    """Séries completas refeitas do histórico para ``politico_ids``"""
+    series = {politico_id: [] for politico_id in politico_ids}
+    historico = HistoricoPontuacao.objects.filter(politico_id__in=politico_ids).order_by(
+        'politico_id', 'data'
+    ).values_list('politico_id', 'data', 'pontuacao_final')
+    for politico_id, dia, pontuacao in historico.iterator(chunk_size=5000):
+        series[politico_id] = acrescentar(series[politico_id], dia, float(pontuacao), limite)
+    return series
+
+
+def _gravar(series, existentes, batch_size):
+    agora = timezone.now()
+    novas = []
+    alteradas = []
+    for politico_id, pontos in series.items():
+        serie = existentes.get(politico_id)
+        if serie is None:
+            novas.append(SerieEvolucao(politico_id=politico_id, pontos=pontos, atualizado_em=agora))
+        elif serie.pontos != pontos:
+            serie.pontos = pontos
+            serie.atualizado_em = agora
+            alteradas.append(serie)
+    with transaction.atomic():
+        SerieEvolucao.objects.bulk_create(novas, batch_size=batch_size)
+        SerieEvolucao.objects.bulk_update(alteradas, ['pontos', 'atualizado_em'], batch_size=batch_size)
+    return len(novas), len(alteradas)
+
+
+def em_lotes(itens, tamanho):
+    """Agrupa ``itens`` em listas de até ``tamanho``, sem materializar o iterável"""
+    lote = []
+    for item in itens:
+        lote.append(item)
+        if len(lote) >= tamanho:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def atualizar_series(data=None, batch_size=1000, limite=LIMITE):
+    """Acrescenta a fotografia de ``data`` às séries; retorna ``(criadas, atualizadas)``"""
+    data = data or timezone.localdate()
+    fotografias = HistoricoPontuacao.objects.filter(data=data).order_by('politico_id').values_list(
+        'politico_id', 'pontuacao_final'
+    )
+    criadas = atualizadas = 0
+    for lote in em_lotes(fotografias.iterator(chunk_size=batch_size), batch_size):
+        novas, alteradas = _atualizar_lote(data, lote, batch_size, limite)
+        criadas += novas
+        atualizadas += alteradas
+
+    if criadas or atualizadas:
+        # bulk_create/bulk_update não disparam sinais
+        invalidar_series()
+    return criadas, atualizadas
+
+
+def _atualizar_lote(data, lote, batch_size, limite):
+    existentes = SerieEvolucao.objects.in_bulk([politico_id for politico_id, _ in lote])
+    series = {}
+    refazer = []
+    for politico_id, pontuacao in lote:
+        serie = existentes.get(politico_id)
+        pontos = acrescentar(serie.pontos, data, float(pontuacao), limite) if serie else None
+        if pontos is None:
+            refazer.append(politico_id)
+        else:
+            series[politico_id] = pontos
+    if refazer:
+        series.update(_series_do_historico(refazer, limite))
+    return _gravar(series, existentes, batch_size)
+
+
+def reconstruir_series(batch_size=1000, limite=LIMITE):
+    """Remonta todas as séries a partir do histórico completo"""
+    politico_ids = HistoricoPontuacao.objects.order_by('politico_id').values_list(
+        'politico_id', flat=True
+    ).distinct()
+    criadas = atualizadas = 0
+    for lote in em_lotes(politico_ids.iterator(chunk_size=batch_size), batch_size):
+        novas, alteradas = _gravar(
+            _series_do_historico(lote, limite), SerieEvolucao.objects.in_bulk(lote), batch_size
+        )
+        criadas += novas
+        atualizadas += alteradas
+    if criadas or atualizadas:
+        invalidar_series()
+    return criadas, atualizadas
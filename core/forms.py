@@ -1,5 +1,6 @@
 from django import forms
 from .models import Politico, Cargo, Partido
+from .slugs import salvar_com_slug
 from django.core.exceptions import ValidationError
 
 
@@ -41,4 +42,15 @@ class PoliticoForm(forms.ModelForm):
         super().__init__(*args, **kwargs)
         # Torna alguns campos opcionais na interface
         self.fields['foto'].required = False
-        self.fields['foto_url'].required = False
\ No newline at end of file
+        self.fields['foto_url'].required = False
+    
+    def save(self, commit=True):
+        politico = super().save(commit=False)
+        if 'foto' in self.changed_data:
+            # Foto enviada à mão: espelhar_fotos_politicos não a substitui
+            politico.foto_checksum = ''
+        if commit:
+            # Gera um slug único para políticos novos (ver core.slugs)
+            salvar_com_slug(politico)
+            self.save_m2m()
+        return politico
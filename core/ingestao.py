@@ -0,0 +1,211 @@
+"""Camada de ingestão em lote de políticos.
+
+Os comandos de importação acumulam registros em um ``IngestorPoliticos``,
+que carrega partidos e cargos uma única vez, aloca slugs em memória (ver
+core.slugs) e grava tudo com ``bulk_create``/``bulk_update`` dentro de uma
+transação, em vez de ``get_or_create`` + laço de ``exists()`` + ``save()``
+por linha. Partidos e cargos novos também só são criados nessa transação:
+se ela falhar, nenhum fica órfão no banco.
+
+Como operações em lote não disparam sinais, ao final da gravação o cache
+do ranking, as opções de filtro e o índice de busca são invalidados
+explicitamente.
+"""
+from dataclasses import dataclass, field
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .busca import invalidar_busca
+from .cache import invalidar_perfis, invalidar_ranking
+from .models import Politico, Partido, Cargo
+from .referencias import invalidar_referencias
+from .slugs import AlocadorSlugs, TENTATIVAS
+
+CAMPOS_POLITICO = (
+    'partido', 'cargo', 'esfera', 'uf', 'municipio', 'foto_url', 'data_nascimento', 'ativo',
+    'id_externo', 'hash_origem',
+)
+
+# Rastreamento da fonte: sempre sobrescritos quando informados
+CAMPOS_ORIGEM = ('id_externo', 'hash_origem')
+
+
+@dataclass
+class ResultadoIngestao:
+    criados: list = field(default_factory=list)
+    atualizados: list = field(default_factory=list)
+    inalterados: list = field(default_factory=list)
+
+
+class IngestorPoliticos:
+    """Acumula políticos e os grava em lote.
+
+    ``atualizar`` lista os campos que podem ser sobrescritos quando um
+    político já existe (pelo ``id_externo`` ou, na falta dele, pelo nome);
+    valores vazios (``None``/``''``) nunca apagam o que está no banco.
+    """
+
+    def __init__(self, atualizar=(), batch_size=1000):
+        self.atualizar = tuple(atualizar)
+        self.batch_size = batch_size
+        self.partidos = {partido.sigla: partido for partido in Partido.objects.all()}
+        self.cargos = {}
+        for cargo in Cargo.objects.all():
+            self.cargos.setdefault(cargo.nome, cargo)
+            self.cargos[(cargo.nome, cargo.poder, cargo.nivel)] = cargo
+        self.slugs = AlocadorSlugs()
+        self.partidos_criados = []
+        self.cargos_criados = []
+        self._pendentes = {}
+
+    def partido(self, sigla, nome=None):
+        """Partido pela sigla; se ainda não existir, é criado em ``gravar()``"""
+        if not sigla:
+            return None
+        if sigla not in self.partidos:
+            self.partidos[sigla] = Partido(sigla=sigla, nome=nome or sigla)
+            self.partidos_criados.append(self.partidos[sigla])
+        return self.partidos[sigla]
+
+    def cargo(self, nome, poder=None, nivel=None):
+        """Cargo pelo nome; com ``poder`` e ``nivel`` ele é criado em ``gravar()`` se faltar"""
+        if poder and nivel:
+            chave = (nome, poder, nivel)
+            if chave not in self.cargos:
+                cargo = Cargo(nome=nome, poder=poder, nivel=nivel)
+                self.cargos[chave] = cargo
+                self.cargos.setdefault(nome, cargo)
+                self.cargos_criados.append(cargo)
+            return self.cargos[chave]
+        return self.cargos.get(nome)
+
+    def adicionar(self, nome, **campos):
+        """Enfileira um político; o último registro com o mesmo nome prevalece"""
+        desconhecidos = set(campos) - set(CAMPOS_POLITICO)
+        if desconhecidos:
+            raise ValueError(f'Campos desconhecidos: {", ".join(sorted(desconhecidos))}')
+        self._pendentes[nome] = campos
+
+    def __len__(self):
+        return len(self._pendentes)
+
+    def _existentes(self):
+        """Mapeia cada nome pendente ao político já gravado, se houver"""
+        por_id = {}
+        ids = [campos['id_externo'] for campos in self._pendentes.values() if campos.get('id_externo')]
+        for inicio in range(0, len(ids), self.batch_size):
+            lote = ids[inicio:inicio + self.batch_size]
+            for politico in Politico.objects.filter(id_externo__in=lote).order_by('id'):
+                por_id.setdefault(politico.id_externo, politico)
+
+        existentes = {}
+        for nome, campos in self._pendentes.items():
+            if campos.get('id_externo') in por_id:
+                existentes[nome] = por_id[campos['id_externo']]
+
+        nomes = [nome for nome in self._pendentes if nome not in existentes]
+        for inicio in range(0, len(nomes), self.batch_size):
+            lote = nomes[inicio:inicio + self.batch_size]
+            for politico in Politico.objects.filter(nome__in=lote).order_by('id'):
+                existentes.setdefault(politico.nome, politico)
+        return existentes
+
+    def gravar(self):
+        """Grava os políticos pendentes em uma transação e retorna o resultado"""
+        resultado = ResultadoIngestao()
+        if not (self._pendentes or self.partidos_criados or self.cargos_criados):
+            return resultado
+
+        agora = timezone.now()
+        novos = []
+        alterados = []
+        campos_alterados = set()
+
+        with transaction.atomic():
+            self._criar_referencias()
+            existentes = self._existentes()
+            self.slugs.preparar([nome for nome in self._pendentes if nome not in existentes])
+            for nome, campos in self._pendentes.items():
+                politico = existentes.get(nome)
+                if politico is None:
+                    novos.append(Politico(nome=nome, slug=self.slugs.alocar(nome), **campos))
+                    resultado.criados.append(nome)
+                    continue
+
+                mudou = set()
+                for campo in self.atualizar + CAMPOS_ORIGEM:
+                    valor = campos.get(campo)
+                    if valor in (None, '') or getattr(politico, campo) == valor:
+                        continue
+                    setattr(politico, campo, valor)
+                    mudou.add(campo)
+
+                if mudou:
+                    politico.atualizado_em = agora
+                    alterados.append(politico)
+                    campos_alterados |= mudou
+                # Só registrar a origem (id/hash) não conta como atualização
+                if mudou - set(CAMPOS_ORIGEM):
+                    resultado.atualizados.append(nome)
+                else:
+                    resultado.inalterados.append(nome)
+
+            self._criar(novos)
+            if alterados:
+                Politico.objects.bulk_update(
+                    alterados, sorted(campos_alterados) + ['atualizado_em'], batch_size=self.batch_size
+                )
+
+        self._pendentes = {}
+        if novos or alterados or self.partidos_criados or self.cargos_criados:
+            invalidar_ranking()
+            invalidar_referencias()
+            invalidar_perfis()
+        if novos:
+            invalidar_busca()
+        self.partidos_criados = []
+        self.cargos_criados = []
+        return resultado
+
+    def _criar_referencias(self):
+        """Cria os partidos e cargos novos e copia as chaves para as instâncias já distribuídas.
+
+        ``ignore_conflicts`` tolera outro processo que tenha criado o mesmo
+        partido ou cargo antes; a releitura traz a chave de quem ficou no
+        banco, e como as instâncias são as mesmas usadas nos políticos
+        pendentes, eles passam a apontar para ela.
+        """
+        if self.partidos_criados:
+            Partido.objects.bulk_create(self.partidos_criados, ignore_conflicts=True)
+            gravados = dict(
+                Partido.objects.filter(sigla__in=[partido.sigla for partido in self.partidos_criados])
+                .values_list('sigla', 'pk')
+            )
+            for partido in self.partidos_criados:
+                partido.pk = gravados[partido.sigla]
+        if self.cargos_criados:
+            Cargo.objects.bulk_create(self.cargos_criados, ignore_conflicts=True)
+            gravados = {
+                (nome, poder, nivel): pk
+                for pk, nome, poder, nivel in Cargo.objects.filter(
+                    nome__in=[cargo.nome for cargo in self.cargos_criados]
+                ).values_list('pk', 'nome', 'poder', 'nivel')
+            }
+            for cargo in self.cargos_criados:
+                cargo.pk = gravados[(cargo.nome, cargo.poder, cargo.nivel)]
+
+    def _criar(self, novos):
+        """bulk_create que realoca os slugs se outro processo os ocupou antes"""
+        for tentativa in range(TENTATIVAS):
+            try:
+                with transaction.atomic():
+                    Politico.objects.bulk_create(novos, batch_size=self.batch_size)
+                return
+            except IntegrityError:
+                if tentativa == TENTATIVAS - 1:
+                    raise
+                self.slugs = AlocadorSlugs()
+                self.slugs.preparar([politico.nome for politico in novos])
+                for politico in novos:
+                    politico.slug = self.slugs.alocar(politico.nome)
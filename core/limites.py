@@ -0,0 +1,173 @@
+"""Limites de taxa e anti-abuso dos votos.
+
+``JanelaDeslizante`` conta eventos por identificador com a aproximação de
+janela deslizante: dois contadores de janela fixa (a atual e a anterior),
+com o anterior pesado pela fração da janela que ainda se sobrepõe. São
+duas leituras e um incremento atômico no cache por verificação, sem tabela
+nem varredura. Os contadores ficam no cache ``settings.IIP_CACHE_LIMITES``,
+que precisa ser compartilhado entre os workers (Redis no docker-compose).
+
+``limitar_votos`` aplica, nesta ordem, os limites configurados em
+``settings.IIP_LIMITES_VOTO`` (por IP, por usuário e, se ligado, por
+político) e a regra de um voto por político a cada
+``settings.IIP_INTERVALO_REVOTO_DIAS`` dias. O limite por IP vem antes da
+autenticação, então inundações anônimas são recusadas sem nenhuma consulta
+ao banco. Atrás de um proxy reverso, ``REMOTE_ADDR`` é o endereço do proxy;
+o IP do cliente é lido de ``X-Forwarded-For`` só quando a conexão vem de
+um dos ``settings.IIP_PROXIES_CONFIAVEIS``, para que o cabeçalho não possa
+ser forjado por quem acessa direto. A regra dos 30 dias é uma chave por
+(usuário, político) com o prazo como timeout; só quando a chave não está
+no cache (despejo, reinício) o voto do usuário é lido pelo índice único
+(politico, usuario).
+"""
+import ipaddress
+import math
+import time
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import JsonResponse
+from django.utils import timezone
+
+from .models import AvaliacaoUsuario
+
+
+def _cache():
+    return caches[settings.IIP_CACHE_LIMITES]
+
+
+class JanelaDeslizante:
+    def __init__(self, nome, limite, janela):
+        self.nome = nome
+        self.limite = limite
+        self.janela = janela
+
+    def registrar(self, identificador, agora=None):
+        """Conta um evento; retorna ``0`` se permitido ou os segundos até tentar de novo"""
+        agora = time.time() if agora is None else agora
+        numero = int(agora // self.janela)
+        decorrido = agora - numero * self.janela
+        chave_atual = f'iip:limite:{self.nome}:{identificador}:{numero}'
+        chave_anterior = f'iip:limite:{self.nome}:{identificador}:{numero - 1}'
+
+        cache = _cache()
+        contagens = cache.get_many([chave_anterior, chave_atual])
+        estimativa = (
+            contagens.get(chave_anterior, 0) * (1 - decorrido / self.janela)
+            + contagens.get(chave_atual, 0)
+        )
+        if estimativa >= self.limite:
+            return max(1, math.ceil(self.janela - decorrido))
+
+        # Guardada por duas janelas: ainda pesa como "anterior" na seguinte
+        cache.add(chave_atual, 0, 2 * self.janela)
+        try:
+            cache.incr(chave_atual)
+        except ValueError:
+            cache.set(chave_atual, 1, 2 * self.janela)
+        return 0
+
+
+def janelas_configuradas():
+    return {
+        nome: JanelaDeslizante(f'voto:{nome}', limite, janela)
+        for nome, (limite, janela) in settings.IIP_LIMITES_VOTO.items()
+    }
+
+
+def _chave_revoto(usuario_id, slug):
+    return f'iip:revoto:{usuario_id}:{slug}'
+
+
+def reservar_revoto(usuario_id, slug):
+    """Reserva o voto de ``usuario_id`` em ``slug``; retorna ``0`` ou os segundos até poder votar de novo"""
+    intervalo = timedelta(days=settings.IIP_INTERVALO_REVOTO_DIAS)
+    if not intervalo:
+        return 0
+    cache = _cache()
+    chave = _chave_revoto(usuario_id, slug)
+    agora = timezone.now()
+
+    votado_em = cache.get(chave)
+    if votado_em is None:
+        # Chave despejada ou primeiro voto: o índice único responde sem varrer a tabela
+        votado_em = AvaliacaoUsuario.objects.filter(
+            politico__slug=slug, usuario_id=usuario_id
+        ).values_list('votado_em', flat=True).first()
+        if votado_em is None or votado_em + intervalo <= agora:
+            if cache.add(chave, agora, intervalo.total_seconds()):
+                return 0
+            votado_em = cache.get(chave) or agora
+        else:
+            cache.add(chave, votado_em, (votado_em + intervalo - agora).total_seconds())
+    return max(1, math.ceil((votado_em + intervalo - agora).total_seconds()))
+
+
+def liberar_revoto(usuario_id, slug):
+    """Desfaz a reserva de um voto que não foi gravado"""
+    _cache().delete(_chave_revoto(usuario_id, slug))
+
+
+def _recusar(mensagem, segundos):
+    resposta = JsonResponse({'error': mensagem}, status=429)
+    resposta['Retry-After'] = str(segundos)
+    return resposta
+
+
+def _confiavel(endereco, proxies):
+    try:
+        endereco = ipaddress.ip_address(endereco)
+    except ValueError:
+        return False
+    return any(endereco in proxy for proxy in proxies)
+
+
+def _ip(request):
+    """IP do cliente: o último endereço de ``X-Forwarded-For`` que não é um proxy confiável"""
+    endereco = request.META.get('REMOTE_ADDR', '')
+    proxies = [ipaddress.ip_network(proxy, strict=False) for proxy in settings.IIP_PROXIES_CONFIAVEIS]
+    if not proxies or not _confiavel(endereco, proxies):
+        return endereco
+    # Cada proxy acrescenta à direita o endereço de quem o chamou
+    for anterior in reversed(request.META.get('HTTP_X_FORWARDED_FOR', '').split(',')):
+        endereco = anterior.strip()
+        if not _confiavel(endereco, proxies):
+            break
+    return endereco
+
+
+def limitar_votos(view):
+    """Decorador de ``avaliar_politico``; deve ficar por fora de ``login_required``"""
+    @wraps(view)
+    def limitada(request, slug, *args, **kwargs):
+        if request.method != 'POST':
+            return view(request, slug, *args, **kwargs)
+
+        janelas = janelas_configuradas()
+        if 'ip' in janelas:
+            espera = janelas['ip'].registrar(_ip(request))
+            if espera:
+                return _recusar('Muitas requisições deste endereço. Tente novamente mais tarde.', espera)
+        if not request.user.is_authenticated:
+            return view(request, slug, *args, **kwargs)
+
+        for nome, identificador in (('usuario', request.user.pk), ('politico', slug)):
+            if nome in janelas:
+                espera = janelas[nome].registrar(identificador)
+                if espera:
+                    return _recusar('Muitas avaliações em pouco tempo. Tente novamente mais tarde.', espera)
+
+        espera = reservar_revoto(request.user.pk, slug)
+        if espera:
+            dias = math.ceil(espera / 86400)
+            return _recusar(
+                f'Você já avaliou este político. Será possível avaliar de novo em {dias} dia(s).', espera
+            )
+
+        resposta = view(request, slug, *args, **kwargs)
+        if resposta.status_code not in (200, 202):
+            liberar_revoto(request.user.pk, slug)
+        return resposta
+    return limitada
@@ -1,6 +1,6 @@
 from django.core.management.base import BaseCommand
-from core.models import Politico, Partido, Cargo
-from django.utils.text import slugify
+from core.models import Politico
+from core.ingestao import IngestorPoliticos
 from datetime import date
 
 
@@ -10,6 +10,9 @@ class Command(BaseCommand):
     def handle(self, *args, **options):
         self.stdout.write('Adicionando mais políticos...')
         
+        # Partidos, cargos e slugs existentes são carregados uma única vez
+        ingestor = IngestorPoliticos()
+        
         # Garantir que os cargos existem
         cargos_data = [
             {'nome': 'Vice-Presidente da República', 'poder': 'EXECUTIVO', 'nivel': 'FEDERAL'},
@@ -17,12 +20,9 @@ class Command(BaseCommand):
         ]
         
         for cargo_info in cargos_data:
-            cargo, created = Cargo.objects.get_or_create(
-                nome=cargo_info['nome'],
-                poder=cargo_info['poder'],
-                nivel=cargo_info['nivel']
-            )
-            if created:
+            chave = (cargo_info['nome'], cargo_info['poder'], cargo_info['nivel'])
+            if chave not in ingestor.cargos:
+                cargo = ingestor.cargo(*chave)
                 self.stdout.write(f'Cargo criado: {cargo.nome}')
         
         # Mais políticos brasileiros conhecidos
@@ -174,51 +174,25 @@ class Command(BaseCommand):
             },
         ]
         
-        # Criar políticos
-        importados = 0
-        ja_existem = 0
-        
+        # Enfileirar políticos
+        rotulos = {}
         for politico_info in politicos_data:
-            # Buscar partido se especificado
+            # Buscar partido se especificado (criado se não existir)
             partido = None
             if politico_info['partido']:
-                try:
-                    partido = Partido.objects.get(sigla=politico_info['partido'])
-                except Partido.DoesNotExist:
-                    # Criar partido se não existir
-                    partido = Partido.objects.create(
-                        sigla=politico_info['partido'],
-                        nome=politico_info['partido']
-                    )
+                ja_existia = politico_info['partido'] in ingestor.partidos
+                partido = ingestor.partido(politico_info['partido'])
+                if not ja_existia:
                     self.stdout.write(f"Partido criado: {partido.sigla}")
             
             # Buscar cargo
-            try:
-                cargo = Cargo.objects.get(nome=politico_info['cargo'])
-            except Cargo.DoesNotExist:
+            cargo = ingestor.cargo(politico_info['cargo'])
+            if cargo is None:
                 self.stdout.write(f"Cargo {politico_info['cargo']} não encontrado")
                 continue
             
-            # Verificar se já existe
-            if Politico.objects.filter(nome=politico_info['nome']).exists():
-                ja_existem += 1
-                self.stdout.write(
-                    self.style.WARNING(f'Já existe: {politico_info["nome"]}')
-                )
-                continue
-            
-            # Criar slug único
-            base_slug = slugify(politico_info['nome'])
-            slug = base_slug
-            counter = 1
-            while Politico.objects.filter(slug=slug).exists():
-                slug = f"{base_slug}-{counter}"
-                counter += 1
-            
-            # Criar político
-            politico = Politico.objects.create(
-                nome=politico_info['nome'],
-                slug=slug,
+            ingestor.adicionar(
+                politico_info['nome'],
                 partido=partido,
                 cargo=cargo,
                 uf=politico_info['uf'],
@@ -228,11 +202,20 @@ class Command(BaseCommand):
                 data_nascimento=politico_info['data_nascimento'],
                 ativo=True
             )
-            
-            importados += 1
+            rotulos[politico_info['nome']] = f"{cargo.nome} ({politico_info['partido']}/{politico_info['uf']})"
+        
+        # Criar todos os novos políticos de uma vez
+        resultado = ingestor.gravar()
+        for nome in resultado.inalterados:
+            self.stdout.write(
+                self.style.WARNING(f'Já existe: {nome}')
+            )
+        for nome in resultado.criados:
             self.stdout.write(
-                self.style.SUCCESS(f'✓ Criado: {politico.nome} - {cargo.nome} ({politico_info["partido"]}/{politico_info["uf"]})')
+                self.style.SUCCESS(f'✓ Criado: {nome} - {rotulos[nome]}')
             )
+        importados = len(resultado.criados)
+        ja_existem = len(resultado.inalterados)
         
         # Estatísticas finais
         self.stdout.write('\n' + '='*60)
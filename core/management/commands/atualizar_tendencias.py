@@ -0,0 +1,74 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from core.models import HistoricoPontuacao
+from core.evolucao import atualizar_series, reconstruir_series
+from core.tendencias import atualizar_tendencias, reconstruir_historico, registrar_historico
+import datetime
+
+
+class Command(BaseCommand):
+    help = (
+        'Registra a fotografia diária da pontuação de cada político, recalcula as tendências de '
+        '7, 30 e 90 dias e atualiza as séries do gráfico de evolução; rodar uma vez por dia, '
+        'depois de recalcular_pontuacoes'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--data',
+            help='Dia da fotografia no formato AAAA-MM-DD (padrão: hoje)'
+        )
+        parser.add_argument(
+            '--retroativo',
+            type=int,
+            default=0,
+            help='Reconstrói também os N dias anteriores a partir de votos e notas (aproximado)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Quantidade de registros gravados por lote (padrão: 1000)'
+        )
+
+    def handle(self, *args, **options):
+        if options['data']:
+            try:
+                data = datetime.date.fromisoformat(options['data'])
+            except ValueError:
+                raise CommandError(f'Data inválida: {options["data"]}')
+        else:
+            data = timezone.localdate()
+        batch_size = options['batch_size']
+
+        criados = atualizados = 0
+        for dias in range(options['retroativo'], 0, -1):
+            dia = data - datetime.timedelta(days=dias)
+            novos, alterados = reconstruir_historico(dia, batch_size=batch_size)
+            criados += novos
+            atualizados += alterados
+            self.stdout.write(f'- Histórico reconstruído: {dia} ({novos} novos, {alterados} alterados)')
+
+        self.stdout.write(f'Registrando fotografia de {data}...')
+        novos, alterados = registrar_historico(data, batch_size=batch_size)
+        criados += novos
+        atualizados += alterados
+
+        self.stdout.write('Calculando tendências...')
+        tendencias = atualizar_tendencias(data, batch_size=batch_size)
+
+        self.stdout.write('Atualizando séries de evolução...')
+        if options['retroativo']:
+            # Dias passados mudaram: acrescentar só o dia atual não basta
+            series_criadas, series_atualizadas = reconstruir_series(batch_size=batch_size)
+        else:
+            series_criadas, series_atualizadas = atualizar_series(data, batch_size=batch_size)
+
+        self.stdout.write('\n' + '='*60)
+        self.stdout.write(self.style.SUCCESS('Tendências atualizadas!'))
+        self.stdout.write(f'- Fotografias criadas: {criados}')
+        self.stdout.write(f'- Fotografias atualizadas: {atualizados}')
+        self.stdout.write(f'- Políticos com tendência alterada: {tendencias}')
+        self.stdout.write(f'- Séries de evolução criadas: {series_criadas}')
+        self.stdout.write(f'- Séries de evolução atualizadas: {series_atualizadas}')
+        self.stdout.write(f'- Total de fotografias no banco: {HistoricoPontuacao.objects.count()}')
@@ -0,0 +1,121 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from core.entidades import IndiceEntidades, normalizar
+from core.models import Politico, Partido
+import os
+import pickle
+import random
+import tempfile
+import time
+
+PRENOMES = ['joao', 'maria', 'jose', 'ana', 'carlos', 'paula', 'pedro', 'luiza', 'marcos', 'fernanda', 'rafael', 'beatriz']
+SOBRENOMES = ['silva', 'santos', 'oliveira', 'souza', 'lima', 'pereira', 'costa', 'ferreira', 'almeida', 'rocha', 'gomes']
+VOCABULARIO = (
+    'governo projeto camara votacao plenario sessao cidade estado saude educacao orcamento reforma '
+    'ministro prefeitura senado deputado proposta emenda comissao relatorio eleicao campanha apoio'
+).split()
+
+
+class Rollback(Exception):
+    """Usada para desfazer os políticos sintéticos ao final do benchmark"""
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede a vinculação de textos a políticos (documentos por segundo) com o índice Aho-Corasick, '
+        'comparando com a busca ingênua nome a nome'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--politicos',
+            type=int,
+            default=0,
+            help='Cria N políticos sintéticos (descartados ao final) em vez de usar os do banco'
+        )
+        parser.add_argument(
+            '--documentos',
+            type=int,
+            default=2000,
+            help='Documentos sintéticos a processar (padrão: 2000)'
+        )
+        parser.add_argument(
+            '--palavras',
+            type=int,
+            default=400,
+            help='Palavras por documento (padrão: 400)'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                if options['politicos']:
+                    self._popular(options['politicos'])
+                self._medir(options)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def _popular(self, quantidade):
+        rnd = random.Random(quantidade)
+        partidos = [Partido.objects.create(sigla=f'BENCH{i}', nome=f'Partido {i}') for i in range(30)]
+        Politico.objects.bulk_create(
+            [
+                Politico(
+                    nome=f'{rnd.choice(PRENOMES)} {rnd.choice(SOBRENOMES)} {rnd.choice(SOBRENOMES)} bench{i}',
+                    slug=f'politico-bench-{i}',
+                    partido=rnd.choice(partidos),
+                    uf=rnd.choice(['SP', 'RJ', 'MG', 'BA']),
+                )
+                for i in range(quantidade)
+            ],
+            batch_size=5000,
+        )
+
+    def _medir(self, options):
+        inicio = time.perf_counter()
+        indice = IndiceEntidades.construir()
+        construcao = time.perf_counter() - inicio
+
+        with tempfile.TemporaryDirectory() as pasta:
+            caminho = os.path.join(pasta, 'indice.pickle')
+            indice.salvar(caminho)
+            tamanho = os.path.getsize(caminho)
+            inicio = time.perf_counter()
+            with open(caminho, 'rb') as arquivo:
+                pickle.load(arquivo)
+            carga = time.perf_counter() - inicio
+
+        nomes = [normalizar(nome) for nome in Politico.objects.values_list('nome', flat=True)]
+        rnd = random.Random(options['documentos'])
+        documentos = []
+        for _ in range(options['documentos']):
+            palavras = [rnd.choice(VOCABULARIO) for _ in range(options['palavras'])]
+            for _ in range(3):
+                if nomes:
+                    palavras.insert(rnd.randrange(len(palavras)), rnd.choice(nomes))
+            documentos.append(' '.join(palavras))
+        megabytes = sum(len(documento) for documento in documentos) / 1e6
+
+        inicio = time.perf_counter()
+        vinculos = sum(len(indice.vincular(documento)) for documento in documentos)
+        automato = time.perf_counter() - inicio
+
+        # Busca ingênua (um "nome in texto" por político) em uma amostra
+        amostra = documentos[:max(len(documentos) // 20, 1)]
+        inicio = time.perf_counter()
+        for documento in amostra:
+            texto = f' {normalizar(documento)} '
+            [nome for nome in nomes if f' {nome} ' in texto]
+        ingenua = time.perf_counter() - inicio
+
+        self.stdout.write('='*60)
+        self.stdout.write(f'- Políticos: {len(nomes)}')
+        self.stdout.write(f'- Termos no autômato: {len(indice.automato)}')
+        self.stdout.write(f'- Construção do índice: {construcao:.2f}s')
+        self.stdout.write(f'- Pickle: {tamanho / 1e6:.1f} MB, carregado em {carga:.2f}s')
+        self.stdout.write(
+            f'- Aho-Corasick: {len(documentos) / automato:.0f} documentos/s '
+            f'({megabytes / automato:.1f} MB/s, {vinculos} vínculos)'
+        )
+        self.stdout.write(f'- Busca ingênua: {len(amostra) / ingenua:.0f} documentos/s')
@@ -0,0 +1,93 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from core.models import Politico, Partido, Cargo
+from core.ranking import PODERES, ESTRATEGIAS, top_por_poder
+from decimal import Decimal
+import random
+import time
+
+
+class Rollback(Exception):
+    """Usada para desfazer os dados sintéticos ao final do benchmark"""
+
+
+class Command(BaseCommand):
+    help = 'Mede consultas e latência do ranking da página inicial com políticos sintéticos (os dados são descartados ao final)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tamanhos',
+            type=int,
+            nargs='+',
+            default=[10000, 100000],
+            help='Quantidades de políticos a testar (padrão: 10000 100000)'
+        )
+        parser.add_argument(
+            '--repeticoes',
+            type=int,
+            default=5,
+            help='Execuções por medição; é reportada a mediana (padrão: 5)'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'Banco: {connection.vendor}')
+        estrategias = [
+            estrategia for estrategia in ESTRATEGIAS
+            if (estrategia != 'uniao' or connection.features.supports_slicing_ordering_in_compound)
+            and (estrategia != 'janela' or connection.features.supports_over_clause)
+        ]
+
+        for tamanho in options['tamanhos']:
+            try:
+                with transaction.atomic():
+                    self._popular(tamanho)
+                    self.stdout.write('\n' + '='*60)
+                    self.stdout.write(f'{tamanho} políticos')
+                    for filtros in ({}, {'esfera': 'FEDERAL'}, {'uf': 'SP', 'ordenacao': 'avaliacoes'}):
+                        self.stdout.write(f'- Filtros {filtros or "(nenhum)"}:')
+                        for estrategia in estrategias:
+                            consultas, latencia = self._medir(
+                                lambda: top_por_poder(estrategia=estrategia, **filtros),
+                                options['repeticoes'],
+                            )
+                            self.stdout.write(f'    {estrategia:<10} {consultas} consulta(s), {latencia:.1f} ms')
+                    raise Rollback
+            except Rollback:
+                pass
+
+    def _popular(self, tamanho):
+        rnd = random.Random(tamanho)
+        partidos = [Partido.objects.create(sigla=f'BENCH{i}', nome=f'Partido {i}') for i in range(30)]
+        cargos = [
+            Cargo.objects.create(nome=f'Cargo Bench {poder}', poder=poder, nivel='FEDERAL')
+            for poder in PODERES
+        ]
+        ufs = ['SP', 'RJ', 'MG', 'BA', 'RS', 'PR', 'PE', 'CE', 'DF']
+        esferas = [esfera for esfera, _ in Politico.ESFERA_CHOICES]
+        Politico.objects.bulk_create(
+            [
+                Politico(
+                    nome=f'Político Bench {i}',
+                    slug=f'politico-bench-{i}',
+                    partido=rnd.choice(partidos),
+                    cargo=rnd.choice(cargos),
+                    esfera=rnd.choice(esferas),
+                    uf=rnd.choice(ufs),
+                    total_avaliacoes=rnd.randint(0, 5000),
+                    pontuacao_final=Decimal(rnd.randint(0, 1000)) / 100,
+                )
+                for i in range(tamanho)
+            ],
+            batch_size=5000,
+        )
+
+    def _medir(self, funcao, repeticoes):
+        tempos = []
+        for _ in range(repeticoes):
+            with CaptureQueriesContext(connection) as consultas:
+                inicio = time.perf_counter()
+                funcao()
+                tempos.append((time.perf_counter() - inicio) * 1000)
+        tempos.sort()
+        return len(consultas), tempos[len(tempos) // 2]
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from core.models import Nota
+from core.pontuacao import pesos_configurados, recalcular_periodo
+import datetime
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalcula nota_usuario, nota_ia e nota_final de todos os políticos em um período de referência, '
+        'com os pesos de settings.IIP_PESOS'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--periodo',
+            help='Período de referência no formato AAAA-MM-DD (padrão: primeiro dia do mês atual)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Quantidade de notas gravadas por lote (padrão: 1000)'
+        )
+
+    def handle(self, *args, **options):
+        if options['periodo']:
+            try:
+                periodo = datetime.date.fromisoformat(options['periodo'])
+            except ValueError:
+                raise CommandError(f'Período inválido: {options["periodo"]}')
+        else:
+            periodo = timezone.localdate().replace(day=1)
+
+        pesos = ', '.join(f'{nome}={peso}' for nome, peso in pesos_configurados().items())
+        self.stdout.write(f'Calculando notas de {periodo} ({pesos})...')
+
+        criadas, atualizadas = recalcular_periodo(periodo, batch_size=options['batch_size'])
+
+        self.stdout.write('\n' + '='*60)
+        self.stdout.write(self.style.SUCCESS('Cálculo de notas concluído!'))
+        self.stdout.write(f'- Notas criadas: {criadas}')
+        self.stdout.write(f'- Notas atualizadas: {atualizadas}')
+        self.stdout.write(f'- Total de notas no período: {Nota.objects.filter(periodo_ref=periodo).count()}')
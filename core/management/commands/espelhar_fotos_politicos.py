@@ -0,0 +1,193 @@
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from core.cache import invalidar_perfis, invalidar_ranking
+from core.models import Politico
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from io import BytesIO
+from PIL import Image, ImageOps
+from requests.adapters import HTTPAdapter
+import hashlib
+import requests
+
+FORMATOS = {
+    'jpeg': ('JPEG', 'jpg', {'quality': 85, 'optimize': True, 'progressive': True}),
+    'webp': ('WEBP', 'webp', {'quality': 80, 'method': 6}),
+}
+
+
+def _enviada_manualmente(politico):
+    # Sem checksum a foto veio do admin ou do formulário, não deste comando
+    return bool(politico.foto) and not politico.foto_checksum
+
+
+def _condicionais(politico, options):
+    """Cabeçalhos que pedem a foto só se ela mudou desde o último download"""
+    validadores = politico.foto_validadores or {}
+    # Validadores de outra URL (foto_url trocada) não dizem nada sobre esta
+    if options['forcar'] or not politico.foto or validadores.get('url') != politico.foto_url:
+        return {}
+    cabecalhos = {}
+    if validadores.get('etag'):
+        cabecalhos['If-None-Match'] = validadores['etag']
+    if validadores.get('modificada'):
+        cabecalhos['If-Modified-Since'] = validadores['modificada']
+    return cabecalhos
+
+
+class Command(BaseCommand):
+    help = 'Baixa as fotos externas (foto_url) para MEDIA_ROOT/politicos/ e gera miniaturas de tamanho fixo'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tamanho',
+            type=int,
+            default=256,
+            help='Lado da miniatura quadrada, em pixels (padrão: 256)'
+        )
+        parser.add_argument(
+            '--formato',
+            choices=sorted(FORMATOS),
+            default='jpeg',
+            help='Formato da miniatura (padrão: jpeg)'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=8,
+            help='Downloads em paralelo (padrão: 8)'
+        )
+        parser.add_argument(
+            '--forcar',
+            action='store_true',
+            help=(
+                'Regera as miniaturas mesmo quando a imagem de origem não mudou e substitui '
+                'também fotos enviadas manualmente'
+            )
+        )
+
+    def handle(self, *args, **options):
+        politicos = list(
+            Politico.objects.exclude(foto_url__isnull=True).exclude(foto_url='')
+            .only('id', 'nome', 'slug', 'foto', 'foto_url', 'foto_checksum', 'foto_validadores')
+        )
+        self.stdout.write(f'Espelhando fotos de {len(politicos)} políticos...')
+
+        manuais = sum(1 for politico in politicos if _enviada_manualmente(politico))
+        if not options['forcar']:
+            politicos = [politico for politico in politicos if not _enviada_manualmente(politico)]
+
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=options['workers'])
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.headers['User-Agent'] = 'IIP/1.0 (espelhamento de fotos)'
+
+        atualizados = []
+        revalidados = []
+        antigos = []
+        inalterados = 0
+        erros = 0
+
+        try:
+            with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+                futuros = {
+                    executor.submit(self._baixar, session, politico, options): politico
+                    for politico in politicos
+                }
+                # Download e miniatura acontecem nas threads; a gravação, aqui
+                for futuro in as_completed(futuros):
+                    politico = futuros[futuro]
+                    try:
+                        resultado = futuro.result()
+                    except Exception as e:
+                        erros += 1
+                        self.stdout.write(self.style.ERROR(f'Erro em {politico.nome}: {e}'))
+                        continue
+
+                    checksum, nome_arquivo, conteudo, validadores = resultado or (None, None, None, None)
+                    if conteudo is None:
+                        inalterados += 1
+                        self.stdout.write(f'- Sem alterações: {politico.nome}')
+                        if validadores is not None:
+                            # Mesma imagem com validadores novos: guarda só eles
+                            politico.foto_validadores = validadores
+                            revalidados.append(politico)
+                        continue
+
+                    # O arquivo novo ganha outro nome; o antigo só é apagado
+                    # depois que as linhas apontarem para o novo
+                    if politico.foto:
+                        antigos.append(politico.foto.name)
+                    politico.foto.save(nome_arquivo, ContentFile(conteudo), save=False)
+                    politico.foto_checksum = checksum
+                    politico.foto_validadores = validadores
+                    atualizados.append(politico)
+                    self.stdout.write(self.style.SUCCESS(f'✓ Foto espelhada: {politico.nome}'))
+
+            with transaction.atomic():
+                Politico.objects.bulk_update(
+                    atualizados, ['foto', 'foto_checksum', 'foto_validadores'], batch_size=500
+                )
+                Politico.objects.bulk_update(revalidados, ['foto_validadores'], batch_size=500)
+        except BaseException:
+            # Nada foi gravado no banco: as linhas continuam nos arquivos antigos
+            self._remover([politico.foto.name for politico in atualizados])
+            raise
+        finally:
+            session.close()
+        transaction.on_commit(lambda: self._remover(antigos))
+
+        if atualizados:
+            invalidar_ranking()
+            invalidar_perfis()
+
+        self.stdout.write('\n' + '='*60)
+        self.stdout.write(self.style.SUCCESS('Espelhamento de fotos concluído!'))
+        self.stdout.write(f'- Fotos atualizadas: {len(atualizados)}')
+        self.stdout.write(f'- Fotos sem alterações: {inalterados}')
+        if not options['forcar']:
+            self.stdout.write(f'- Fotos enviadas manualmente (mantidas): {manuais}')
+        self.stdout.write(f'- Erros: {erros}')
+
+    def _remover(self, nomes):
+        storage = Politico._meta.get_field('foto').storage
+        for nome in nomes:
+            storage.delete(nome)
+
+    def _baixar(self, session, politico, options):
+        """Baixa a foto e gera a miniatura.
+
+        Retorna ``(checksum, nome, conteudo, validadores)``, ou None se a
+        origem não mudou. A requisição é condicional (ETag/Last-Modified do
+        último download), então um ``304`` não transfere a imagem. Quando o
+        servidor ignora esses cabeçalhos a imagem vem inteira e o checksum
+        igual só poupa a miniatura; se apenas os validadores mudaram,
+        ``nome`` e ``conteudo`` vêm ``None``.
+        """
+        response = session.get(politico.foto_url, headers=_condicionais(politico, options), timeout=30)
+        if response.status_code == 304:
+            return None
+        response.raise_for_status()
+        validadores = {
+            'url': politico.foto_url,
+            'etag': response.headers.get('ETag', ''),
+            'modificada': response.headers.get('Last-Modified', ''),
+        }
+
+        checksum = hashlib.sha256(response.content).hexdigest()
+        if checksum == politico.foto_checksum and politico.foto and not options['forcar']:
+            if validadores == politico.foto_validadores:
+                return None
+            return checksum, None, None, validadores
+
+        formato, extensao, parametros = FORMATOS[options['formato']]
+        with Image.open(BytesIO(response.content)) as imagem:
+            imagem = ImageOps.exif_transpose(imagem).convert('RGB')
+            miniatura = ImageOps.fit(
+                imagem, (options['tamanho'], options['tamanho']),
+                method=Image.Resampling.LANCZOS, centering=(0.5, 0.3)
+            )
+        saida = BytesIO()
+        miniatura.save(saida, formato, **parametros)
+        return checksum, f'{politico.slug}.{extensao}', saida.getvalue(), validadores
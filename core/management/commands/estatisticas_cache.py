@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from core.cache import estatisticas, invalidar_perfis, invalidar_ranking, zerar_estatisticas
+
+
+class Command(BaseCommand):
+    help = 'Mostra os contadores de acerto/falha do cache do ranking da página inicial'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--zerar',
+            action='store_true',
+            help='Zera os contadores após exibi-los'
+        )
+        parser.add_argument(
+            '--invalidar',
+            action='store_true',
+            help='Incrementa as versões do ranking e dos perfis, descartando o que estiver em cache'
+        )
+
+    def handle(self, *args, **options):
+        stats = estatisticas()
+        taxa = f"{stats['taxa_acerto']:.1%}" if stats['taxa_acerto'] is not None else 'N/A'
+
+        self.stdout.write(f"- Versão do ranking: {stats['versao']}")
+        self.stdout.write(f"- Acertos: {stats['acertos']}")
+        self.stdout.write(f"- Falhas: {stats['falhas']}")
+        self.stdout.write(f"- Taxa de acerto: {taxa}")
+
+        if options['zerar']:
+            zerar_estatisticas()
+            self.stdout.write(self.style.SUCCESS('Contadores zerados.'))
+        if options['invalidar']:
+            invalidar_ranking()
+            invalidar_perfis()
+            self.stdout.write(self.style.SUCCESS('Cache do ranking e dos perfis invalidado.'))
@@ -1,9 +1,11 @@
+from django.conf import settings
 from django.core.management.base import BaseCommand
-from core.models import Politico, Partido, Cargo
-from django.utils.text import slugify
-import requests
-import time
+from core.models import Politico, Cargo
+from core.camara import ClienteCamara, ErroAPICamara, URL_BASE, hash_registro
+from core.ingestao import IngestorPoliticos
 from datetime import datetime
+import json
+import os
 
 
 class Command(BaseCommand):
@@ -16,158 +18,266 @@ class Command(BaseCommand):
             default=20,
             help='Número máximo de deputados para importar (padrão: 20)'
         )
+        parser.add_argument(
+            '--todos',
+            action='store_true',
+            help='Importa a lista completa, seguindo a paginação da API (ignora --limite)'
+        )
+        parser.add_argument(
+            '--itens-por-pagina',
+            type=int,
+            default=100,
+            help='Deputados por página da API (padrão: 100)'
+        )
+        parser.add_argument(
+            '--checkpoint',
+            default=os.path.join(settings.BASE_DIR, 'importar_deputados.checkpoint.json'),
+            help='Arquivo onde o progresso é salvo a cada página concluída'
+        )
+        parser.add_argument(
+            '--retomar',
+            action='store_true',
+            help='Continua a partir da última página concluída registrada no checkpoint'
+        )
+        parser.add_argument(
+            '--forcar',
+            action='store_true',
+            help='Busca os detalhes de todos os deputados, mesmo os que não mudaram na lista; '
+                 'só grava os que mudaram (revalida campos que só aparecem nos detalhes)'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=8,
+            help='Requisições de detalhes em paralelo (padrão: 8)'
+        )
+        parser.add_argument(
+            '--taxa',
+            type=float,
+            default=5.0,
+            help='Requisições por segundo à API; reduzida automaticamente em caso de 429 (padrão: 5)'
+        )
+        parser.add_argument(
+            '--url-base',
+            default=URL_BASE,
+            help=f'URL base da API (padrão: {URL_BASE})'
+        )
 
     def handle(self, *args, **options):
-        limite = options['limite']
-        self.stdout.write(f'Iniciando importação de até {limite} deputados...')
-        
+        limite = None if options['todos'] else options['limite']
+        if limite is None:
+            self.stdout.write('Iniciando importação de todos os deputados...')
+        else:
+            self.stdout.write(f'Iniciando importação de até {limite} deputados...')
+
         # Garantir que o cargo existe
         cargo_deputado, created = Cargo.objects.get_or_create(
             nome='Deputado Federal',
             poder='LEGISLATIVO',
             nivel='FEDERAL'
         )
-        
+
+        checkpoint_path = options['checkpoint']
+        estado = {
+            'proxima_url': None, 'paginas': 0, 'processados': 0,
+            'importados': 0, 'atualizados': 0, 'inalterados': 0,
+            # Registros da lista cujos detalhes falharam; repetidos no --retomar
+            'falhas': [], 'concluida': False,
+        }
+        if options['retomar']:
+            if os.path.exists(checkpoint_path):
+                with open(checkpoint_path, encoding='utf-8') as arquivo:
+                    estado.update(json.load(arquivo))
+                self.stdout.write(
+                    f"Retomando após a página {estado['paginas']} ({estado['processados']} deputados já processados)"
+                )
+            else:
+                self.stdout.write(self.style.WARNING('Nenhum checkpoint encontrado; começando do início'))
+
+        itens = options['itens_por_pagina']
+        if limite is not None:
+            itens = min(itens, limite)
+
+        cliente = ClienteCamara(
+            url_base=options['url_base'],
+            max_conexoes=options['workers'],
+            taxa=options['taxa'],
+        )
         try:
-            # Buscar lista de deputados da API da Câmara
-            url = 'https://dadosabertos.camara.leg.br/api/v2/deputados'
-            params = {
-                'ordem': 'ASC',
-                'ordenarPor': 'nome',
-                'itens': limite
-            }
-            
-            self.stdout.write('Fazendo requisição para API da Câmara dos Deputados...')
-            response = requests.get(url, params=params, timeout=30)
-            response.raise_for_status()
-            
-            data = response.json()
-            deputados = data.get('dados', [])
-            
-            self.stdout.write(f'Encontrados {len(deputados)} deputados na API')
-            
-            importados = 0
-            atualizados = 0
-            
-            for deputado_data in deputados:
-                try:
-                    # Dados básicos do deputado
-                    nome = deputado_data.get('nome', '').strip()
-                    if not nome:
-                        continue
-                    
-                    id_deputado = deputado_data.get('id')
-                    uf = deputado_data.get('siglaUf', '').upper()
-                    partido_sigla = deputado_data.get('siglaPartido', '').upper()
-                    
-                    # Buscar dados detalhados do deputado
-                    detalhes_url = f'https://dadosabertos.camara.leg.br/api/v2/deputados/{id_deputado}'
-                    
-                    self.stdout.write(f'Buscando detalhes de {nome}...')
-                    detalhes_response = requests.get(detalhes_url, timeout=30)
-                    
-                    if detalhes_response.status_code == 200:
-                        detalhes_data = detalhes_response.json().get('dados', {})
-                        
-                        # Dados adicionais
-                        data_nascimento_str = detalhes_data.get('dataNascimento')
-                        data_nascimento = None
-                        if data_nascimento_str:
-                            try:
-                                data_nascimento = datetime.strptime(data_nascimento_str, '%Y-%m-%d').date()
-                            except ValueError:
-                                pass
-                        
-                        municipio_nascimento = detalhes_data.get('municipioNascimento', '')
-                        foto_url = detalhes_data.get('urlFoto')
-                        
-                        # Criar ou buscar partido
-                        partido = None
-                        if partido_sigla:
-                            partido, created = Partido.objects.get_or_create(
-                                sigla=partido_sigla,
-                                defaults={'nome': partido_sigla}  # Nome será atualizado depois se necessário
-                            )
-                        
-                        # Criar slug único
-                        base_slug = slugify(nome)
-                        slug = base_slug
-                        counter = 1
-                        while Politico.objects.filter(slug=slug).exists():
-                            slug = f"{base_slug}-{counter}"
-                            counter += 1
-                        
-                        # Criar ou atualizar político
-                        politico, created = Politico.objects.get_or_create(
-                            nome=nome,
-                            defaults={
-                                'slug': slug,
-                                'partido': partido,
-                                'cargo': cargo_deputado,
-                                'uf': uf,
-                                'municipio': municipio_nascimento,
-                                'esfera': 'FEDERAL',
-                                'foto_url': foto_url,
-                                'data_nascimento': data_nascimento,
-                                'ativo': True
-                            }
-                        )
-                        
-                        if created:
-                            importados += 1
-                            self.stdout.write(
-                                self.style.SUCCESS(f'✓ Importado: {nome} ({partido_sigla}/{uf})')
-                            )
-                        else:
-                            # Atualizar dados se necessário
-                            updated = False
-                            if politico.partido != partido:
-                                politico.partido = partido
-                                updated = True
-                            if politico.uf != uf:
-                                politico.uf = uf
-                                updated = True
-                            if foto_url and politico.foto_url != foto_url:
-                                politico.foto_url = foto_url
-                                updated = True
-                            if data_nascimento and politico.data_nascimento != data_nascimento:
-                                politico.data_nascimento = data_nascimento
-                                updated = True
-                            
-                            if updated:
-                                politico.save()
-                                atualizados += 1
-                                self.stdout.write(
-                                    self.style.WARNING(f'↻ Atualizado: {nome} ({partido_sigla}/{uf})')
-                                )
-                            else:
-                                self.stdout.write(
-                                    self.style.HTTP_INFO(f'- Já existe: {nome} ({partido_sigla}/{uf})')
-                                )
-                    
-                    # Pausa para não sobrecarregar a API
-                    time.sleep(0.5)
-                    
-                except Exception as e:
-                    self.stdout.write(
-                        self.style.ERROR(f'Erro ao processar {nome}: {str(e)}')
-                    )
-                    continue
-            
+            if estado['falhas']:
+                self.stdout.write(f"Repetindo {len(estado['falhas'])} deputados com erro na execução anterior")
+                estado['falhas'] = self._contar(estado, self._processar_pagina(
+                    cliente, estado['falhas'], cargo_deputado, options['workers'], options['forcar']
+                ))
+                self._salvar_checkpoint(checkpoint_path, estado)
+
+            # Percorrer a lista de deputados da API da Câmara, uma página por vez
+            if not estado['concluida']:
+                self.stdout.write('Fazendo requisição para API da Câmara dos Deputados...')
+                paginas = cliente.paginas_deputados(itens=itens, url=estado['proxima_url'])
+            else:
+                paginas = []
+            for deputados, proxima_url in paginas:
+                if limite is not None:
+                    deputados = deputados[:max(0, limite - estado['processados'])]
+                deputados = [d for d in deputados if d.get('nome', '').strip()]
+
+                self.stdout.write(f"Página {estado['paginas'] + 1}: {len(deputados)} deputados")
+                estado['falhas'] += self._contar(estado, self._processar_pagina(
+                    cliente, deputados, cargo_deputado, options['workers'], options['forcar']
+                ))
+
+                estado['paginas'] += 1
+                estado['processados'] += len(deputados)
+                estado['proxima_url'] = proxima_url
+                self._salvar_checkpoint(checkpoint_path, estado)
+
+                if limite is not None and estado['processados'] >= limite:
+                    break
+
+            estado['concluida'] = True
+            if estado['falhas']:
+                # A lista terminou, mas os deputados com erro ficam no checkpoint
+                self._salvar_checkpoint(checkpoint_path, estado)
+            elif os.path.exists(checkpoint_path):
+                # Importação completa: o checkpoint não é mais necessário
+                os.remove(checkpoint_path)
+
             # Estatísticas finais
             self.stdout.write('\n' + '='*50)
             self.stdout.write(
                 self.style.SUCCESS(f'Importação concluída!')
             )
-            self.stdout.write(f'- Deputados importados: {importados}')
-            self.stdout.write(f'- Deputados atualizados: {atualizados}')
+            self.stdout.write(f"- Páginas processadas: {estado['paginas']}")
+            self.stdout.write(f"- Deputados importados: {estado['importados']}")
+            self.stdout.write(f"- Deputados atualizados: {estado['atualizados']}")
+            self.stdout.write(f"- Deputados sem alterações: {estado['inalterados']}")
+            if estado['falhas']:
+                self.stdout.write(self.style.WARNING(
+                    f"- Deputados com erro: {len(estado['falhas'])} (use --retomar para tentar de novo)"
+                ))
             self.stdout.write(f'- Total de políticos no banco: {Politico.objects.count()}')
-            
-        except requests.RequestException as e:
+
+        except ErroAPICamara as e:
             self.stdout.write(
                 self.style.ERROR(f'Erro na requisição à API: {str(e)}')
             )
+            self.stdout.write(f'Use --retomar para continuar a partir da página {estado["paginas"] + 1}')
         except Exception as e:
             self.stdout.write(
                 self.style.ERROR(f'Erro inesperado: {str(e)}')
-            )
\ No newline at end of file
+            )
+        finally:
+            cliente.close()
+
+    def _contar(self, estado, contagens):
+        """Soma as contagens de uma página ao estado; retorna as falhas da página"""
+        importados, atualizados, inalterados, falhas = contagens
+        estado['importados'] += importados
+        estado['atualizados'] += atualizados
+        estado['inalterados'] += inalterados
+        return falhas
+
+    def _processar_pagina(self, cliente, deputados, cargo_deputado, workers, forcar=False):
+        """Busca os detalhes da página em paralelo e grava a página inteira em lote.
+
+        Retorna ``(importados, atualizados, inalterados, falhas)``, onde
+        ``falhas`` são os registros da lista cujos detalhes não vieram.
+        """
+        ingestor = IngestorPoliticos(atualizar=('partido', 'uf', 'foto_url', 'data_nascimento'))
+        rotulos = {}
+        falhas = []
+
+        # hash_origem = metade do hash do registro na lista + metade do hash dos
+        # campos gravados a partir dos detalhes. Deputados cuja entrada na lista
+        # não mudou são pulados sem buscar detalhes; os demais só são gravados
+        # se o hash completo, calculado após os detalhes, mudou
+        hashes = {str(d.get('id')): hash_registro(d)[:32] for d in deputados}
+        conhecidos = dict(
+            Politico.objects.filter(id_externo__in=hashes).values_list('id_externo', 'hash_origem')
+        )
+        if not forcar:
+            deputados = [
+                d for d in deputados if conhecidos.get(str(d.get('id')), '')[:32] != hashes[str(d.get('id'))]
+            ]
+        pulados = len(hashes) - len(deputados)
+
+        # Os detalhes chegam em paralelo; só o acúmulo em memória acontece aqui
+        for deputado_data, detalhes_data, erro in cliente.detalhes_em_paralelo(deputados, workers=workers):
+            nome = deputado_data.get('nome', '').strip()
+            if erro is not None:
+                self.stdout.write(
+                    self.style.ERROR(f'Erro ao buscar detalhes de {nome}: {erro}')
+                )
+                falhas.append(deputado_data)
+                continue
+
+            id_externo = str(deputado_data.get('id'))
+            detalhes = self._campos_detalhes(detalhes_data)
+            hash_origem = hashes[id_externo] + hash_registro(detalhes)[:32]
+            if conhecidos.get(id_externo) == hash_origem:
+                pulados += 1
+                continue
+
+            try:
+                rotulos[nome] = self._adicionar(
+                    ingestor, deputado_data, detalhes, cargo_deputado, hash_origem
+                )
+            except Exception as e:
+                self.stdout.write(
+                    self.style.ERROR(f'Erro ao processar {nome}: {str(e)}')
+                )
+
+        resultado = ingestor.gravar()
+        for nome in resultado.criados:
+            self.stdout.write(self.style.SUCCESS(f'✓ Importado: {nome} ({rotulos[nome]})'))
+        for nome in resultado.atualizados:
+            self.stdout.write(self.style.WARNING(f'↻ Atualizado: {nome} ({rotulos[nome]})'))
+        for nome in resultado.inalterados:
+            self.stdout.write(self.style.HTTP_INFO(f'- Já existe: {nome} ({rotulos[nome]})'))
+
+        return len(resultado.criados), len(resultado.atualizados), len(resultado.inalterados) + pulados, falhas
+
+    def _salvar_checkpoint(self, caminho, estado):
+        # Grava em arquivo temporário e renomeia, para nunca deixar um checkpoint pela metade
+        temporario = f'{caminho}.tmp'
+        with open(temporario, 'w', encoding='utf-8') as arquivo:
+            json.dump(estado, arquivo)
+        os.replace(temporario, caminho)
+
+    def _campos_detalhes(self, detalhes_data):
+        """Só os campos dos detalhes que são gravados (e entram no hash de origem)"""
+        return {
+            campo: detalhes_data.get(campo)
+            for campo in ('dataNascimento', 'municipioNascimento', 'urlFoto')
+        }
+
+    def _adicionar(self, ingestor, deputado_data, detalhes_data, cargo_deputado, hash_origem):
+        """Enfileira o deputado no ingestor; retorna o rótulo PARTIDO/UF para as mensagens"""
+        nome = deputado_data.get('nome', '').strip()
+        uf = deputado_data.get('siglaUf', '').upper()
+        partido_sigla = deputado_data.get('siglaPartido', '').upper()
+
+        # Dados adicionais
+        data_nascimento_str = detalhes_data.get('dataNascimento')
+        data_nascimento = None
+        if data_nascimento_str:
+            try:
+                data_nascimento = datetime.strptime(data_nascimento_str, '%Y-%m-%d').date()
+            except ValueError:
+                pass
+
+        ingestor.adicionar(
+            nome,
+            partido=ingestor.partido(partido_sigla),  # Nome será atualizado depois se necessário
+            cargo=cargo_deputado,
+            uf=uf,
+            municipio=detalhes_data.get('municipioNascimento', ''),
+            esfera='FEDERAL',
+            foto_url=detalhes_data.get('urlFoto'),
+            data_nascimento=data_nascimento,
+            ativo=True,
+            id_externo=str(deputado_data.get('id')),
+            hash_origem=hash_origem,
+        )
+        return f'{partido_sigla}/{uf}'
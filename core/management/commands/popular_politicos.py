@@ -1,7 +1,6 @@
 from django.core.management.base import BaseCommand
 from core.models import Politico, Partido, Cargo
-from django.utils.text import slugify
-import requests
+from core.ingestao import IngestorPoliticos
 from datetime import date
 
 
@@ -25,12 +24,12 @@ class Command(BaseCommand):
             {'sigla': 'PSD', 'nome': 'Partido Social Democrático'},
         ]
         
+        # Partidos, cargos e slugs existentes são carregados uma única vez
+        ingestor = IngestorPoliticos()
+        
         for partido_info in partidos_data:
-            partido, created = Partido.objects.get_or_create(
-                sigla=partido_info['sigla'],
-                defaults={'nome': partido_info['nome']}
-            )
-            if created:
+            if partido_info['sigla'] not in ingestor.partidos:
+                partido = ingestor.partido(partido_info['sigla'], partido_info['nome'])
                 self.stdout.write(f'Partido criado: {partido.sigla}')
         
         # Criar cargos se não existirem
@@ -46,12 +45,9 @@ class Command(BaseCommand):
         ]
         
         for cargo_info in cargos_data:
-            cargo, created = Cargo.objects.get_or_create(
-                nome=cargo_info['nome'],
-                poder=cargo_info['poder'],
-                nivel=cargo_info['nivel']
-            )
-            if created:
+            chave = (cargo_info['nome'], cargo_info['poder'], cargo_info['nivel'])
+            if chave not in ingestor.cargos:
+                cargo = ingestor.cargo(*chave)
                 self.stdout.write(f'Cargo criado: {cargo.nome}')
         
         # Dados de políticos brasileiros conhecidos
@@ -173,55 +169,45 @@ class Command(BaseCommand):
             },
         ]
         
-        # Criar políticos
+        # Enfileirar políticos
+        cargos_por_politico = {}
         for politico_info in politicos_data:
             # Buscar partido se especificado
             partido = None
             if politico_info['partido']:
-                try:
-                    partido = Partido.objects.get(sigla=politico_info['partido'])
-                except Partido.DoesNotExist:
+                partido = ingestor.partidos.get(politico_info['partido'])
+                if partido is None:
                     self.stdout.write(f"Partido {politico_info['partido']} não encontrado")
             
             # Buscar cargo
-            try:
-                cargo = Cargo.objects.get(nome=politico_info['cargo'])
-            except Cargo.DoesNotExist:
+            cargo = ingestor.cargo(politico_info['cargo'])
+            if cargo is None:
                 self.stdout.write(f"Cargo {politico_info['cargo']} não encontrado")
                 continue
             
-            # Criar slug único
-            base_slug = slugify(politico_info['nome'])
-            slug = base_slug
-            counter = 1
-            while Politico.objects.filter(slug=slug).exists():
-                slug = f"{base_slug}-{counter}"
-                counter += 1
-            
-            # Criar ou atualizar político
-            politico, created = Politico.objects.get_or_create(
-                nome=politico_info['nome'],
-                defaults={
-                    'slug': slug,
-                    'partido': partido,
-                    'cargo': cargo,
-                    'uf': politico_info['uf'],
-                    'municipio': politico_info['municipio'],
-                    'esfera': politico_info['esfera'],
-                    'foto_url': politico_info['foto_url'],
-                    'data_nascimento': politico_info['data_nascimento'],
-                    'ativo': True
-                }
+            ingestor.adicionar(
+                politico_info['nome'],
+                partido=partido,
+                cargo=cargo,
+                uf=politico_info['uf'],
+                municipio=politico_info['municipio'],
+                esfera=politico_info['esfera'],
+                foto_url=politico_info['foto_url'],
+                data_nascimento=politico_info['data_nascimento'],
+                ativo=True
+            )
+            cargos_por_politico[politico_info['nome']] = cargo.nome
+        
+        # Criar todos os novos políticos de uma vez
+        resultado = ingestor.gravar()
+        for nome in resultado.criados:
+            self.stdout.write(
+                self.style.SUCCESS(f'Político criado: {nome} - {cargos_por_politico[nome]}')
+            )
+        for nome in resultado.inalterados:
+            self.stdout.write(
+                self.style.WARNING(f'Político já existe: {nome}')
             )
-            
-            if created:
-                self.stdout.write(
-                    self.style.SUCCESS(f'Político criado: {politico.nome} - {cargo.nome}')
-                )
-            else:
-                self.stdout.write(
-                    self.style.WARNING(f'Político já existe: {politico.nome}')
-                )
         
         self.stdout.write(
             self.style.SUCCESS('População de dados concluída com sucesso!')
@@ -0,0 +1,86 @@
+from django.core.management.base import BaseCommand
+from core.entidades import IndiceEntidades
+from core.noticias import (
+    IndiceLSH, MinHasher, PipelineNoticias, atualizar_sentimento_noticias, carregar_analisador, ler_jsonl,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Processa dumps de notícias em JSONL (ou .jsonl.gz): remove duplicatas, encontra os políticos '
+        'mencionados, calcula o sentimento e atualiza Nota.sentimento_noticias'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('arquivos', nargs='+', help='Arquivos JSONL, um objeto de notícia por linha')
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=500,
+            help='Notícias processadas por lote (padrão: 500)'
+        )
+        parser.add_argument(
+            '--num-perm',
+            type=int,
+            default=64,
+            help='Permutações do MinHash (padrão: 64)'
+        )
+        parser.add_argument(
+            '--bandas',
+            type=int,
+            default=8,
+            help='Bandas do LSH; menos bandas exigem textos mais parecidos (padrão: 8)'
+        )
+        parser.add_argument(
+            '--analisador',
+            help='Classe de sentimento (caminho Python); padrão: settings.IIP_ANALISADOR_SENTIMENTO ou o léxico'
+        )
+        parser.add_argument(
+            '--lexico',
+            help='Arquivo de léxico (termo<TAB>peso) para o analisador léxico'
+        )
+        parser.add_argument(
+            '--indice',
+            help='Arquivo pickle do índice de nomes; reaproveitado enquanto os políticos não mudarem'
+        )
+        parser.add_argument(
+            '--sem-agregar',
+            action='store_true',
+            help='Não atualiza Nota.sentimento_noticias ao final'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('Carregando índice de nomes dos políticos...')
+        hasher = MinHasher(num_perm=options['num_perm'])
+        pipeline = PipelineNoticias(
+            indice=IndiceEntidades.carregar_ou_construir(options['indice']),
+            analisador=carregar_analisador(options['analisador'], options['lexico']),
+            hasher=hasher,
+            lsh=IndiceLSH(num_perm=options['num_perm'], bandas=options['bandas']),
+            lote=options['lote'],
+        )
+
+        self.stdout.write(f'Processando {len(options["arquivos"])} arquivo(s)...')
+        resultado = pipeline.processar(ler_jsonl(options['arquivos']))
+
+        atualizadas = 0
+        if not options['sem_agregar']:
+            for periodo in sorted(resultado.periodos):
+                with pipeline.metricas.etapa('agregacao', 1):
+                    atualizadas += atualizar_sentimento_noticias(periodo)
+                self.stdout.write(f'- Sentimento agregado: {periodo}')
+
+        self.stdout.write('\n' + '='*60)
+        self.stdout.write(self.style.SUCCESS('Processamento de notícias concluído!'))
+        self.stdout.write(f'- Notícias lidas: {resultado.lidas}')
+        self.stdout.write(f'- Inválidas: {resultado.invalidas}')
+        self.stdout.write(f'- Duplicatas exatas: {resultado.duplicadas_exatas}')
+        self.stdout.write(f'- Quase-duplicatas: {resultado.duplicadas_aproximadas}')
+        self.stdout.write(f'- Sem menção a políticos: {resultado.sem_mencao}')
+        self.stdout.write(f'- Notícias gravadas: {resultado.gravadas}')
+        self.stdout.write(f'- Menções gravadas: {resultado.mencoes}')
+        self.stdout.write(f'- Notas com sentimento atualizado: {atualizadas}')
+
+        self.stdout.write('\nVazão por etapa:')
+        for etapa, itens, segundos, por_segundo in pipeline.metricas.relatorio():
+            self.stdout.write(f'- {etapa}: {itens} itens em {segundos:.2f}s ({por_segundo:.0f}/s)')
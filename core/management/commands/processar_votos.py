@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand
+from core.models import VotoPendente
+from core.votos import processar_lote
+import time
+
+
+class Command(BaseCommand):
+    help = (
+        'Aplica em lote os votos enfileirados quando VOTOS_ASSINCRONOS está ativo; '
+        'com --continuo fica drenando a fila como um worker'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=1000,
+            help='Quantidade de votos aplicados por transação (padrão: 1000)'
+        )
+        parser.add_argument(
+            '--continuo',
+            action='store_true',
+            help='Não termina quando a fila esvazia; aguarda novos votos'
+        )
+        parser.add_argument(
+            '--intervalo',
+            type=float,
+            default=1.0,
+            help='Segundos de espera com a fila vazia no modo contínuo (padrão: 1)'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('Processando votos pendentes...')
+
+        processados = 0
+        lotes = 0
+        try:
+            while True:
+                quantidade = processar_lote(options['lote'])
+                if quantidade:
+                    processados += quantidade
+                    lotes += 1
+                    self.stdout.write(f'- Lote {lotes}: {quantidade} votos aplicados')
+                    continue
+                if not options['continuo']:
+                    break
+                time.sleep(options['intervalo'])
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING('Interrompido; os lotes já aplicados foram mantidos.'))
+
+        self.stdout.write('\n' + '='*60)
+        self.stdout.write(self.style.SUCCESS('Processamento de votos concluído!'))
+        self.stdout.write(f'- Votos aplicados: {processados}')
+        self.stdout.write(f'- Lotes: {lotes}')
+        self.stdout.write(f'- Votos ainda na fila: {VotoPendente.objects.count()}')
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from core.models import Politico
+from core.pontuacao import recalcular_todas
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalcula do zero a pontuação desnormalizada (soma, total e média das avaliações, nota IA e '
+        'pontuação final) de todos os políticos; rodar diariamente para corrigir divergências dos contadores'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Quantidade de políticos gravados por lote (padrão: 1000)'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('Recalculando pontuações...')
+
+        alterados = recalcular_todas(batch_size=options['batch_size'])
+
+        self.stdout.write(
+            self.style.SUCCESS('Recálculo concluído!')
+        )
+        self.stdout.write(f'- Políticos atualizados: {alterados}')
+        self.stdout.write(f'- Total de políticos no banco: {Politico.objects.count()}')
@@ -0,0 +1,80 @@
+# Generated by Django 5.2.4 on 2026-10-18 09:53
+
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import migrations, models
+
+
+def popular_pontuacao(apps, schema_editor):
+    Politico = apps.get_model('core', 'Politico')
+    Nota = apps.get_model('core', 'Nota')
+
+    def dec(valor):
+        if valor is None:
+            return None
+        return Decimal(str(valor)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+    politicos = list(Politico.objects.annotate(
+        calc_media=models.Avg('avaliacoes__nota'),
+        calc_total=models.Count('avaliacoes'),
+        calc_nota_ia=models.Subquery(
+            Nota.objects.filter(politico=models.OuterRef('pk'))
+            .order_by('-periodo_ref')
+            .values('nota_ia')[:1]
+        ),
+    ))
+    for politico in politicos:
+        media = dec(politico.calc_media)
+        nota_ia = dec(politico.calc_nota_ia)
+        if media is not None and nota_ia is not None:
+            final = dec((media + nota_ia) / 2)
+        else:
+            final = media if media is not None else (nota_ia if nota_ia is not None else Decimal('0.00'))
+        politico.media_usuarios = media
+        politico.total_avaliacoes = politico.calc_total
+        politico.nota_ia_recente = nota_ia
+        politico.pontuacao_final = final
+    Politico.objects.bulk_update(
+        politicos,
+        ['media_usuarios', 'total_avaliacoes', 'nota_ia_recente', 'pontuacao_final'],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_politico_foto_alter_politico_foto_url'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='politico',
+            name='media_usuarios',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=5, null=True),
+        ),
+        migrations.AddField(
+            model_name='politico',
+            name='nota_ia_recente',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=5, null=True),
+        ),
+        migrations.AddField(
+            model_name='politico',
+            name='pontuacao_final',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=5),
+        ),
+        migrations.AddField(
+            model_name='politico',
+            name='total_avaliacoes',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='politico',
+            index=models.Index(fields=['-pontuacao_final', 'nome'], name='core_politico_ranking_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='politico',
+            index=models.Index(fields=['-total_avaliacoes', '-pontuacao_final'], name='core_politico_avaliacoes_idx'),
+        ),
+        migrations.RunPython(popular_pontuacao, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_politico_pontuacao'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='politico',
+            name='slug',
+            field=models.SlugField(blank=True, help_text='Gerado a partir do nome se ficar em branco', max_length=180, unique=True),
+        ),
+    ]
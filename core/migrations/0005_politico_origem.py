@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-18 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_politico_slug_blank'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='politico',
+            name='hash_origem',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='politico',
+            name='id_externo',
+            field=models.CharField(blank=True, db_index=True, max_length=50),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 10:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_politico_origem'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='politico',
+            name='foto_checksum',
+            field=models.CharField(blank=True, editable=False, help_text='SHA-256 da imagem de origem espelhada de foto_url', max_length=64),
+        ),
+    ]
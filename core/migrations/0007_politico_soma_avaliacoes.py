@@ -0,0 +1,27 @@
+# Generated by Django 5.2.4 on 2026-10-18 10:02
+
+from django.db import migrations, models
+
+
+def popular_soma(apps, schema_editor):
+    Politico = apps.get_model('core', 'Politico')
+    politicos = list(Politico.objects.annotate(calc_soma=models.Sum('avaliacoes__nota')).filter(calc_soma__gt=0))
+    for politico in politicos:
+        politico.soma_avaliacoes = politico.calc_soma
+    Politico.objects.bulk_update(politicos, ['soma_avaliacoes'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_politico_foto_checksum'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='politico',
+            name='soma_avaliacoes',
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(popular_soma, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.4 on 2026-10-18 10:03
+
+import django.core.validators
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_politico_soma_avaliacoes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VotoPendente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nota', models.IntegerField(validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(10)])),
+                ('comentario', models.TextField(blank=True)),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('politico', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.politico')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Voto Pendente',
+                'verbose_name_plural': 'Votos Pendentes',
+                'ordering': ['id'],
+            },
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.4 on 2026-10-18 10:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_votopendente'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HistoricoPontuacao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.DateField()),
+                ('pontuacao_final', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('media_usuarios', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('nota_ia', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('total_avaliacoes', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Histórico de Pontuação',
+                'verbose_name_plural': 'Históricos de Pontuação',
+                'ordering': ['-data'],
+            },
+        ),
+        migrations.AddField(
+            model_name='politico',
+            name='tendencia_30d',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=5),
+        ),
+        migrations.AddField(
+            model_name='politico',
+            name='tendencia_7d',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=5),
+        ),
+        migrations.AddField(
+            model_name='politico',
+            name='tendencia_90d',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=5),
+        ),
+        migrations.AddIndex(
+            model_name='politico',
+            index=models.Index(fields=['-tendencia_30d', '-pontuacao_final'], name='core_politico_tendencia_idx'),
+        ),
+        migrations.AddField(
+            model_name='historicopontuacao',
+            name='politico',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='historico', to='core.politico'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='historicopontuacao',
+            unique_together={('politico', 'data')},
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.4 on 2026-10-18 10:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_historicopontuacao_tendencias'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Noticia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('titulo', models.CharField(max_length=500)),
+                ('url', models.URLField(blank=True, max_length=500)),
+                ('fonte', models.CharField(blank=True, max_length=150)),
+                ('publicada_em', models.DateTimeField(blank=True, null=True)),
+                ('hash_conteudo', models.CharField(help_text='SHA-1 do texto normalizado', max_length=40, unique=True)),
+                ('sentimento', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Notícia',
+                'verbose_name_plural': 'Notícias',
+                'ordering': ['-publicada_em'],
+                'indexes': [models.Index(fields=['publicada_em'], name='core_notici_publica_0477b5_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='Mencao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('trecho', models.TextField(blank=True, help_text='Texto normalizado ao redor da menção, usado no sentimento')),
+                ('sentimento', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('politico', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='mencoes', to='core.politico')),
+                ('noticia', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='mencoes', to='core.noticia')),
+            ],
+            options={
+                'verbose_name': 'Menção',
+                'verbose_name_plural': 'Menções',
+                'unique_together': {('noticia', 'politico')},
+            },
+        ),
+    ]
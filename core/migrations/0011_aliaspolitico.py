@@ -0,0 +1,27 @@
+# Generated by Django 5.2.4 on 2026-10-18 10:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_noticia_mencao'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AliasPolitico',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('alias', models.CharField(help_text='Ex.: Lula, Tarcísio', max_length=150)),
+                ('politico', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='aliases', to='core.politico')),
+            ],
+            options={
+                'verbose_name': 'Apelido de Político',
+                'verbose_name_plural': 'Apelidos de Políticos',
+                'unique_together': {('politico', 'alias')},
+            },
+        ),
+    ]
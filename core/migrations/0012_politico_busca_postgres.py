@@ -0,0 +1,44 @@
+from django.db import migrations
+
+# Índices de busca por nome só existem no PostgreSQL; nos demais bancos
+# core.busca usa um índice de prefixos em memória.
+CRIAR = [
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    # unaccent() é STABLE e não pode ser usada em índices; o dicionário fixo a torna IMMUTABLE
+    """
+    CREATE OR REPLACE FUNCTION iip_unaccent(text) RETURNS text AS $$
+        SELECT public.unaccent('public.unaccent'::regdictionary, $1)
+    $$ LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+    """,
+    "CREATE INDEX IF NOT EXISTS core_politico_nome_trgm_idx "
+    "ON core_politico USING gin (iip_unaccent(lower(nome)) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS core_politico_nome_prefixo_idx "
+    "ON core_politico (iip_unaccent(lower(nome)) text_pattern_ops)",
+]
+
+REMOVER = [
+    "DROP INDEX IF EXISTS core_politico_nome_prefixo_idx",
+    "DROP INDEX IF EXISTS core_politico_nome_trgm_idx",
+    "DROP FUNCTION IF EXISTS iip_unaccent(text)",
+]
+
+
+def _executar(comandos):
+    def executar(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for comando in comandos:
+            schema_editor.execute(comando)
+    return executar
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_aliaspolitico'),
+    ]
+
+    operations = [
+        migrations.RunPython(_executar(CRIAR), _executar(REMOVER)),
+    ]
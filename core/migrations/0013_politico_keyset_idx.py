@@ -0,0 +1,17 @@
+# Generated by Django 5.2.4 on 2026-10-18 10:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_politico_busca_postgres'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='politico',
+            index=models.Index(fields=['cargo', '-pontuacao_final', 'nome', 'id'], name='core_politico_keyset_idx'),
+        ),
+    ]
@@ -0,0 +1,98 @@
+# Generated by Django 5.2.4 on 2026-10-18 10:30
+
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def remover_votos_duplicados(apps, schema_editor):
+    """Mantém só o voto mais recente de cada (político, usuário) e refaz os contadores"""
+    def dec(valor):
+        if valor is None:
+            return None
+        return Decimal(str(valor)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+    # Fórmula da pontuação final nesta versão: média ponderada da nota da IA e
+    # da média dos usuários, ignorando o componente ausente (0 sem nenhum)
+    pesos = {'ia': 0.5, 'usuario': 0.5, **getattr(settings, 'IIP_PESOS', {})}
+    peso_ia = Decimal(str(pesos['ia']))
+    peso_usuario = Decimal(str(pesos['usuario']))
+
+    def pontuacao_final(media, nota_ia):
+        componentes = [
+            (dec(valor), peso) for valor, peso in ((nota_ia, peso_ia), (media, peso_usuario))
+            if valor is not None and peso
+        ]
+        total = sum(peso for _, peso in componentes)
+        if not total:
+            return Decimal('0.00')
+        return dec(sum(valor * peso for valor, peso in componentes) / total)
+
+    AvaliacaoUsuario = apps.get_model('core', 'AvaliacaoUsuario')
+    Politico = apps.get_model('core', 'Politico')
+
+    duplicados = (
+        AvaliacaoUsuario.objects.filter(usuario__isnull=False)
+        .values('politico_id', 'usuario_id')
+        .annotate(ultimo=models.Max('id'), total=models.Count('id'))
+        .filter(total__gt=1)
+    )
+    afetados = set()
+    for grupo in duplicados.iterator():
+        AvaliacaoUsuario.objects.filter(
+            politico_id=grupo['politico_id'], usuario_id=grupo['usuario_id'], id__lt=grupo['ultimo'],
+        ).delete()
+        afetados.add(grupo['politico_id'])
+    if not afetados:
+        return
+
+    politicos = list(Politico.objects.filter(id__in=afetados).annotate(
+        calc_soma=models.Sum('avaliacoes__nota'),
+        calc_total=models.Count('avaliacoes'),
+    ))
+    for politico in politicos:
+        politico.soma_avaliacoes = politico.calc_soma or 0
+        politico.total_avaliacoes = politico.calc_total
+        politico.media_usuarios = (
+            dec(Decimal(politico.soma_avaliacoes) / politico.total_avaliacoes) if politico.total_avaliacoes else None
+        )
+        politico.pontuacao_final = pontuacao_final(politico.media_usuarios, politico.nota_ia_recente)
+    Politico.objects.bulk_update(
+        politicos, ['soma_avaliacoes', 'total_avaliacoes', 'media_usuarios', 'pontuacao_final'], batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_politico_keyset_idx'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='politico',
+            name='core_politi_slug_4b87e3_idx',
+        ),
+        migrations.AddIndex(
+            model_name='nota',
+            index=models.Index(fields=['politico', '-periodo_ref'], name='core_nota_recente_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='politico',
+            index=models.Index(fields=['uf', '-pontuacao_final', 'nome'], name='core_politico_uf_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='politico',
+            index=models.Index(fields=['esfera', '-pontuacao_final', 'nome'], name='core_politico_esfera_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='politico',
+            index=models.Index(fields=['partido', '-pontuacao_final', 'nome'], name='core_politico_partido_idx'),
+        ),
+        migrations.RunPython(remover_votos_duplicados, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='avaliacaousuario',
+            constraint=models.UniqueConstraint(condition=models.Q(('usuario__isnull', False)), fields=('politico', 'usuario'), name='core_avaliacao_unica_por_usuario'),
+        ),
+    ]
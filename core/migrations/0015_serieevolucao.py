@@ -0,0 +1,26 @@
+# Generated by Django 5.2.4 on 2026-10-18 10:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_indices_consultas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SerieEvolucao',
+            fields=[
+                ('politico', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='serie_evolucao', serialize=False, to='core.politico')),
+                ('pontos', models.JSONField(default=list, help_text='Lista de [data ISO, pontuação]')),
+                ('atualizado_em', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Série de Evolução',
+                'verbose_name_plural': 'Séries de Evolução',
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.4 on 2026-10-18 10:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_serieevolucao'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='avaliacaousuario',
+            name='moderacao',
+            field=models.CharField(choices=[('PENDENTE', 'Pendente'), ('APROVADO', 'Aprovado'), ('REJEITADO', 'Rejeitado')], default='PENDENTE', max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='avaliacaousuario',
+            index=models.Index(condition=models.Q(('moderacao', 'APROVADO')), fields=['politico', '-criado_em', '-id'], name='core_avaliacao_comentarios_idx'),
+        ),
+    ]
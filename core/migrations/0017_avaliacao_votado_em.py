@@ -0,0 +1,26 @@
+# Generated by Django 5.2.4 on 2026-10-18 10:38
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def copiar_criado_em(apps, schema_editor):
+    # Sem registro de alterações anteriores, o voto conta a partir da criação
+    AvaliacaoUsuario = apps.get_model('core', 'AvaliacaoUsuario')
+    AvaliacaoUsuario.objects.update(votado_em=models.F('criado_em'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_avaliacao_moderacao'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='avaliacaousuario',
+            name='votado_em',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.RunPython(copiar_criado_em, migrations.RunPython.noop),
+    ]
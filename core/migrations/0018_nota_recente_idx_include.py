@@ -0,0 +1,35 @@
+from django.db import migrations
+
+# Índices com colunas INCLUDE só existem no PostgreSQL. O modelo declara o
+# índice sem elas (assim o check models.W040 não dispara nos outros bancos)
+# e, no PostgreSQL, ele é recriado com nota_ia para que a nota mais recente
+# de cada político seja lida só pelo índice.
+COBERTO = [
+    "DROP INDEX IF EXISTS core_nota_recente_idx",
+    "CREATE INDEX core_nota_recente_idx ON core_nota (politico_id, periodo_ref DESC) INCLUDE (nota_ia)",
+]
+
+SIMPLES = [
+    "DROP INDEX IF EXISTS core_nota_recente_idx",
+    "CREATE INDEX core_nota_recente_idx ON core_nota (politico_id, periodo_ref DESC)",
+]
+
+
+def _executar(comandos):
+    def executar(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for comando in comandos:
+            schema_editor.execute(comando)
+    return executar
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_avaliacao_votado_em'),
+    ]
+
+    operations = [
+        migrations.RunPython(_executar(COBERTO), _executar(SIMPLES)),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 11:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_nota_recente_idx_include'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='politico',
+            name='foto_validadores',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='URL, ETag e Last-Modified da última foto baixada de foto_url, para a revalidação condicional'),
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.conf import settings
+from django.utils import timezone
 from django.utils.text import slugify
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.core.exceptions import ValidationError
@@ -91,9 +92,14 @@ class Politico(models.Model):
     ]
 
     nome = models.CharField(max_length=150)
-    slug = models.SlugField(max_length=180, unique=True)
+    slug = models.SlugField(max_length=180, unique=True, blank=True, help_text="Gerado a partir do nome se ficar em branco")
     foto_url = models.URLField(blank=True, null=True, help_text="URL da foto (opcional)")
     foto = models.ImageField(upload_to='politicos/', blank=True, null=True, help_text="Upload da foto (opcional)")
+    foto_checksum = models.CharField(max_length=64, blank=True, editable=False, help_text="SHA-256 da imagem de origem espelhada de foto_url")
+    foto_validadores = models.JSONField(
+        default=dict, blank=True, editable=False,
+        help_text="URL, ETag e Last-Modified da última foto baixada de foto_url, para a revalidação condicional",
+    )
 
     partido = models.ForeignKey(Partido, on_delete=models.SET_NULL, null=True, blank=True, related_name="politicos")
     cargo = models.ForeignKey(Cargo, on_delete=models.SET_NULL, null=True, blank=True, related_name="politicos_atual")  # cargo atual (opcional)
@@ -105,21 +111,66 @@ class Politico(models.Model):
     ativo = models.BooleanField(default=True)
     data_nascimento = models.DateField(null=True, blank=True)
 
+    # Identificação na fonte de dados (ex.: id do deputado na API da Câmara) e
+    # hash do último registro importado, para pular o que não mudou
+    id_externo = models.CharField(max_length=50, blank=True, db_index=True)
+    hash_origem = models.CharField(max_length=64, blank=True, editable=False)
+
+    # Pontuação desnormalizada, mantida por core.pontuacao (ver core.signals)
+    soma_avaliacoes = models.PositiveBigIntegerField(default=0, editable=False)
+    total_avaliacoes = models.PositiveIntegerField(default=0, editable=False)
+    media_usuarios = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True, editable=False)
+    nota_ia_recente = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True, editable=False)
+    pontuacao_final = models.DecimalField(max_digits=5, decimal_places=2, default=0, editable=False)
+
+    # Variação da pontuação final em relação ao histórico (ver core.tendencias)
+    tendencia_7d = models.DecimalField(max_digits=5, decimal_places=2, default=0, editable=False)
+    tendencia_30d = models.DecimalField(max_digits=5, decimal_places=2, default=0, editable=False)
+    tendencia_90d = models.DecimalField(max_digits=5, decimal_places=2, default=0, editable=False)
+
     criado_em = models.DateTimeField(auto_now_add=True)
     atualizado_em = models.DateTimeField(auto_now=True)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Guarda a UF como veio do banco para que core.signals saiba se ela ficou vazia
+        instance._uf_original = dict(zip(field_names, values)).get('uf')
+        return instance
+
     class Meta:
         verbose_name = "Político"
         verbose_name_plural = "Políticos"
         indexes = [
-            models.Index(fields=["slug"]),
             models.Index(fields=["nome"]),
+            models.Index(fields=["-pontuacao_final", "nome"], name="core_politico_ranking_idx"),
+            # Filtros da página inicial seguidos da ordem do ranking
+            models.Index(fields=["uf", "-pontuacao_final", "nome"], name="core_politico_uf_idx"),
+            models.Index(fields=["esfera", "-pontuacao_final", "nome"], name="core_politico_esfera_idx"),
+            models.Index(fields=["partido", "-pontuacao_final", "nome"], name="core_politico_partido_idx"),
+            models.Index(fields=["cargo", "-pontuacao_final", "nome", "id"], name="core_politico_keyset_idx"),
+            models.Index(fields=["-total_avaliacoes", "-pontuacao_final"], name="core_politico_avaliacoes_idx"),
+            models.Index(fields=["-tendencia_30d", "-pontuacao_final"], name="core_politico_tendencia_idx"),
         ]
 
     def __str__(self):
         return self.nome
 
 
+class AliasPolitico(models.Model):
+    """Apelido ou nome de urna usado para reconhecer o político em textos (ver core.entidades)"""
+    politico = models.ForeignKey(Politico, on_delete=models.CASCADE, related_name="aliases")
+    alias = models.CharField(max_length=150, help_text="Ex.: Lula, Tarcísio")
+
+    class Meta:
+        verbose_name = "Apelido de Político"
+        verbose_name_plural = "Apelidos de Políticos"
+        unique_together = ("politico", "alias")
+
+    def __str__(self):
+        return f"{self.alias} ({self.politico})"
+
+
 class Mandato(models.Model):
     politico = models.ForeignKey(Politico, on_delete=models.CASCADE, related_name="mandatos")
     cargo = models.ForeignKey(Cargo, on_delete=models.PROTECT, related_name="mandatos")
@@ -154,24 +205,167 @@ class Nota(models.Model):
         verbose_name_plural = "Notas"
         unique_together = ("politico", "periodo_ref")
         ordering = ["-periodo_ref"]
+        indexes = [
+            # Nota mais recente de cada político; no PostgreSQL a migração 0018
+            # acrescenta nota_ia (INCLUDE) e a consulta é respondida só pelo índice
+            models.Index(fields=["politico", "-periodo_ref"], name="core_nota_recente_idx"),
+        ]
 
     def __str__(self):
         return f"Nota {self.politico} {self.periodo_ref}: {self.nota_final}"
 
 
+class Noticia(models.Model):
+    """Notícia já deduplicada que menciona ao menos um político (ver core.noticias)"""
+    titulo = models.CharField(max_length=500)
+    url = models.URLField(max_length=500, blank=True)
+    fonte = models.CharField(max_length=150, blank=True)
+    publicada_em = models.DateTimeField(null=True, blank=True)
+    hash_conteudo = models.CharField(max_length=40, unique=True, help_text="SHA-1 do texto normalizado")
+    sentimento = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+
+    criado_em = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Notícia"
+        verbose_name_plural = "Notícias"
+        ordering = ["-publicada_em"]
+        indexes = [
+            models.Index(fields=["publicada_em"]),
+        ]
+
+    def __str__(self):
+        return self.titulo
+
+
+class Mencao(models.Model):
+    noticia = models.ForeignKey(Noticia, on_delete=models.CASCADE, related_name="mencoes")
+    politico = models.ForeignKey(Politico, on_delete=models.CASCADE, related_name="mencoes")
+    trecho = models.TextField(blank=True, help_text="Texto normalizado ao redor da menção, usado no sentimento")
+    sentimento = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Menção"
+        verbose_name_plural = "Menções"
+        unique_together = ("noticia", "politico")
+
+    def __str__(self):
+        return f"{self.politico} em {self.noticia}"
+
+
+class HistoricoPontuacao(models.Model):
+    """Fotografia diária da pontuação de um político (ver core.tendencias)"""
+    politico = models.ForeignKey(Politico, on_delete=models.CASCADE, related_name="historico")
+    data = models.DateField()
+
+    pontuacao_final = models.DecimalField(max_digits=5, decimal_places=2)
+    media_usuarios = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    nota_ia = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    total_avaliacoes = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Histórico de Pontuação"
+        verbose_name_plural = "Históricos de Pontuação"
+        unique_together = ("politico", "data")
+        ordering = ["-data"]
+
+    def __str__(self):
+        return f"{self.politico} {self.data}: {self.pontuacao_final}"
+
+
+class SerieEvolucao(models.Model):
+    """Evolução da pontuação já reduzida para o gráfico do perfil (ver core.evolucao)"""
+    politico = models.OneToOneField(Politico, on_delete=models.CASCADE, primary_key=True, related_name="serie_evolucao")
+    pontos = models.JSONField(default=list, help_text="Lista de [data ISO, pontuação]")
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Série de Evolução"
+        verbose_name_plural = "Séries de Evolução"
+
+    def __str__(self):
+        return f"{self.politico_id}: {len(self.pontos)} pontos"
+
+
 class AvaliacaoUsuario(models.Model):
+    MODERACAO_CHOICES = [
+        ("PENDENTE", "Pendente"),
+        ("APROVADO", "Aprovado"),
+        ("REJEITADO", "Rejeitado"),
+    ]
+
     politico = models.ForeignKey(Politico, on_delete=models.CASCADE, related_name="avaliacoes")
     usuario = models.ForeignKey(getattr(settings, "AUTH_USER_MODEL", "auth.User"), on_delete=models.SET_NULL, null=True, blank=True)
     nota = models.IntegerField(validators=[MinValueValidator(0), MaxValueValidator(10)])
     comentario = models.TextField(blank=True)
+    # Só comentários aprovados aparecem no perfil (ver core.comentarios)
+    moderacao = models.CharField(max_length=10, choices=MODERACAO_CHOICES, default="PENDENTE")
 
     criado_em = models.DateTimeField(auto_now_add=True)
+    # Último voto ou alteração do usuário; base do intervalo entre votos (ver core.limites)
+    votado_em = models.DateTimeField(default=timezone.now, editable=False)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Guarda o voto como veio do banco para que core.signals aplique só a diferença
+        carregados = {nome: valor for nome, valor in zip(field_names, values) if valor is not models.DEFERRED}
+        instance._politico_original = carregados.get('politico_id')
+        instance._nota_original = carregados.get('nota')
+        instance._comentario_original = carregados.get('comentario')
+        return instance
+
+    def save(self, *args, **kwargs):
+        # Comentário editado volta para a fila de moderação
+        original = getattr(self, '_comentario_original', None)
+        if original is not None and original != self.comentario:
+            self.moderacao = "PENDENTE"
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'moderacao'}
+        super().save(*args, **kwargs)
+        self._comentario_original = self.comentario
 
     class Meta:
         verbose_name = "Avaliação de Usuário"
         verbose_name_plural = "Avaliações de Usuários"
         ordering = ["-criado_em"]
+        constraints = [
+            # Um voto por usuário e político, como supõe o update_or_create de avaliar_politico
+            models.UniqueConstraint(
+                fields=["politico", "usuario"], condition=models.Q(usuario__isnull=False),
+                name="core_avaliacao_unica_por_usuario",
+            ),
+        ]
+        indexes = [
+            # Comentários aprovados de um político, do mais recente para o mais antigo
+            models.Index(
+                fields=["politico", "-criado_em", "-id"], condition=models.Q(moderacao="APROVADO"),
+                name="core_avaliacao_comentarios_idx",
+            ),
+        ]
 
     def __str__(self):
         user = "anônimo" if not self.usuario else str(self.usuario)
         return f"{self.politico} - {self.nota} por {user}"
+
+
+class VotoPendente(models.Model):
+    """Fila (outbox) de votos recebidos no modo de ingestão assíncrona.
+
+    ``avaliar_politico`` grava aqui e responde na hora; o comando
+    ``processar_votos`` aplica os votos em lote em ``AvaliacaoUsuario``.
+    """
+    politico = models.ForeignKey(Politico, on_delete=models.CASCADE, related_name="+")
+    usuario = models.ForeignKey(getattr(settings, "AUTH_USER_MODEL", "auth.User"), on_delete=models.CASCADE, related_name="+")
+    nota = models.IntegerField(validators=[MinValueValidator(0), MaxValueValidator(10)])
+    comentario = models.TextField(blank=True)
+
+    criado_em = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Voto Pendente"
+        verbose_name_plural = "Votos Pendentes"
+        ordering = ["id"]
+
+    def __str__(self):
+        return f"{self.politico_id} - {self.nota} por {self.usuario_id} (pendente)"
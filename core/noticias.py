@@ -0,0 +1,432 @@
+"""Pipeline offline de notícias: leitura, deduplicação, entidades e sentimento.
+
+As notícias chegam como arquivos JSONL (opcionalmente ``.gz``) e são lidas
+em fluxo, em lotes de tamanho fixo, sem carregar o arquivo em memória. Cada
+lote passa pelas etapas:
+
+1. normalização e hash do texto (duplicatas exatas, também entre execuções);
+2. MinHash + LSH por bandas (quase-duplicatas, como a mesma matéria
+   republicada por outro portal);
+3. vinculação dos políticos citados com o índice de core.entidades;
+4. sentimento do trecho ao redor de cada menção, em uma chamada em lote ao
+   analisador configurado;
+5. gravação de ``Noticia``/``Mencao`` com ``bulk_create``.
+
+``atualizar_sentimento_noticias`` agrega depois as menções por mês em
+``Nota.sentimento_noticias`` e recalcula as notas do período (ver
+core.pontuacao).
+"""
+import datetime
+import gzip
+import hashlib
+import itertools
+import json
+import math
+import random
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Avg
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.module_loading import import_string
+
+from .entidades import normalizar
+from .models import Noticia, Mencao, Nota
+from .pontuacao import arredondar, fim_do_periodo, recalcular_periodo
+
+# Termos com peso de sentimento (texto já normalizado, sem acentos)
+LEXICO_PADRAO = {
+    'aprova': 1.0, 'aprovado': 1.0, 'aprovacao': 1.0, 'avanco': 1.0, 'beneficio': 1.0,
+    'conquista': 1.5, 'crescimento': 1.0, 'elogio': 1.5, 'elogiado': 1.5, 'eficiente': 1.5,
+    'entrega': 0.5, 'honesto': 2.0, 'inaugura': 1.0, 'investimento': 0.5, 'melhora': 1.0,
+    'melhoria': 1.0, 'positivo': 1.0, 'reconhecimento': 1.5, 'sucesso': 1.5, 'transparencia': 1.5,
+    'absolvido': 1.0, 'acordo': 0.5, 'apoio': 0.5, 'recorde': 1.0, 'vitoria': 1.0,
+    'acusado': -1.5, 'cassado': -2.0, 'cassacao': -2.0, 'condenado': -2.5, 'condenacao': -2.5,
+    'corrupcao': -2.5, 'crise': -1.0, 'critica': -1.0, 'criticado': -1.0, 'denuncia': -1.5,
+    'denunciado': -1.5, 'desvio': -2.0, 'escandalo': -2.0, 'fraude': -2.5, 'improbidade': -2.0,
+    'investigado': -1.5, 'investigacao': -1.0, 'irregularidade': -1.5, 'nepotismo': -2.0,
+    'polemica': -1.0, 'preso': -2.5, 'prisao': -2.0, 'propina': -2.5, 'reprovado': -1.0,
+    'rejeitado': -1.0, 'suspeita': -1.0, 'suspeito': -1.0, 'lavagem': -2.0,
+}
+
+NEGACOES = {'nao', 'nunca', 'jamais', 'sem', 'nem'}
+
+
+class AnalisadorLexico:
+    """Sentimento por léxico com tratamento simples de negação.
+
+    Qualquer classe com ``pontuar_lote(textos) -> [nota de 0 a 10]`` pode
+    substituí-la via ``settings.IIP_ANALISADOR_SENTIMENTO`` (ex.: um modelo
+    local que aproveita o lote para inferência vetorizada).
+    """
+
+    def __init__(self, lexico=None, alfa=15):
+        self.lexico = LEXICO_PADRAO if lexico is None else lexico
+        self.alfa = alfa
+
+    @classmethod
+    def de_arquivo(cls, caminho):
+        """Léxico em texto: uma linha ``termo<TAB>peso`` por termo"""
+        lexico = {}
+        with open(caminho, encoding='utf-8') as arquivo:
+            for linha in arquivo:
+                if not linha.strip() or linha.startswith('#'):
+                    continue
+                termo, peso = linha.rsplit('\t', 1)
+                lexico[normalizar(termo)] = float(peso)
+        return cls(lexico)
+
+    def pontuar(self, texto):
+        soma = 0.0
+        negar = 0
+        for palavra in texto.split():
+            if palavra in NEGACOES:
+                negar = 3
+                continue
+            peso = self.lexico.get(palavra)
+            if peso:
+                soma += -peso if negar else peso
+            negar = max(negar - 1, 0)
+        # Normalização em (-1, 1), como no VADER, levada para a escala 0-10
+        return 5 + 5 * soma / math.sqrt(soma * soma + self.alfa)
+
+    def pontuar_lote(self, textos):
+        return [self.pontuar(texto) for texto in textos]
+
+
+def carregar_analisador(caminho=None, lexico=None):
+    if lexico:
+        return AnalisadorLexico.de_arquivo(lexico)
+    caminho = caminho or getattr(settings, 'IIP_ANALISADOR_SENTIMENTO', None)
+    return import_string(caminho)() if caminho else AnalisadorLexico()
+
+
+class MinHasher:
+    """Assinatura MinHash de shingles de ``k`` palavras.
+
+    Usa "one permutation hashing": o hash de cada shingle cai em
+    um de ``num_perm`` baldes e cada balde guarda o menor valor, o que custa
+    uma passada pelos shingles em vez de uma por permutação. Baldes vazios
+    (textos curtos) são preenchidos pelo próximo balde ocupado, deslocado
+    pela distância, como na densificação por rotação de Shrivastava e Li.
+    """
+
+    def __init__(self, num_perm=64, k=5, semente=1):
+        self.num_perm = num_perm
+        self.k = k
+        self.mascara = random.Random(semente).getrandbits(64)
+
+    def shingles(self, texto):
+        """Hashes de 64 bits dos shingles.
+
+        Usa o ``hash()`` nativo, que varia entre processos (PYTHONHASHSEED):
+        as assinaturas só são comparadas dentro da mesma execução, e as
+        duplicatas entre execuções são pegas pelo SHA-1 do texto.
+        """
+        palavras = tuple(texto.split())
+        k = min(self.k, len(palavras))
+        if not k:
+            return set()
+        return {hash(palavras[i:i + k]) & 0xFFFFFFFFFFFFFFFF for i in range(len(palavras) - k + 1)}
+
+    def assinatura(self, texto):
+        hashes = self.shingles(texto)
+        if not hashes:
+            return None
+        num_perm = self.num_perm
+        minimos = [None] * num_perm
+        for valor in hashes:
+            valor, balde = divmod(valor ^ self.mascara, num_perm)
+            atual = minimos[balde]
+            if atual is None or valor < atual:
+                minimos[balde] = valor
+        if None not in minimos:
+            return tuple(minimos)
+
+        assinatura = []
+        for balde in range(num_perm):
+            distancia = 0
+            while minimos[(balde + distancia) % num_perm] is None:
+                distancia += 1
+            assinatura.append(minimos[(balde + distancia) % num_perm] + (distancia << 58))
+        return tuple(assinatura)
+
+
+class IndiceLSH:
+    """Índice LSH por bandas para detectar quase-duplicatas em fluxo.
+
+    Com ``bandas`` faixas de ``r`` linhas, duas notícias colidem com alta
+    probabilidade a partir de uma similaridade de Jaccard de cerca de
+    ``(1/bandas) ** (1/r)`` (0,77 com 64 permutações em 8 bandas). A memória
+    é limitada por gerações: quando a geração atual passa de ``limite``
+    notícias ela vira a anterior e a mais antiga é descartada, o que basta
+    para republicações, que costumam sair perto umas das outras.
+    """
+
+    def __init__(self, num_perm=64, bandas=8, limite=250000):
+        if num_perm % bandas:
+            raise ValueError('num_perm deve ser múltiplo de bandas')
+        self.bandas = bandas
+        self.linhas = num_perm // bandas
+        self.limite = limite
+        self._atual = set()
+        self._anterior = set()
+        self._tamanho = 0
+
+    def _chaves(self, assinatura):
+        return [
+            hash((banda, assinatura[banda * self.linhas:(banda + 1) * self.linhas]))
+            for banda in range(self.bandas)
+        ]
+
+    def duplicada(self, assinatura):
+        """Indica se já viu algo parecido; caso contrário, registra a assinatura"""
+        chaves = self._chaves(assinatura)
+        if any(chave in self._atual or chave in self._anterior for chave in chaves):
+            return True
+        self._atual.update(chaves)
+        self._tamanho += 1
+        if self._tamanho >= self.limite:
+            self._anterior, self._atual, self._tamanho = self._atual, set(), 0
+        return False
+
+
+class HashesRecentes:
+    """Conjunto de hashes exatos com a mesma memória por gerações do ``IndiceLSH``.
+
+    Só precisa cobrir as notícias lidas mas não gravadas (sem menção): as
+    gravadas são encontradas pelo ``hash_conteudo`` no banco a cada lote.
+    """
+
+    def __init__(self, limite=250000):
+        self.limite = limite
+        self._atual = set()
+        self._anterior = set()
+
+    def __contains__(self, valor):
+        return valor in self._atual or valor in self._anterior
+
+    def adicionar(self, valor):
+        self._atual.add(valor)
+        if len(self._atual) >= self.limite:
+            self._anterior, self._atual = self._atual, set()
+
+
+class Metricas:
+    """Tempo e itens por etapa, para o relatório de vazão"""
+
+    def __init__(self):
+        self.etapas = {}
+
+    @contextmanager
+    def etapa(self, nome, itens=0):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.contar(nome, itens)
+            self.etapas[nome][1] += time.perf_counter() - inicio
+
+    def contar(self, nome, itens):
+        self.etapas.setdefault(nome, [0, 0.0])[0] += itens
+
+    def relatorio(self):
+        """Lista de ``(etapa, itens, segundos, itens por segundo)``"""
+        return [
+            (nome, itens, segundos, itens / segundos if segundos else 0.0)
+            for nome, (itens, segundos) in self.etapas.items()
+        ]
+
+
+@dataclass
+class ResultadoNoticias:
+    lidas: int = 0
+    invalidas: int = 0
+    duplicadas_exatas: int = 0
+    duplicadas_aproximadas: int = 0
+    sem_mencao: int = 0
+    gravadas: int = 0
+    mencoes: int = 0
+    periodos: set = field(default_factory=set)
+
+
+def ler_jsonl(caminhos):
+    """Gera um dicionário por linha dos arquivos; linhas inválidas viram ``None``"""
+    for caminho in caminhos:
+        abrir = gzip.open if str(caminho).endswith('.gz') else open
+        with abrir(caminho, 'rt', encoding='utf-8') as arquivo:
+            for linha in arquivo:
+                if not linha.strip():
+                    continue
+                try:
+                    registro = json.loads(linha)
+                except json.JSONDecodeError:
+                    registro = None
+                yield registro if isinstance(registro, dict) else None
+
+
+def _primeiro(registro, *chaves):
+    for chave in chaves:
+        valor = registro.get(chave)
+        if valor:
+            return valor
+    return ''
+
+
+def _data_publicacao(valor):
+    if not valor:
+        return None
+    data = parse_datetime(str(valor))
+    if data is None:
+        dia = parse_date(str(valor)[:10])
+        if dia is None:
+            return None
+        data = datetime.datetime.combine(dia, datetime.time())
+    if timezone.is_naive(data):
+        data = timezone.make_aware(data)
+    return data
+
+
+class PipelineNoticias:
+    def __init__(self, indice, analisador, hasher=None, lsh=None, lote=500, janela=40):
+        self.indice = indice
+        self.analisador = analisador
+        self.hasher = hasher or MinHasher()
+        self.lsh = lsh or IndiceLSH(num_perm=self.hasher.num_perm)
+        self.lote = lote
+        self.janela = janela
+        self.metricas = Metricas()
+        self.resultado = ResultadoNoticias()
+        self._hashes_vistos = HashesRecentes(self.lsh.limite)
+
+    def processar(self, registros):
+        registros = iter(registros)
+        while True:
+            with self.metricas.etapa('leitura'):
+                lote = list(itertools.islice(registros, self.lote))
+            self.metricas.contar('leitura', len(lote))
+            if not lote:
+                break
+            self._processar_lote(lote)
+        return self.resultado
+
+    def _processar_lote(self, lote):
+        resultado = self.resultado
+        resultado.lidas += len(lote)
+
+        with self.metricas.etapa('normalizacao', len(lote)):
+            artigos = []
+            for registro in lote:
+                texto = _primeiro(registro or {}, 'texto', 'conteudo', 'text', 'content')
+                titulo = _primeiro(registro or {}, 'titulo', 'title')
+                bruto = f'{titulo} {texto}'
+                normalizado = normalizar(bruto)
+                if not normalizado:
+                    resultado.invalidas += 1
+                    continue
+                artigos.append({
+                    'registro': registro,
+                    'titulo': titulo,
+                    'bruto': bruto,
+                    'texto': normalizado,
+                    'hash': hashlib.sha1(normalizado.encode()).hexdigest(),
+                })
+
+        with self.metricas.etapa('deduplicacao', len(artigos)):
+            ja_gravados = set(
+                Noticia.objects.filter(hash_conteudo__in=[artigo['hash'] for artigo in artigos])
+                .values_list('hash_conteudo', flat=True)
+            )
+            unicos = []
+            for artigo in artigos:
+                if artigo['hash'] in ja_gravados or artigo['hash'] in self._hashes_vistos:
+                    resultado.duplicadas_exatas += 1
+                    continue
+                self._hashes_vistos.adicionar(artigo['hash'])
+                if self.lsh.duplicada(self.hasher.assinatura(artigo['texto'])):
+                    resultado.duplicadas_aproximadas += 1
+                    continue
+                unicos.append(artigo)
+
+        with self.metricas.etapa('entidades', len(unicos)):
+            trechos = []
+            for artigo in unicos:
+                texto = artigo['texto']
+                palavras = texto.split()
+                artigo['mencoes'] = {}
+                # Trecho de ``janela`` palavras antes e depois da primeira menção
+                for vinculo in self.indice.vincular(artigo['bruto'], palavras=palavras):
+                    trecho = ' '.join(palavras[max(vinculo.inicio - self.janela, 0):vinculo.fim + self.janela])
+                    artigo['mencoes'].setdefault(vinculo.politico_id, trecho)
+                if not artigo['mencoes']:
+                    resultado.sem_mencao += 1
+                    continue
+                trechos.append(texto)
+                trechos.extend(artigo['mencoes'].values())
+            com_mencao = [artigo for artigo in unicos if artigo['mencoes']]
+
+        with self.metricas.etapa('sentimento', len(trechos)):
+            notas = iter(self.analisador.pontuar_lote(trechos))
+
+        with self.metricas.etapa('gravacao', len(com_mencao)):
+            noticias = []
+            mencoes = []
+            for artigo in com_mencao:
+                registro = artigo['registro']
+                publicada_em = _data_publicacao(_primeiro(registro, 'publicada_em', 'data', 'published_at', 'date'))
+                noticia = Noticia(
+                    titulo=(artigo['titulo'] or artigo['texto'])[:500],
+                    url=_primeiro(registro, 'url', 'link')[:500],
+                    fonte=_primeiro(registro, 'fonte', 'source')[:150],
+                    publicada_em=publicada_em,
+                    hash_conteudo=artigo['hash'],
+                    sentimento=arredondar(next(notas)),
+                )
+                noticias.append(noticia)
+                for politico_id, trecho in artigo['mencoes'].items():
+                    mencoes.append(Mencao(
+                        noticia=noticia, politico_id=politico_id, trecho=trecho, sentimento=arredondar(next(notas)),
+                    ))
+                if publicada_em:
+                    resultado.periodos.add(timezone.localtime(publicada_em).date().replace(day=1))
+
+            with transaction.atomic():
+                Noticia.objects.bulk_create(noticias)
+                Mencao.objects.bulk_create(mencoes)
+            resultado.gravadas += len(noticias)
+            resultado.mencoes += len(mencoes)
+
+
+def atualizar_sentimento_noticias(periodo_ref, batch_size=1000):
+    """Grava em ``Nota.sentimento_noticias`` a média das menções do mês e recalcula as notas"""
+    inicio = timezone.make_aware(datetime.datetime.combine(periodo_ref.replace(day=1), datetime.time()))
+    medias = dict(
+        Mencao.objects.filter(
+            noticia__publicada_em__gte=inicio, noticia__publicada_em__lt=fim_do_periodo(periodo_ref)
+        ).values('politico_id').annotate(media=Avg('sentimento')).order_by()
+        .values_list('politico_id', 'media')
+    )
+    notas = {
+        nota.politico_id: nota
+        for nota in Nota.objects.filter(periodo_ref=periodo_ref, politico_id__in=list(medias))
+    }
+    novas = []
+    alteradas = []
+    for politico_id, media in medias.items():
+        media = arredondar(media)
+        nota = notas.get(politico_id)
+        if nota is None:
+            novas.append(Nota(politico_id=politico_id, periodo_ref=periodo_ref, sentimento_noticias=media))
+        elif nota.sentimento_noticias != media:
+            nota.sentimento_noticias = media
+            alteradas.append(nota)
+
+    with transaction.atomic():
+        Nota.objects.bulk_create(novas, batch_size=batch_size)
+        Nota.objects.bulk_update(alteradas, ['sentimento_noticias'], batch_size=batch_size)
+    recalcular_periodo(periodo_ref, batch_size=batch_size)
+    return len(novas) + len(alteradas)
@@ -0,0 +1,252 @@
+"""Cálculo e manutenção da pontuação desnormalizada dos políticos.
+
+As colunas ``soma_avaliacoes``, ``total_avaliacoes``, ``media_usuarios``,
+``nota_ia_recente`` e ``pontuacao_final`` de ``Politico`` são atualizadas
+aqui sempre que uma ``AvaliacaoUsuario`` ou ``Nota`` muda, para que o
+ranking seja lido com consultas simples e indexadas.
+
+Votos atualizam os contadores por diferença (``F()``), na mesma transação
+do voto, sem varrer as avaliações do político. ``recalcular_todas`` refaz
+tudo a partir das tabelas de origem e serve como reconciliação periódica.
+
+As fórmulas ponderadas da proposta (``nota_ia`` e ``nota_final``) também
+ficam aqui, com os pesos de ``settings.IIP_PESOS``; ``recalcular_periodo``
+as aplica a um ``periodo_ref`` inteiro e grava os campos de ``Nota``.
+"""
+import datetime
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import Avg, Count, F, Sum
+from django.utils import timezone
+
+from .cache import invalidar_perfis, invalidar_ranking
+from .models import Politico, AvaliacaoUsuario, Nota
+
+DUAS_CASAS = Decimal('0.01')
+
+PESOS_PADRAO = {'ia': 0.5, 'usuario': 0.5, 'dados_oficiais': 0.5, 'noticias': 0.5}
+
+
+def arredondar(valor):
+    """``valor`` como Decimal de duas casas (meio para cima); ``None`` passa direto"""
+    if valor is None:
+        return None
+    return Decimal(str(valor)).quantize(DUAS_CASAS, rounding=ROUND_HALF_UP)
+
+
+def calcular_media(soma, total):
+    if not total:
+        return None
+    return arredondar(Decimal(soma) / Decimal(total))
+
+
+def pesos_configurados():
+    """Pesos de ``settings.IIP_PESOS`` (completados com os padrões) como Decimal"""
+    pesos = {**PESOS_PADRAO, **getattr(settings, 'IIP_PESOS', {})}
+    return {nome: Decimal(str(peso)) for nome, peso in pesos.items()}
+
+
+def combinar(*componentes):
+    """Média ponderada de pares ``(valor, peso)``; componentes ausentes são ignorados"""
+    presentes = [(arredondar(valor), peso) for valor, peso in componentes if valor is not None and peso]
+    total = sum(peso for _, peso in presentes)
+    if not total:
+        return None
+    return arredondar(sum(valor * peso for valor, peso in presentes) / total)
+
+
+def calcular_nota_ia(nota_dados_oficiais, sentimento_noticias, pesos=None):
+    pesos = pesos or pesos_configurados()
+    return combinar(
+        (nota_dados_oficiais, pesos['dados_oficiais']),
+        (sentimento_noticias, pesos['noticias']),
+    )
+
+
+def calcular_nota_final(nota_ia, nota_usuario, pesos=None):
+    pesos = pesos or pesos_configurados()
+    return combinar((nota_ia, pesos['ia']), (nota_usuario, pesos['usuario']))
+
+
+def calcular_pontuacao_final(media_usuarios, nota_ia, pesos=None):
+    """Pontuação final: a mesma fórmula de ``Nota.nota_final``, ou 0 sem notas"""
+    nota_final = calcular_nota_final(nota_ia, media_usuarios, pesos)
+    return Decimal('0.00') if nota_final is None else nota_final
+
+
+def _nota_ia_mais_recente(politico_id):
+    return (
+        Nota.objects.filter(politico_id=politico_id)
+        .order_by('-periodo_ref')
+        .values_list('nota_ia', flat=True)
+        .first()
+    )
+
+
+def _atualizar_derivados(politico_id):
+    """Recalcula média e pontuação final a partir dos contadores já gravados"""
+    valores = Politico.objects.filter(pk=politico_id).values_list(
+        'soma_avaliacoes', 'total_avaliacoes', 'nota_ia_recente'
+    ).first()
+    if valores is None:
+        return None
+
+    soma, total, nota_ia = valores
+    media_usuarios = calcular_media(soma, total)
+    Politico.objects.filter(pk=politico_id).update(
+        media_usuarios=media_usuarios,
+        pontuacao_final=calcular_pontuacao_final(media_usuarios, nota_ia),
+    )
+    return media_usuarios, total
+
+
+def aplicar_delta_avaliacao(politico_id, delta_soma, delta_total):
+    """Soma a diferença de um voto aos contadores do político em O(1).
+
+    O ``UPDATE ... SET soma = soma + delta`` trava a linha do político até o
+    fim da transação, então votos concorrentes são aplicados em sequência.
+    Retorna ``(media_usuarios, total_avaliacoes)`` após a atualização.
+    """
+    with transaction.atomic():
+        Politico.objects.filter(pk=politico_id).update(
+            soma_avaliacoes=F('soma_avaliacoes') + delta_soma,
+            total_avaliacoes=F('total_avaliacoes') + delta_total,
+        )
+        return _atualizar_derivados(politico_id)
+
+
+def atualizar_nota_ia(politico_id):
+    """Atualiza a nota da IA mais recente e a pontuação final"""
+    with transaction.atomic():
+        Politico.objects.filter(pk=politico_id).update(nota_ia_recente=_nota_ia_mais_recente(politico_id))
+        _atualizar_derivados(politico_id)
+
+
+def atualizar_pontuacao(politico_id):
+    """Recalcula do zero as colunas de pontuação de um único político"""
+    stats = AvaliacaoUsuario.objects.filter(politico_id=politico_id).aggregate(
+        soma_avaliacoes=Sum('nota'),
+        total_avaliacoes=Count('id'),
+    )
+    nota_ia = _nota_ia_mais_recente(politico_id)
+
+    media_usuarios = calcular_media(stats['soma_avaliacoes'] or 0, stats['total_avaliacoes'])
+    Politico.objects.filter(pk=politico_id).update(
+        soma_avaliacoes=stats['soma_avaliacoes'] or 0,
+        media_usuarios=media_usuarios,
+        total_avaliacoes=stats['total_avaliacoes'],
+        nota_ia_recente=nota_ia,
+        pontuacao_final=calcular_pontuacao_final(media_usuarios, nota_ia),
+    )
+
+
+def recalcular_todas(batch_size=1000):
+    """Recalcula a pontuação de todos os políticos em lote.
+
+    Usado para popular as colunas pela primeira vez e para reconciliar
+    eventuais divergências dos contadores. Retorna o número de políticos
+    alterados.
+    """
+    queryset = Politico.objects.annotate(
+        calc_soma=Sum('avaliacoes__nota'),
+        calc_total=Count('avaliacoes'),
+        calc_nota_ia=models.Subquery(
+            Nota.objects.filter(politico=models.OuterRef('pk'))
+            .order_by('-periodo_ref')
+            .values('nota_ia')[:1]
+        ),
+    ).only(
+        'id', 'soma_avaliacoes', 'media_usuarios', 'total_avaliacoes', 'nota_ia_recente', 'pontuacao_final'
+    )
+
+    campos = ['soma_avaliacoes', 'media_usuarios', 'total_avaliacoes', 'nota_ia_recente', 'pontuacao_final']
+    pesos = pesos_configurados()
+    alterados = []
+    for politico in queryset.iterator(chunk_size=batch_size):
+        soma = politico.calc_soma or 0
+        media_usuarios = calcular_media(soma, politico.calc_total)
+        nota_ia = arredondar(politico.calc_nota_ia)
+        novos = {
+            'soma_avaliacoes': soma,
+            'media_usuarios': media_usuarios,
+            'total_avaliacoes': politico.calc_total,
+            'nota_ia_recente': nota_ia,
+            'pontuacao_final': calcular_pontuacao_final(media_usuarios, nota_ia, pesos),
+        }
+        if any(getattr(politico, campo) != valor for campo, valor in novos.items()):
+            for campo, valor in novos.items():
+                setattr(politico, campo, valor)
+            alterados.append(politico)
+
+    with transaction.atomic():
+        Politico.objects.bulk_update(alterados, campos, batch_size=batch_size)
+    if alterados:
+        # bulk_update não dispara os sinais que invalidam o ranking
+        invalidar_ranking()
+        invalidar_perfis()
+    return len(alterados)
+
+
+def fim_do_periodo(periodo_ref):
+    """Início do mês seguinte ao de ``periodo_ref``, como datetime com fuso"""
+    proximo = (periodo_ref.replace(day=1) + datetime.timedelta(days=32)).replace(day=1)
+    return timezone.make_aware(datetime.datetime.combine(proximo, datetime.time()))
+
+
+def recalcular_periodo(periodo_ref, batch_size=1000):
+    """Recalcula as notas de todos os políticos para um ``periodo_ref``.
+
+    ``nota_usuario`` é a média dos votos registrados até o fim do mês do
+    período; ``nota_ia`` combina dados oficiais e sentimento das notícias
+    (sem nenhum dos dois, a nota da IA já gravada é mantida) e
+    ``nota_final`` combina as duas. Políticos com votos e sem ``Nota`` no
+    período ganham uma. Tudo é gravado com ``bulk_create``/``bulk_update``
+    em uma transação; no fim, as colunas desnormalizadas de ``Politico``
+    são reconciliadas. Retorna ``(criadas, atualizadas)``.
+    """
+    pesos = pesos_configurados()
+    medias = dict(
+        AvaliacaoUsuario.objects.filter(criado_em__lt=fim_do_periodo(periodo_ref))
+        .values('politico_id').annotate(media=Avg('nota')).order_by()
+        .values_list('politico_id', 'media')
+    )
+    notas = {
+        nota.politico_id: nota
+        for nota in Nota.objects.filter(periodo_ref=periodo_ref).iterator(chunk_size=batch_size)
+    }
+
+    agora = timezone.now()
+    campos = ['nota_usuario', 'nota_ia', 'nota_final']
+    novas = []
+    alteradas = []
+    for politico_id in medias.keys() | notas.keys():
+        nota = notas.get(politico_id)
+        if nota is None:
+            nota = Nota(politico_id=politico_id, periodo_ref=periodo_ref)
+            novas.append(nota)
+
+        nota_usuario = arredondar(medias.get(politico_id))
+        nota_ia = calcular_nota_ia(nota.nota_dados_oficiais, nota.sentimento_noticias, pesos)
+        if nota_ia is None:
+            nota_ia = arredondar(nota.nota_ia)
+        novos = {
+            'nota_usuario': nota_usuario,
+            'nota_ia': nota_ia,
+            'nota_final': calcular_nota_final(nota_ia, nota_usuario, pesos),
+        }
+
+        if nota.pk is not None and all(getattr(nota, campo) == valor for campo, valor in novos.items()):
+            continue
+        for campo, valor in novos.items():
+            setattr(nota, campo, valor)
+        if nota.pk is not None:
+            nota.atualizado_em = agora
+            alteradas.append(nota)
+
+    with transaction.atomic():
+        Nota.objects.bulk_create(novas, batch_size=batch_size)
+        Nota.objects.bulk_update(alteradas, campos + ['atualizado_em'], batch_size=batch_size)
+        recalcular_todas(batch_size=batch_size)
+    return len(novas), len(alteradas)
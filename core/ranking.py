@@ -0,0 +1,178 @@
+"""Motor do ranking da página inicial.
+
+Busca o top N de cada Poder em uma única ida ao banco. Cada Poder vira um
+ramo ``ORDER BY ... LIMIT N`` (que percorre os índices de pontuação de
+``Politico``) e os ramos são unidos com ``UNION ALL``. Bancos que não
+aceitam LIMIT dentro de UNION (SQLite) recebem uma consulta por Poder, o
+que é barato por não haver ida e volta de rede.
+
+A estratégia com ``ROW_NUMBER() OVER (PARTITION BY cargo.poder ...)``
+continua disponível, mas precisa ordenar todas as linhas filtradas e fica
+bem mais lenta em tabelas grandes (ver ``manage.py benchmark_ranking``).
+
+O ranking completo de cada Poder é paginado por chave (keyset) em
+``(pontuacao_final DESC, nome, id)``: o cursor guarda a última linha vista
+e a próxima página começa direto nela pelo índice, então a página 500 custa
+o mesmo que a primeira, ao contrário de ``OFFSET``. Como o Poder fica em
+``Cargo``, cada cargo do Poder vira um ramo que busca no índice
+``(cargo, pontuacao_final DESC, nome, id)`` e os ramos são combinados como
+no top 10.
+"""
+import base64
+import json
+from decimal import Decimal, InvalidOperation
+
+from django.db import connection
+from django.db.models import F, Q, Window
+from django.db.models.functions import RowNumber
+
+from .models import Politico, Cargo
+
+PODERES = [poder for poder, _ in Cargo.PODER_CHOICES]
+
+ORDENACOES = {
+    'pontuacao': ('-pontuacao_final', 'nome'),
+    'nome': ('nome',),
+    'avaliacoes': ('-total_avaliacoes', '-pontuacao_final'),
+    'tendencia': ('-tendencia_30d', '-pontuacao_final'),
+}
+ORDENACAO_PADRAO = 'pontuacao'
+
+ESTRATEGIAS = ('uniao', 'janela', 'por_poder')
+
+ORDEM_PAGINADA = ('-pontuacao_final', 'nome', 'id')
+TAMANHO_PAGINA = 50
+TAMANHO_MAXIMO = 200
+
+
+def filtrar_politicos(queryset, partido=None, cargo=None, esfera=None, uf=None):
+    """Aplica os filtros da página inicial (valores vazios são ignorados)"""
+    if partido:
+        queryset = queryset.filter(partido__sigla=partido)
+    if cargo:
+        queryset = queryset.filter(cargo__nome=cargo)
+    if esfera:
+        queryset = queryset.filter(esfera=esfera)
+    if uf:
+        queryset = queryset.filter(uf=uf)
+    return queryset
+
+
+def estrategia_padrao():
+    if connection.features.supports_slicing_ordering_in_compound:
+        return 'uniao'
+    return 'por_poder'
+
+
+def top_por_poder(partido=None, cargo=None, esfera=None, uf=None, ordenacao=ORDENACAO_PADRAO,
+                  limite=10, estrategia=None):
+    """Retorna ``{poder: [politicos]}`` com os ``limite`` primeiros de cada Poder"""
+    queryset = filtrar_politicos(
+        Politico.objects.select_related('partido', 'cargo'),
+        partido=partido, cargo=cargo, esfera=esfera, uf=uf,
+    )
+    campos = ORDENACOES.get(ordenacao, ORDENACOES[ORDENACAO_PADRAO])
+    estrategia = estrategia or estrategia_padrao()
+    ranking = {poder: [] for poder in PODERES}
+
+    if estrategia == 'uniao':
+        ramos = [queryset.filter(cargo__poder=poder).order_by(*campos)[:limite] for poder in PODERES]
+        # Sem ORDER BY externo o UNION ALL não garante a ordem das linhas
+        # (ex.: Parallel Append no PostgreSQL)
+        resultado = ramos[0].union(*ramos[1:], all=True).order_by('cargo__poder', *campos)
+    elif estrategia == 'janela':
+        resultado = queryset.filter(cargo__poder__in=PODERES).annotate(
+            posicao=Window(
+                expression=RowNumber(),
+                partition_by=[F('cargo__poder')],
+                order_by=[F(c[1:]).desc() if c.startswith('-') else F(c).asc() for c in campos],
+            )
+        ).filter(posicao__lte=limite).order_by('cargo__poder', 'posicao')
+    elif estrategia == 'por_poder':
+        for poder in PODERES:
+            ranking[poder] = list(queryset.filter(cargo__poder=poder).order_by(*campos)[:limite])
+        return ranking
+    else:
+        raise ValueError(f'Estratégia de ranking desconhecida: {estrategia}')
+
+    # Ordenados por Poder e, dentro dele, pela ordenação pedida
+    for politico in resultado:
+        ranking[politico.cargo.poder].append(politico)
+    return ranking
+
+
+def _chave(linha):
+    """``(pontuacao, nome, id)`` de um político ou de um dicionário de ``values()``"""
+    if isinstance(linha, dict):
+        return linha['pontuacao_final'], linha['nome'], linha['id']
+    return linha.pontuacao_final, linha.nome, linha.id
+
+
+def _ordem_paginada(linha):
+    pontuacao, nome, politico_id = _chave(linha)
+    return -pontuacao, nome, politico_id
+
+
+def codificar_cursor(politico, posicao):
+    pontuacao, nome, politico_id = _chave(politico)
+    dados = [str(pontuacao), nome, politico_id, posicao]
+    return base64.urlsafe_b64encode(json.dumps(dados).encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor):
+    """Retorna ``(pontuacao, nome, id, posicao)``; ValueError se o cursor for inválido"""
+    try:
+        dados = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        pontuacao, nome, politico_id, posicao = dados
+        return Decimal(pontuacao), str(nome), int(politico_id), int(posicao)
+    except (ValueError, TypeError, InvalidOperation):
+        raise ValueError('Cursor inválido')
+
+
+def pagina_ranking(poder, cursor=None, tamanho=TAMANHO_PAGINA, cargos=None, campos=None, **filtros):
+    """Uma página do ranking completo de um Poder.
+
+    ``cargos`` é a lista de cargos já carregada (ver core.referencias) e
+    evita uma consulta para descobrir os cargos do Poder. Com ``campos`` as
+    linhas vêm como dicionários de ``values()`` (``id``, ``nome`` e
+    ``pontuacao_final`` são sempre incluídos), sem instanciar modelos. Retorna
+    ``(politicos, proximo_cursor, posicao_inicial)``; ``proximo_cursor`` é
+    ``None`` na última página.
+    """
+    if cargos is None:
+        cargos = Cargo.objects.filter(poder=poder)
+    ids_cargos = [cargo.id for cargo in cargos if cargo.poder == poder]
+    queryset = filtrar_politicos(Politico.objects.select_related('partido', 'cargo'), **filtros)
+    if campos:
+        queryset = queryset.values(*dict.fromkeys(('id', 'nome', 'pontuacao_final') + tuple(campos)))
+
+    posicao = 0
+    if cursor:
+        pontuacao, nome, politico_id, posicao = decodificar_cursor(cursor)
+        # O primeiro termo posiciona a busca no índice; os demais desempatam
+        queryset = queryset.filter(pontuacao_final__lte=pontuacao).filter(
+            Q(pontuacao_final__lt=pontuacao)
+            | Q(nome__gt=nome)
+            | Q(nome=nome, id__gt=politico_id)
+        )
+
+    tamanho = max(1, min(tamanho, TAMANHO_MAXIMO))
+    ramos = [queryset.filter(cargo_id=cargo_id).order_by(*ORDEM_PAGINADA)[:tamanho + 1] for cargo_id in ids_cargos]
+    if not ramos:
+        politicos = []
+    elif len(ramos) == 1:
+        politicos = list(ramos[0])
+    elif connection.features.supports_slicing_ordering_in_compound:
+        politicos = list(ramos[0].union(*ramos[1:], all=True).order_by(*ORDEM_PAGINADA)[:tamanho + 1])
+    else:
+        # SQLite compara textos byte a byte (BINARY), como o sort do Python
+        politicos = sorted(
+            (politico for ramo in ramos for politico in ramo),
+            key=_ordem_paginada,
+        )[:tamanho + 1]
+
+    proximo = None
+    if len(politicos) > tamanho:
+        politicos = politicos[:tamanho]
+        proximo = codificar_cursor(politicos[-1], posicao + tamanho)
+    return politicos, proximo, posicao + 1
@@ -0,0 +1,71 @@
+"""Listas de opções dos filtros da página inicial (partidos, cargos e UFs).
+
+As listas são carregadas uma vez por processo e servidas da memória. Para
+que vários processos/workers enxerguem as mudanças, cada carga é marcada
+com um número de versão guardado no cache compartilhado; alterações em
+``Partido`` e ``Cargo``, ou no conjunto de UFs dos políticos, incrementam
+essa versão (ver core.signals) quando a transação é confirmada. Em regime,
+os filtros custam zero consultas ao banco e uma leitura de cache.
+"""
+import threading
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Partido, Cargo, Politico
+
+CHAVE_VERSAO = 'iip:referencias:versao'
+
+_lock = threading.Lock()
+_dados = None
+_versao = None
+
+
+def _versao_atual():
+    versao = cache.get(CHAVE_VERSAO)
+    if versao is None:
+        cache.add(CHAVE_VERSAO, time.time_ns() // 1000, None)
+        versao = cache.get(CHAVE_VERSAO)
+    return versao
+
+
+def _carregar():
+    return {
+        'partidos': list(Partido.objects.order_by('sigla')),
+        'cargos': list(Cargo.objects.order_by('nome')),
+        'ufs': list(
+            Politico.objects.exclude(uf='').values_list('uf', flat=True).distinct().order_by('uf')
+        ),
+    }
+
+
+def opcoes_filtros():
+    """Retorna ``{'partidos': [...], 'cargos': [...], 'ufs': [...]}``"""
+    global _dados, _versao
+
+    versao = _versao_atual()
+    if _dados is not None and _versao == versao:
+        return _dados
+
+    with _lock:
+        if _dados is None or _versao != versao:
+            _dados = _carregar()
+            _versao = versao
+    return _dados
+
+
+def uf_conhecida(uf):
+    """Indica se ``uf`` já está na lista carregada por este processo"""
+    return _dados is not None and uf in _dados['ufs']
+
+
+def invalidar_referencias():
+    transaction.on_commit(_incrementar_versao)
+
+
+def _incrementar_versao():
+    try:
+        cache.incr(CHAVE_VERSAO)
+    except ValueError:
+        _versao_atual()
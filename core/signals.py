@@ -0,0 +1,122 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .busca import registrar_alteracao
+from .cache import invalidar_perfil, invalidar_perfis, invalidar_ranking
+from .models import Politico, Partido, Cargo, AvaliacaoUsuario, Nota
+from .pontuacao import aplicar_delta_avaliacao, atualizar_nota_ia, atualizar_pontuacao
+from .referencias import invalidar_referencias, uf_conhecida
+
+
+@receiver(post_save, sender=AvaliacaoUsuario)
+def aplicar_voto(sender, instance, created, **kwargs):
+    """Aplica aos contadores do político só a diferença trazida pelo voto"""
+    politico_original = getattr(instance, '_politico_original', None)
+    nota_original = getattr(instance, '_nota_original', None)
+
+    # (media_usuarios, total_avaliacoes) do político após o voto, quando já
+    # calculados aqui; a view de voto os devolve sem reler o político
+    estatisticas = None
+    if created:
+        estatisticas = aplicar_delta_avaliacao(instance.politico_id, instance.nota, 1)
+    elif politico_original is None or nota_original is None:
+        # Instância montada fora do ORM: sem o valor anterior, recalcula do zero
+        atualizar_pontuacao(instance.politico_id)
+    elif politico_original != instance.politico_id:
+        aplicar_delta_avaliacao(politico_original, -nota_original, -1)
+        estatisticas = aplicar_delta_avaliacao(instance.politico_id, instance.nota, 1)
+    elif nota_original != instance.nota:
+        estatisticas = aplicar_delta_avaliacao(instance.politico_id, instance.nota - nota_original, 0)
+
+    instance._politico_original = instance.politico_id
+    instance._nota_original = instance.nota
+    instance._estatisticas_politico = estatisticas
+
+
+@receiver(post_delete, sender=AvaliacaoUsuario)
+def remover_voto(sender, instance, **kwargs):
+    nota = getattr(instance, '_nota_original', None)
+    politico_id = getattr(instance, '_politico_original', None) or instance.politico_id
+    aplicar_delta_avaliacao(politico_id, -(instance.nota if nota is None else nota), -1)
+
+
+@receiver(post_save, sender=Nota)
+@receiver(post_delete, sender=Nota)
+def atualizar_nota_ia_politico(sender, instance, **kwargs):
+    """Mantém a nota da IA e a pontuação final do político em dia"""
+    atualizar_nota_ia(instance.politico_id)
+
+
+@receiver(post_save, sender=Politico)
+@receiver(post_delete, sender=Politico)
+@receiver(post_save, sender=Partido)
+@receiver(post_delete, sender=Partido)
+@receiver(post_save, sender=Cargo)
+@receiver(post_delete, sender=Cargo)
+@receiver(post_save, sender=AvaliacaoUsuario)
+@receiver(post_delete, sender=AvaliacaoUsuario)
+@receiver(post_save, sender=Nota)
+@receiver(post_delete, sender=Nota)
+def invalidar_cache_ranking(sender, **kwargs):
+    """Qualquer mudança que apareça no ranking invalida o cache (ver core.cache)"""
+    invalidar_ranking()
+
+
+@receiver(post_save, sender=Partido)
+@receiver(post_delete, sender=Partido)
+@receiver(post_save, sender=Cargo)
+@receiver(post_delete, sender=Cargo)
+def invalidar_opcoes_filtros(sender, **kwargs):
+    invalidar_referencias()
+    # Sigla e nome aparecem em todos os perfis
+    invalidar_perfis()
+
+
+@receiver(post_save, sender=Politico)
+@receiver(post_delete, sender=Politico)
+def invalidar_perfil_politico(sender, instance, **kwargs):
+    invalidar_perfil(instance.pk)
+
+
+@receiver(post_save, sender=AvaliacaoUsuario)
+@receiver(post_delete, sender=AvaliacaoUsuario)
+@receiver(post_save, sender=Nota)
+@receiver(post_delete, sender=Nota)
+def invalidar_perfil_avaliado(sender, instance, **kwargs):
+    """Voto ou nota novos mudam as notas exibidas no perfil do político"""
+    invalidar_perfil(instance.politico_id)
+
+
+def _uf_vazia(uf):
+    return bool(uf) and not Politico.objects.filter(uf=uf).exists()
+
+
+@receiver(post_save, sender=Politico)
+def invalidar_ufs_nova(sender, instance, update_fields=None, **kwargs):
+    """Só recarrega as UFs quando aparece uma que ainda não está na lista
+    ou quando o político deixa para trás uma UF sem mais ninguém"""
+    if update_fields is not None and 'uf' not in update_fields:
+        return
+    anterior = getattr(instance, '_uf_original', None)
+    instance._uf_original = instance.uf
+    if instance.uf and not uf_conhecida(instance.uf):
+        invalidar_referencias()
+    elif anterior != instance.uf and _uf_vazia(anterior):
+        invalidar_referencias()
+
+
+@receiver(post_delete, sender=Politico)
+def invalidar_ufs_removida(sender, instance, **kwargs):
+    if _uf_vazia(instance.uf):
+        invalidar_referencias()
+
+
+@receiver(post_save, sender=Politico)
+def atualizar_indice_busca(sender, instance, **kwargs):
+    """Só a linha salva muda no índice de busca em memória (ver core.busca)"""
+    registrar_alteracao(instance.pk, instance.nome, instance.pontuacao_final)
+
+
+@receiver(post_delete, sender=Politico)
+def remover_do_indice_busca(sender, instance, **kwargs):
+    registrar_alteracao(instance.pk, None)
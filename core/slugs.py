@@ -0,0 +1,84 @@
+"""Alocação de slugs únicos para políticos.
+
+Em vez de testar ``slug``, ``slug-1``, ``slug-2``... com uma consulta
+``exists()`` cada, os slugs já usados com o mesmo prefixo são carregados
+de uma vez e os sufixos são escolhidos em memória. Se um processo
+concorrente gravar o mesmo slug antes, a gravação falha com
+``IntegrityError`` e ``salvar_com_slug`` recarrega o prefixo e tenta de novo.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils.text import slugify
+
+from .models import Politico
+
+MAX_LENGTH = Politico._meta.get_field('slug').max_length
+TENTATIVAS = 3
+
+
+def slug_base(nome):
+    # Reserva espaço para o sufixo "-N"
+    return slugify(nome)[:MAX_LENGTH - 8].strip('-') or 'politico'
+
+
+class AlocadorSlugs:
+    """Guarda os slugs ocupados por prefixo e aloca novos sem ir ao banco"""
+
+    def __init__(self, queryset=None, lote=100):
+        self.queryset = queryset if queryset is not None else Politico.objects.all()
+        self.lote = lote
+        self._ocupados = {}
+
+    def preparar(self, nomes):
+        """Carrega os slugs ocupados de vários nomes em poucas consultas"""
+        bases = sorted({slug_base(nome) for nome in nomes} - set(self._ocupados))
+        for inicio in range(0, len(bases), self.lote):
+            lote = bases[inicio:inicio + self.lote]
+            for base in lote:
+                self._ocupados[base] = set()
+            filtro = Q()
+            for base in lote:
+                filtro |= Q(slug__startswith=base)
+            for slug in self.queryset.filter(filtro).values_list('slug', flat=True):
+                for base in lote:
+                    if slug.startswith(base):
+                        self._ocupados[base].add(slug)
+
+    def recarregar(self, nome):
+        self._ocupados.pop(slug_base(nome), None)
+        self.preparar([nome])
+
+    def alocar(self, nome):
+        base = slug_base(nome)
+        if base not in self._ocupados:
+            self.preparar([nome])
+        ocupados = self._ocupados[base]
+
+        slug = base
+        counter = 1
+        while slug in ocupados:
+            slug = f"{base}-{counter}"
+            counter += 1
+        ocupados.add(slug)
+        return slug
+
+
+def salvar_com_slug(politico, alocador=None):
+    """Salva ``politico`` gerando um slug único caso ele ainda não tenha um"""
+    if politico.slug:
+        politico.save()
+        return politico
+
+    alocador = alocador or AlocadorSlugs(Politico.objects.exclude(pk=politico.pk))
+    for tentativa in range(TENTATIVAS):
+        politico.slug = alocador.alocar(politico.nome)
+        try:
+            with transaction.atomic():
+                politico.save()
+            return politico
+        except IntegrityError:
+            # Outro processo usou o mesmo slug; recarrega o prefixo e tenta de novo
+            if tentativa == TENTATIVAS - 1:
+                politico.slug = ''
+                raise
+            alocador.recarregar(politico.nome)
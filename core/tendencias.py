@@ -0,0 +1,168 @@
+"""Histórico diário da pontuação e tendências dos políticos.
+
+``registrar_historico`` grava uma fotografia por político e por dia a partir
+das colunas desnormalizadas de ``Politico`` (ver core.pontuacao), sem tocar
+em ``AvaliacaoUsuario`` ou ``Nota``. ``atualizar_tendencias`` compara a
+pontuação atual com a fotografia mais recente de 7, 30 e 90 dias antes e
+grava as diferenças em ``tendencia_7d``/``30d``/``90d``, que o ranking lê
+por índice.
+
+``reconstruir_historico`` preenche dias passados a partir das tabelas de
+origem; como votos alterados não guardam a data da alteração, o resultado
+é uma aproximação, útil só para não começar com o histórico vazio.
+"""
+import datetime
+
+from django.db import models, transaction
+from django.db.models import Count, OuterRef, Q, Subquery, Sum
+from django.utils import timezone
+
+from .cache import invalidar_ranking
+from .evolucao import em_lotes
+from .models import Politico, HistoricoPontuacao, Nota
+from .pontuacao import arredondar, calcular_media, calcular_pontuacao_final, pesos_configurados
+
+JANELAS = {'tendencia_7d': 7, 'tendencia_30d': 30, 'tendencia_90d': 90}
+
+CAMPOS_HISTORICO = ['pontuacao_final', 'media_usuarios', 'nota_ia', 'total_avaliacoes']
+
+
+def _gravar(data, linhas, batch_size):
+    """Insere ou atualiza as fotografias de ``data`` lote a lote.
+
+    ``linhas`` é um iterável de ``(politico_id, {campo: valor})``. De cada
+    lote só as fotografias já existentes daqueles políticos são lidas, e o
+    lote é gravado na sua própria transação; como a gravação é idempotente
+    por dia, rodar de novo completa um dia interrompido.
+    """
+    criados = atualizados = 0
+    for lote in em_lotes(linhas, batch_size):
+        existentes = {
+            historico.politico_id: historico
+            for historico in HistoricoPontuacao.objects.filter(
+                data=data, politico_id__in=[politico_id for politico_id, _ in lote]
+            )
+        }
+        novos = []
+        alterados = []
+        for politico_id, campos in lote:
+            historico = existentes.get(politico_id)
+            if historico is None:
+                novos.append(HistoricoPontuacao(politico_id=politico_id, data=data, **campos))
+            elif any(getattr(historico, campo) != valor for campo, valor in campos.items()):
+                for campo, valor in campos.items():
+                    setattr(historico, campo, valor)
+                alterados.append(historico)
+
+        with transaction.atomic():
+            HistoricoPontuacao.objects.bulk_create(novos, batch_size=batch_size)
+            HistoricoPontuacao.objects.bulk_update(alterados, CAMPOS_HISTORICO, batch_size=batch_size)
+        criados += len(novos)
+        atualizados += len(alterados)
+    return criados, atualizados
+
+
+def registrar_historico(data=None, batch_size=1000):
+    """Fotografa a pontuação atual de todos os políticos; idempotente por dia"""
+    data = data or timezone.localdate()
+    politicos = Politico.objects.order_by('id').values(
+        'id', 'pontuacao_final', 'media_usuarios', 'nota_ia_recente', 'total_avaliacoes'
+    )
+    linhas = (
+        (politico['id'], {
+            'pontuacao_final': politico['pontuacao_final'],
+            'media_usuarios': politico['media_usuarios'],
+            'nota_ia': politico['nota_ia_recente'],
+            'total_avaliacoes': politico['total_avaliacoes'],
+        })
+        for politico in politicos.iterator(chunk_size=batch_size)
+    )
+    return _gravar(data, linhas, batch_size)
+
+
+def _reconstruir(politico, pesos):
+    media_usuarios = calcular_media(politico['calc_soma'] or 0, politico['calc_total'])
+    nota_ia = arredondar(politico['calc_nota_ia'])
+    return politico['id'], {
+        'pontuacao_final': calcular_pontuacao_final(media_usuarios, nota_ia, pesos),
+        'media_usuarios': media_usuarios,
+        'nota_ia': nota_ia,
+        'total_avaliacoes': politico['calc_total'],
+    }
+
+
+def reconstruir_historico(data, batch_size=1000):
+    """Recalcula a fotografia de um dia passado a partir de votos e notas"""
+    fim_do_dia = timezone.make_aware(datetime.datetime.combine(data + datetime.timedelta(days=1), datetime.time()))
+    ate_o_dia = Q(avaliacoes__criado_em__lt=fim_do_dia)
+    queryset = Politico.objects.annotate(
+        calc_soma=Sum('avaliacoes__nota', filter=ate_o_dia),
+        calc_total=Count('avaliacoes', filter=ate_o_dia),
+        calc_nota_ia=Subquery(
+            Nota.objects.filter(politico=OuterRef('pk'), periodo_ref__lte=data)
+            .order_by('-periodo_ref')
+            .values('nota_ia')[:1]
+        ),
+    ).filter(criado_em__lt=fim_do_dia).order_by('id').values('id', 'calc_soma', 'calc_total', 'calc_nota_ia')
+
+    pesos = pesos_configurados()
+    linhas = (_reconstruir(politico, pesos) for politico in queryset.iterator(chunk_size=batch_size))
+    return _gravar(data, linhas, batch_size)
+
+
+def atualizar_tendencias(data=None, batch_size=1000):
+    """Grava em cada político a variação da pontuação em 7, 30 e 90 dias.
+
+    A referência de cada janela é a fotografia mais recente até ``data``
+    menos N dias (consulta servida pelo índice único (politico, data));
+    sem fotografia anterior, a tendência é zero. Retorna o número de
+    políticos alterados.
+    """
+    data = data or timezone.localdate()
+    anotacoes = {
+        f'ref_{campo}': Subquery(
+            HistoricoPontuacao.objects.filter(
+                politico=OuterRef('pk'), data__lte=data - datetime.timedelta(days=dias)
+            ).order_by('-data').values('pontuacao_final')[:1],
+            output_field=models.DecimalField(max_digits=5, decimal_places=2),
+        )
+        for campo, dias in JANELAS.items()
+    }
+    queryset = Politico.objects.annotate(**anotacoes).only('id', 'pontuacao_final', *JANELAS)
+
+    alterados = 0
+    for lote in _por_faixa_de_id(queryset, batch_size):
+        mudaram = [politico for politico in lote if _aplicar_tendencias(politico)]
+        with transaction.atomic():
+            Politico.objects.bulk_update(mudaram, list(JANELAS), batch_size=batch_size)
+        alterados += len(mudaram)
+    if alterados:
+        invalidar_ranking()
+    return alterados
+
+
+def _por_faixa_de_id(queryset, tamanho):
+    """Percorre ``queryset`` em lotes de ids crescentes, cada lote numa consulta.
+
+    Ao contrário de ``iterator()``, nenhum cursor fica aberto enquanto o
+    lote anterior é gravado na mesma tabela.
+    """
+    ultimo = 0
+    while True:
+        lote = list(queryset.filter(id__gt=ultimo).order_by('id')[:tamanho])
+        if not lote:
+            return
+        yield lote
+        ultimo = lote[-1].id
+
+
+def _aplicar_tendencias(politico):
+    """Atualiza as tendências de ``politico`` em memória; indica se alguma mudou"""
+    mudou = False
+    for campo in JANELAS:
+        referencia = getattr(politico, f'ref_{campo}')
+        valor = arredondar(politico.pontuacao_final - referencia) if referencia is not None else arredondar(0)
+        if getattr(politico, campo) != valor:
+            setattr(politico, campo, valor)
+            mudou = True
+    return mudou
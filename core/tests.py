@@ -1,3 +1,1315 @@
-from django.test import TestCase
+import datetime
+import json
+import os
+import tempfile
+import threading
+from datetime import timedelta
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO, StringIO
+from urllib.parse import parse_qs, urlparse
 
-# Create your tests here.
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import DatabaseError, IntegrityError, connection, transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+
+from .admin import PoliticoAdmin
+from .busca import IndicePrefixos, buscar_politicos
+from .cache import obter_ranking, versao_ranking
+from .camara import ClienteCamara, ErroAPICamara
+from .comentarios import obter_comentarios
+from .consultas import orcamento_consultas
+from .entidades import IndiceEntidades
+from .evolucao import LIMITE, atualizar_series, lttb
+from .ingestao import IngestorPoliticos
+from .limites import JanelaDeslizante
+from .noticias import HashesRecentes, IndiceLSH, PipelineNoticias, carregar_analisador
+from .models import (
+    AliasPolitico, AvaliacaoUsuario, Cargo, HistoricoPontuacao, Mencao, Nota, Noticia, Partido, Politico,
+    SerieEvolucao, VotoPendente,
+)
+from .pontuacao import recalcular_periodo, recalcular_todas
+from .ranking import ESTRATEGIAS, ORDENACOES, PODERES, filtrar_politicos, top_por_poder
+from .referencias import opcoes_filtros
+from .slugs import TENTATIVAS, AlocadorSlugs, salvar_com_slug
+from .tendencias import atualizar_tendencias, registrar_historico
+from .votos import aplicar_votos, enfileirar_voto, processar_lote
+
+
+def criar_usuario(username, cpf, **campos):
+    # Sem create_user: o hash de senha domina o tempo dos testes
+    return get_user_model().objects.create(username=username, cpf=cpf, **campos)
+
+
+class PoliticosMixin:
+    """Dois senadores do mesmo partido (Ana Lima/SP e Bruno Reis/RJ) e um eleitor
+
+    Criados uma vez por classe; o cache é limpo antes de cada teste.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.cargo = Cargo.objects.create(nome='Senador', poder='LEGISLATIVO', nivel='FEDERAL')
+        cls.partido = Partido.objects.create(sigla='PX', nome='Partido X')
+        cls.politico = Politico.objects.create(
+            nome='Ana Lima', slug='ana-lima', cargo=cls.cargo, partido=cls.partido, uf='SP',
+        )
+        cls.outro = Politico.objects.create(
+            nome='Bruno Reis', slug='bruno-reis', cargo=cls.cargo, partido=cls.partido, uf='RJ',
+        )
+        cls.usuario = criar_usuario('eleitor', '52998224725')
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+
+class StubCamaraHandler(BaseHTTPRequestHandler):
+    """Imita os endpoints /deputados e /deputados/<id> da API da Câmara"""
+
+    deputados = []
+    detalhes = {}
+    falhas_pendentes = {}
+    requisicoes = []
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        caminho = url.path.rstrip('/')
+        query = parse_qs(url.query)
+        type(self).requisicoes.append(caminho)
+
+        restantes = self.falhas_pendentes.get(caminho, 0)
+        if restantes:
+            self.falhas_pendentes[caminho] = restantes - 1
+            self._responder(429, {}, {'Retry-After': '0'})
+            return
+
+        if caminho == '/deputados':
+            itens = int(query.get('itens', ['100'])[0])
+            pagina = int(query.get('pagina', ['1'])[0])
+            links = []
+            if pagina * itens < len(self.deputados):
+                host, porta = self.server.server_address
+                links.append({
+                    'rel': 'next',
+                    'href': f'http://{host}:{porta}/deputados?itens={itens}&pagina={pagina + 1}',
+                })
+            dados = self.deputados[(pagina - 1) * itens:pagina * itens]
+            self._responder(200, {'dados': dados, 'links': links})
+        elif caminho.startswith('/deputados/') and caminho.rsplit('/', 1)[1] in self.detalhes:
+            self._responder(200, {'dados': self.detalhes[caminho.rsplit('/', 1)[1]]})
+        else:
+            self._responder(404, {})
+
+    def _responder(self, status, corpo, headers=None):
+        dados = json.dumps(corpo).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(dados)))
+        for nome, valor in (headers or {}).items():
+            self.send_header(nome, valor)
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubCamaraMixin:
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.servidor = ThreadingHTTPServer(('127.0.0.1', 0), StubCamaraHandler)
+        cls.url_base = f'http://127.0.0.1:{cls.servidor.server_address[1]}'
+        threading.Thread(target=cls.servidor.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.servidor.shutdown()
+        cls.servidor.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        super().setUp()
+        StubCamaraHandler.deputados = [
+            {'id': i, 'nome': f'Deputado {i}', 'siglaUf': 'SP', 'siglaPartido': 'PT'}
+            for i in range(1, 6)
+        ]
+        StubCamaraHandler.detalhes = {
+            str(i): {'dataNascimento': '1970-01-0%d' % i, 'municipioNascimento': 'São Paulo',
+                     'urlFoto': f'https://example.org/{i}.jpg'}
+            for i in range(1, 6)
+        }
+        StubCamaraHandler.falhas_pendentes = {}
+        StubCamaraHandler.requisicoes = []
+
+
+class ClienteCamaraTests(StubCamaraMixin, TestCase):
+    def test_repete_apos_429(self):
+        StubCamaraHandler.falhas_pendentes = {'/deputados/1': 2}
+        with ClienteCamara(url_base=self.url_base, taxa=100, backoff=0) as cliente:
+            dados = cliente.detalhes_deputado(1)
+        self.assertEqual(dados['municipioNascimento'], 'São Paulo')
+        self.assertEqual(StubCamaraHandler.requisicoes.count('/deputados/1'), 3)
+
+    def test_desiste_apos_esgotar_tentativas(self):
+        StubCamaraHandler.falhas_pendentes = {'/deputados/1': 10}
+        with ClienteCamara(url_base=self.url_base, taxa=100, backoff=0, tentativas=2) as cliente:
+            with self.assertRaises(ErroAPICamara):
+                cliente.detalhes_deputado(1)
+
+    def test_detalhes_em_paralelo_reporta_erros(self):
+        with ClienteCamara(url_base=self.url_base, taxa=100, backoff=0) as cliente:
+            resultados = list(cliente.detalhes_em_paralelo(
+                StubCamaraHandler.deputados + [{'id': 99, 'nome': 'Inexistente'}], workers=4
+            ))
+        erros = [deputado['id'] for deputado, _, erro in resultados if erro is not None]
+        self.assertEqual(len(resultados), 6)
+        self.assertEqual(erros, [99])
+
+
+class ImportarDeputadosTests(StubCamaraMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        diretorio = tempfile.TemporaryDirectory()
+        self.addCleanup(diretorio.cleanup)
+        self.checkpoint = os.path.join(diretorio.name, 'checkpoint.json')
+
+    def importar(self, **opcoes):
+        saida = StringIO()
+        call_command(
+            'importar_deputados', url_base=self.url_base, taxa=100, checkpoint=self.checkpoint,
+            stdout=saida, **opcoes
+        )
+        return saida.getvalue()
+
+    def test_importa_e_atualiza(self):
+        saida = self.importar(limite=5)
+        self.assertIn('Deputados importados: 5', saida)
+        politico = Politico.objects.get(nome='Deputado 3')
+        self.assertEqual(politico.partido.sigla, 'PT')
+        self.assertEqual(str(politico.data_nascimento), '1970-01-03')
+
+        StubCamaraHandler.deputados[2]['siglaUf'] = 'RJ'
+        saida = self.importar(limite=5)
+        self.assertIn('Deputados importados: 0', saida)
+        self.assertIn('Deputados atualizados: 1', saida)
+        self.assertEqual(Politico.objects.get(nome='Deputado 3').uf, 'RJ')
+
+    def test_segue_paginacao(self):
+        saida = self.importar(todos=True, itens_por_pagina=2)
+        self.assertIn('Páginas processadas: 3', saida)
+        self.assertEqual(Politico.objects.count(), 5)
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_limite_atravessa_paginas(self):
+        self.importar(limite=3, itens_por_pagina=2)
+        self.assertEqual(
+            sorted(Politico.objects.values_list('nome', flat=True)),
+            ['Deputado 1', 'Deputado 2', 'Deputado 3'],
+        )
+
+    def test_retoma_do_checkpoint(self):
+        with open(self.checkpoint, 'w', encoding='utf-8') as arquivo:
+            json.dump({
+                'proxima_url': f'{self.url_base}/deputados?itens=2&pagina=3',
+                'paginas': 2, 'processados': 4, 'importados': 4, 'atualizados': 0,
+            }, arquivo)
+
+        saida = self.importar(todos=True, retomar=True)
+        self.assertIn('Páginas processadas: 3', saida)
+        self.assertEqual(list(Politico.objects.values_list('nome', flat=True)), ['Deputado 5'])
+        self.assertNotIn('/deputados/1', StubCamaraHandler.requisicoes)
+
+    def test_reimportacao_pula_deputados_inalterados(self):
+        self.importar(limite=5)
+        StubCamaraHandler.requisicoes = []
+        StubCamaraHandler.deputados[1]['siglaPartido'] = 'PSB'
+
+        saida = self.importar(limite=5)
+        self.assertIn('Deputados atualizados: 1', saida)
+        self.assertIn('Deputados sem alterações: 4', saida)
+        detalhes = [caminho for caminho in StubCamaraHandler.requisicoes if caminho != '/deputados']
+        self.assertEqual(detalhes, ['/deputados/2'])
+        self.assertEqual(Politico.objects.get(id_externo='2').partido.sigla, 'PSB')
+
+        StubCamaraHandler.requisicoes = []
+        self.importar(limite=5, forcar=True)
+        self.assertEqual(len(StubCamaraHandler.requisicoes), 6)
+
+    def test_forcar_grava_so_quem_mudou_nos_detalhes(self):
+        self.importar(limite=5)
+        StubCamaraHandler.detalhes['3']['dataNascimento'] = '1980-05-05'
+
+        # A entrada na lista não mudou: sem --forcar os detalhes nem são buscados
+        self.assertIn('Deputados atualizados: 0', self.importar(limite=5))
+        saida = self.importar(limite=5, forcar=True)
+        self.assertIn('Deputados atualizados: 1', saida)
+        self.assertIn('Deputados sem alterações: 4', saida)
+        self.assertEqual(str(Politico.objects.get(id_externo='3').data_nascimento), '1980-05-05')
+
+    def test_retomar_repete_deputados_com_erro(self):
+        detalhes = StubCamaraHandler.detalhes.pop('4')
+        saida = self.importar(limite=5, itens_por_pagina=2)
+        self.assertIn('Deputados importados: 4', saida)
+        self.assertIn('Deputados com erro: 1', saida)
+        with open(self.checkpoint, encoding='utf-8') as arquivo:
+            self.assertEqual([deputado['id'] for deputado in json.load(arquivo)['falhas']], [4])
+
+        StubCamaraHandler.detalhes['4'] = detalhes
+        StubCamaraHandler.requisicoes = []
+        saida = self.importar(limite=5, retomar=True)
+        self.assertIn('Deputados importados: 5', saida)
+        self.assertEqual(StubCamaraHandler.requisicoes, ['/deputados/4'])
+        self.assertTrue(Politico.objects.filter(id_externo='4').exists())
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+
+class IngestorPoliticosTests(TestCase):
+    def test_partido_e_cargo_novos_so_existem_apos_gravar(self):
+        ingestor = IngestorPoliticos()
+        partido = ingestor.partido('PSB')
+        cargo = ingestor.cargo('Senador', 'LEGISLATIVO', 'FEDERAL')
+        ingestor.adicionar('Ana Lima', partido=partido, cargo=cargo)
+        self.assertFalse(Partido.objects.exists())
+
+        # Outro processo cria o mesmo partido antes: a gravação reaproveita a linha dele
+        concorrente = Partido.objects.create(sigla='PSB', nome='Partido Socialista Brasileiro')
+        self.assertEqual(ingestor.gravar().criados, ['Ana Lima'])
+        politico = Politico.objects.get()
+        self.assertEqual(politico.partido_id, concorrente.pk)
+        self.assertEqual(politico.cargo, Cargo.objects.get())
+
+    def test_falha_na_gravacao_nao_deixa_partido_orfao(self):
+        ingestor = IngestorPoliticos()
+        ingestor.adicionar('Ana Lima', partido=ingestor.partido('PSB'))
+        with mock.patch.object(ingestor, '_criar', side_effect=DatabaseError), self.assertRaises(DatabaseError):
+            ingestor.gravar()
+        self.assertFalse(Partido.objects.exists())
+
+
+class SlugsTests(PoliticosMixin, TestCase):
+    def test_alocador_escolhe_sufixos_livres_em_memoria(self):
+        Politico.objects.create(nome='Ana Lima', slug='ana-lima-1')
+        Politico.objects.create(nome='Ana Limão', slug='ana-limao')
+        alocador = AlocadorSlugs()
+        with self.assertNumQueries(1):
+            alocador.preparar(['Ana Lima', 'Ána  LIMA', 'Ana Limão'])
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                [alocador.alocar(nome) for nome in ('Ana Lima', 'Ana Lima', 'Ana Limão')],
+                ['ana-lima-2', 'ana-lima-3', 'ana-limao-1'],
+            )
+        self.assertEqual(alocador.alocar('!!!'), 'politico')
+
+    def test_salvar_com_slug_realoca_apos_integrity_error(self):
+        alocador = AlocadorSlugs()
+        alocador.preparar(['Carla Dias'])
+        # Outro processo grava o mesmo slug depois que o alocador leu o prefixo
+        Politico.objects.create(nome='Carla Dias', slug='carla-dias')
+
+        politico = salvar_com_slug(Politico(nome='Carla Dias', cargo=self.cargo), alocador)
+        self.assertEqual(politico.slug, 'carla-dias-1')
+        self.assertEqual(Politico.objects.filter(slug__startswith='carla-dias').count(), 2)
+
+    def test_salvar_com_slug_desiste_apos_as_tentativas(self):
+        politico = Politico(nome='Carla Dias')
+        with mock.patch.object(Politico, 'save', side_effect=IntegrityError) as salvar:
+            with self.assertRaises(IntegrityError):
+                salvar_com_slug(politico)
+        self.assertEqual(salvar.call_count, TENTATIVAS)
+        self.assertEqual(politico.slug, '')
+
+    def test_admin_gera_slug_e_marca_foto_enviada(self):
+        politico = Politico(nome='Ana Lima', cargo=self.cargo, foto_checksum='abc')
+        PoliticoAdmin(Politico, admin.site).save_model(None, politico, mock.Mock(changed_data=['foto']), False)
+        politico.refresh_from_db()
+        self.assertEqual(politico.slug, 'ana-lima-1')
+        self.assertEqual(politico.foto_checksum, '')
+
+        # Slug informado no formulário é mantido
+        outro = Politico(nome='Ana Lima', slug='ana-lima-senadora')
+        PoliticoAdmin(Politico, admin.site).save_model(None, outro, mock.Mock(changed_data=[]), False)
+        self.assertTrue(Politico.objects.filter(slug='ana-lima-senadora').exists())
+
+
+class StubFotosHandler(BaseHTTPRequestHandler):
+    """Serve as imagens de ``imagens`` pelo caminho, com ETag se houver em ``etags``"""
+
+    imagens = {}
+    etags = {}
+    requisicoes = []
+    nao_modificadas = 0
+
+    def do_GET(self):
+        type(self).requisicoes.append(self.path)
+        etag = self.etags.get(self.path)
+        if etag and self.headers.get('If-None-Match') == etag:
+            type(self).nao_modificadas += 1
+            self.send_response(304)
+            self.end_headers()
+            return
+        dados = self.imagens.get(self.path)
+        self.send_response(200 if dados else 404)
+        if etag:
+            self.send_header('ETag', etag)
+        self.send_header('Content-Type', 'image/png')
+        self.send_header('Content-Length', str(len(dados or b'')))
+        self.end_headers()
+        self.wfile.write(dados or b'')
+
+    def log_message(self, *args):
+        pass
+
+
+def imagem_png(cor):
+    saida = BytesIO()
+    Image.new('RGB', (40, 60), cor).save(saida, 'PNG')
+    return saida.getvalue()
+
+
+class EspelharFotosTests(PoliticosMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.servidor = ThreadingHTTPServer(('127.0.0.1', 0), StubFotosHandler)
+        cls.url_base = f'http://127.0.0.1:{cls.servidor.server_address[1]}'
+        threading.Thread(target=cls.servidor.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.servidor.shutdown()
+        cls.servidor.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        super().setUp()
+        pasta = tempfile.TemporaryDirectory()
+        self.addCleanup(pasta.cleanup)
+        midia = override_settings(MEDIA_ROOT=pasta.name)
+        midia.enable()
+        self.addCleanup(midia.disable)
+        StubFotosHandler.imagens = {'/ana.png': imagem_png('red')}
+        StubFotosHandler.etags = {}
+        StubFotosHandler.requisicoes = []
+        StubFotosHandler.nao_modificadas = 0
+        self.politico.foto_url = f'{self.url_base}/ana.png'
+        self.politico.save()
+
+    def espelhar(self, **opcoes):
+        saida = StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('espelhar_fotos_politicos', workers=1, stdout=saida, **opcoes)
+        self.politico.refresh_from_db()
+        return saida.getvalue()
+
+    def arquivos(self):
+        return sorted(default_storage.listdir('politicos')[1])
+
+    def test_inalterada_e_alterada(self):
+        self.assertIn('Fotos atualizadas: 1', self.espelhar())
+        primeira = self.politico.foto.name
+        self.assertTrue(self.politico.foto_checksum)
+        self.assertEqual(Image.open(self.politico.foto.path).size, (256, 256))
+
+        self.assertIn('Fotos sem alterações: 1', self.espelhar())
+        self.assertEqual(self.politico.foto.name, primeira)
+
+        StubFotosHandler.imagens['/ana.png'] = imagem_png('blue')
+        self.assertIn('Fotos atualizadas: 1', self.espelhar())
+        self.assertNotEqual(self.politico.foto.name, primeira)
+        self.assertEqual(self.arquivos(), [os.path.basename(self.politico.foto.name)])
+
+    def test_revalida_com_etag(self):
+        # Sem ETag na origem o checksum só poupa a miniatura; o validador novo é guardado
+        self.espelhar()
+        primeira = self.politico.foto.name
+        StubFotosHandler.etags['/ana.png'] = '"v1"'
+        self.assertIn('Fotos sem alterações: 1', self.espelhar())
+        self.assertEqual(self.politico.foto_validadores['etag'], '"v1"')
+        self.assertEqual(self.politico.foto.name, primeira)
+
+        self.assertIn('Fotos sem alterações: 1', self.espelhar())
+        self.assertEqual(StubFotosHandler.nao_modificadas, 1)
+
+        StubFotosHandler.imagens['/ana.png'] = imagem_png('blue')
+        StubFotosHandler.etags['/ana.png'] = '"v2"'
+        self.assertIn('Fotos atualizadas: 1', self.espelhar())
+        self.assertEqual(self.politico.foto_validadores['etag'], '"v2"')
+
+        # Outra URL não herda os validadores da anterior
+        StubFotosHandler.imagens['/ana2.png'] = imagem_png('green')
+        StubFotosHandler.etags['/ana2.png'] = '"v2"'
+        self.politico.foto_url = f'{self.url_base}/ana2.png'
+        self.politico.save()
+        self.assertIn('Fotos atualizadas: 1', self.espelhar())
+        self.assertEqual(StubFotosHandler.nao_modificadas, 1)
+
+    def test_preserva_foto_enviada_manualmente(self):
+        self.politico.foto.save('manual.png', ContentFile(imagem_png('green')))
+
+        self.assertIn('Fotos enviadas manualmente (mantidas): 1', self.espelhar())
+        self.assertEqual(self.politico.foto.name, 'politicos/manual.png')
+        self.assertEqual(StubFotosHandler.requisicoes, [])
+
+        self.assertIn('Fotos atualizadas: 1', self.espelhar(forcar=True))
+        self.assertNotEqual(self.politico.foto.name, 'politicos/manual.png')
+        self.assertNotIn('manual.png', self.arquivos())
+
+    def test_falha_ao_gravar_mantem_os_arquivos_antigos(self):
+        self.espelhar()
+        antiga = self.politico.foto.name
+        StubFotosHandler.imagens['/ana.png'] = imagem_png('blue')
+
+        with mock.patch.object(type(Politico.objects), 'bulk_update', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                self.espelhar()
+        self.assertEqual(self.politico.foto.name, antiga)
+        self.assertEqual(self.arquivos(), [os.path.basename(antiga)])
+
+
+class ContadoresAvaliacaoTests(PoliticosMixin, TestCase):
+    """Os contadores mantidos por diferença (core.signals) batem com o recálculo completo"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.segundo = criar_usuario('segundo', '11144477735')
+        Nota.objects.create(politico=cls.politico, periodo_ref='2026-01-01', nota_ia=Decimal('6'))
+
+    def contadores(self, politico):
+        return Politico.objects.filter(pk=politico.pk).values_list(
+            'soma_avaliacoes', 'total_avaliacoes', 'media_usuarios', 'pontuacao_final',
+        ).get()
+
+    def assertContadores(self, politico, soma, total, media):
+        incremental = self.contadores(politico)
+        self.assertEqual(incremental[:3], (soma, total, None if media is None else Decimal(media)))
+        # O recálculo completo não encontra nada a corrigir
+        self.assertEqual(recalcular_todas(), 0)
+        self.assertEqual(self.contadores(politico), incremental)
+
+    def test_criar_alterar_trocar_de_politico_e_remover(self):
+        AvaliacaoUsuario.objects.create(politico=self.politico, usuario=self.usuario, nota=8)
+        AvaliacaoUsuario.objects.create(politico=self.politico, usuario=self.segundo, nota=3)
+        self.assertContadores(self.politico, 11, 2, '5.50')
+        self.assertEqual(self.contadores(self.politico)[3], Decimal('5.75'))
+
+        avaliacao = AvaliacaoUsuario.objects.get(usuario=self.usuario)
+        avaliacao.nota = 10
+        avaliacao.save()
+        self.assertContadores(self.politico, 13, 2, '6.50')
+
+        # Salvar de novo sem mudar a nota não soma a diferença duas vezes
+        avaliacao.save()
+        self.assertContadores(self.politico, 13, 2, '6.50')
+
+        avaliacao.politico = self.outro
+        avaliacao.save()
+        self.assertContadores(self.politico, 3, 1, '3.00')
+        self.assertContadores(self.outro, 10, 1, '10.00')
+
+        # Carregada do banco depois da troca: _politico_original é o novo político
+        avaliacao = AvaliacaoUsuario.objects.get(pk=avaliacao.pk)
+        avaliacao.delete()
+        self.assertContadores(self.outro, 0, 0, None)
+        self.assertContadores(self.politico, 3, 1, '3.00')
+
+    def test_instancia_montada_fora_do_orm_recalcula(self):
+        avaliacao = AvaliacaoUsuario.objects.create(politico=self.politico, usuario=self.usuario, nota=8)
+        AvaliacaoUsuario(
+            pk=avaliacao.pk, politico=self.politico, usuario=self.usuario, nota=2, criado_em=avaliacao.criado_em,
+        ).save()
+        self.assertContadores(self.politico, 2, 1, '2.00')
+
+    def test_update_or_create_da_view(self):
+        for nota in (7, 9):
+            AvaliacaoUsuario.objects.update_or_create(
+                politico=self.politico, usuario=self.usuario, defaults={'nota': nota},
+            )
+            self.assertContadores(self.politico, nota, 1, f'{nota}.00')
+
+
+class ProcessarVotosTests(PoliticosMixin, TestCase):
+    def test_aplica_ultimo_voto_e_atualiza_contadores(self):
+        outra = criar_usuario('bia', '11144477735')
+        AvaliacaoUsuario.objects.create(politico=self.politico, usuario=self.usuario, nota=2)
+        enfileirar_voto(self.politico, self.usuario, 5)
+        enfileirar_voto(self.politico, self.usuario, 9)
+        enfileirar_voto(self.politico, outra, 6)
+
+        self.assertEqual(processar_lote(), 3)
+
+        self.assertFalse(VotoPendente.objects.exists())
+        self.assertEqual(AvaliacaoUsuario.objects.get(usuario=self.usuario).nota, 9)
+        self.politico.refresh_from_db()
+        self.assertEqual(self.politico.soma_avaliacoes, 15)
+        self.assertEqual(self.politico.total_avaliacoes, 2)
+        self.assertEqual(str(self.politico.media_usuarios), '7.50')
+
+    def test_par_em_dois_lotes_fica_com_o_voto_mais_antigo(self):
+        outra = criar_usuario('bia', '11144477735')
+        primeiro = enfileirar_voto(self.politico, self.usuario, 5)
+        segundo = enfileirar_voto(self.politico, outra, 6)
+        terceiro = enfileirar_voto(self.politico, self.usuario, 9)
+
+        # Outro worker travou o primeiro voto; este só vê os dois seguintes
+        with transaction.atomic():
+            self.assertEqual(aplicar_votos([segundo, terceiro]), {self.politico.id})
+        self.assertTrue(terceiro.adiado)
+        self.assertFalse(AvaliacaoUsuario.objects.filter(usuario=self.usuario).exists())
+        self.assertEqual(set(VotoPendente.objects.values_list('id', flat=True)), {primeiro.id, terceiro.id})
+
+        with transaction.atomic():
+            aplicar_votos([primeiro])
+        self.assertEqual(processar_lote(), 1)
+        self.assertEqual(AvaliacaoUsuario.objects.get(usuario=self.usuario).nota, 9)
+        self.politico.refresh_from_db()
+        self.assertEqual((self.politico.soma_avaliacoes, self.politico.total_avaliacoes), (15, 2))
+
+    def test_comentario_novo_com_mesma_nota_descarta_o_perfil(self):
+        AvaliacaoUsuario.objects.create(
+            politico=self.politico, usuario=self.usuario, nota=7, comentario='Antigo', moderacao='APROVADO',
+        )
+        self.assertEqual(obter_comentarios(self.politico.id)[0][0]['comentario'], 'Antigo')
+
+        enfileirar_voto(self.politico, self.usuario, 7, 'Novo')
+        with self.captureOnCommitCallbacks(execute=True):
+            processar_lote()
+        self.assertEqual(AvaliacaoUsuario.objects.get().moderacao, 'PENDENTE')
+        self.assertEqual(obter_comentarios(self.politico.id)[0], [])
+
+
+class RankingCacheTests(PoliticosMixin, TestCase):
+    """Escritas invalidam o ranking guardado num cache comum a vários processos"""
+
+    def setUp(self):
+        pasta = tempfile.TemporaryDirectory()
+        self.addCleanup(pasta.cleanup)
+        compartilhado = override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': pasta.name,
+        }})
+        compartilhado.enable()
+        self.addCleanup(compartilhado.disable)
+        super().setUp()
+
+    def assertRecalcula(self, esperado):
+        calculos = []
+        obter_ranking({'uf': 'SP'}, lambda: calculos.append(1) or ['ranking'])
+        self.assertEqual(len(calculos), int(esperado))
+
+    def test_voto_nota_e_recalculo_trocam_a_versao(self):
+        escritas = [
+            ('voto', lambda: AvaliacaoUsuario.objects.create(politico=self.politico, usuario=self.usuario, nota=8)),
+            ('nota', lambda: Nota.objects.create(politico=self.politico, periodo_ref='2026-01-01', nota_ia=6)),
+            ('recalculo', lambda: (Politico.objects.update(pontuacao_final=9), recalcular_todas())),
+        ]
+        self.assertRecalcula(True)
+        self.assertRecalcula(False)
+        for nome, escrever in escritas:
+            with self.subTest(escrita=nome):
+                versao = versao_ranking()
+                with self.captureOnCommitCallbacks(execute=True):
+                    escrever()
+                    # Antes do commit um leitor ainda usa a versão antiga, com os dados antigos
+                    self.assertEqual(versao_ranking(), versao)
+                self.assertNotEqual(versao_ranking(), versao)
+                self.assertRecalcula(True)
+                self.assertRecalcula(False)
+
+
+class TendenciasTests(PoliticosMixin, TestCase):
+    def test_tendencia_compara_com_fotografia_anterior(self):
+        hoje = datetime.date(2026, 3, 31)
+        politico = self.politico
+        HistoricoPontuacao.objects.create(politico=politico, data=hoje - timedelta(days=40), pontuacao_final=Decimal('5.00'))
+        HistoricoPontuacao.objects.create(politico=politico, data=hoje - timedelta(days=10), pontuacao_final=Decimal('6.50'))
+        Politico.objects.filter(pk=politico.pk).update(pontuacao_final=Decimal('7.25'))
+
+        # Um político por lote: cada lote lê só as suas fotografias e grava
+        # na própria transação (SELECT, SAVEPOINT, INSERT, RELEASE)
+        with self.assertNumQueries(1 + 2 * 4):
+            self.assertEqual(registrar_historico(hoje, batch_size=1), (2, 0))
+        self.assertEqual(registrar_historico(hoje), (0, 0))
+        self.assertEqual(atualizar_tendencias(hoje, batch_size=1), 1)
+
+        politico.refresh_from_db()
+        self.assertEqual(politico.tendencia_7d, Decimal('0.75'))
+        self.assertEqual(politico.tendencia_30d, Decimal('2.25'))
+        self.assertEqual(politico.tendencia_90d, Decimal('0.00'))
+
+        Politico.objects.filter(pk=politico.pk).update(pontuacao_final=Decimal('7.50'))
+        self.assertEqual(registrar_historico(hoje, batch_size=1), (0, 1))
+        self.assertEqual(HistoricoPontuacao.objects.get(politico=politico, data=hoje).pontuacao_final, Decimal('7.50'))
+
+
+class RecalcularPeriodoTests(PoliticosMixin, TestCase):
+    def test_aplica_pesos_e_grava_notas(self):
+        periodo = datetime.date(2026, 1, 1)
+        Nota.objects.create(
+            politico=self.politico, periodo_ref=periodo,
+            nota_dados_oficiais=Decimal('8.00'), sentimento_noticias=Decimal('4.00'),
+        )
+
+        pesos = {'ia': 1, 'usuario': 1, 'dados_oficiais': 3, 'noticias': 1}
+        with override_settings(IIP_PESOS=pesos):
+            self.assertEqual(recalcular_periodo(periodo), (0, 1))
+            self.assertEqual(recalcular_periodo(periodo), (0, 0))
+
+        nota = Nota.objects.get(politico=self.politico)
+        self.assertEqual(nota.nota_ia, Decimal('7.00'))
+        self.assertIsNone(nota.nota_usuario)
+        self.assertEqual(nota.nota_final, Decimal('7.00'))
+        self.politico.refresh_from_db()
+        self.assertEqual(self.politico.pontuacao_final, Decimal('7.00'))
+        self.assertFalse(Nota.objects.filter(politico=self.outro).exists())
+
+
+class ProcessarNoticiasTests(TestCase):
+    def test_deduplica_encontra_mencoes_e_agrega_sentimento(self):
+        politico = Politico.objects.create(nome='João da Silva', slug='joao-da-silva')
+        texto = (
+            'O deputado Joao da Silva foi condenado por corrupcao e fraude em licitacao '
+            'segundo a denuncia apresentada ontem pelo ministerio publico federal em brasilia'
+        )
+        noticias = [
+            {'titulo': 'Deputado condenado', 'texto': texto, 'publicada_em': '2026-02-10T12:00:00'},
+            {'titulo': 'Deputado condenado', 'texto': texto, 'publicada_em': '2026-02-10T12:00:00'},
+            {'titulo': 'Deputado condenado!', 'texto': texto + ' nesta terca', 'publicada_em': '2026-02-10'},
+            {'titulo': 'Chuva forte', 'texto': 'Previsao de chuva para o fim de semana', 'data': '2026-02-11'},
+        ]
+        with tempfile.TemporaryDirectory() as pasta:
+            caminho = os.path.join(pasta, 'noticias.jsonl')
+            with open(caminho, 'w', encoding='utf-8') as arquivo:
+                for noticia in noticias:
+                    arquivo.write(json.dumps(noticia) + '\n')
+                arquivo.write('{quebrado\n')
+            saida = StringIO()
+            call_command('processar_noticias', caminho, stdout=saida)
+
+        self.assertIn('Duplicatas exatas: 1', saida.getvalue())
+        self.assertIn('Quase-duplicatas: 1', saida.getvalue())
+        self.assertIn('Inválidas: 1', saida.getvalue())
+        self.assertEqual(Noticia.objects.count(), 1)
+        mencao = Mencao.objects.get()
+        self.assertEqual(mencao.politico, politico)
+        self.assertLess(mencao.sentimento, 5)
+
+        nota = Nota.objects.get(politico=politico, periodo_ref=datetime.date(2026, 2, 1))
+        self.assertEqual(nota.sentimento_noticias, mencao.sentimento)
+        self.assertEqual(nota.nota_ia, mencao.sentimento)
+
+    def test_hashes_exatos_ficam_em_duas_geracoes(self):
+        hashes = HashesRecentes(limite=2)
+        for valor in 'abcde':
+            hashes.adicionar(valor)
+        self.assertEqual([valor in hashes for valor in 'abcde'], [False, False, True, True, True])
+
+        # As gravadas continuam sendo achadas pelo banco depois de saírem da memória
+        Politico.objects.create(nome='João da Silva', slug='joao-da-silva')
+        noticia = {'titulo': 'Joao da Silva', 'texto': 'O deputado Joao da Silva votou hoje em brasilia'}
+        pipeline = PipelineNoticias(IndiceEntidades.construir(), carregar_analisador(), lsh=IndiceLSH(limite=1))
+        pipeline.processar([noticia])
+        pipeline._hashes_vistos = HashesRecentes()
+        resultado = pipeline.processar([noticia])
+        self.assertEqual((resultado.gravadas, resultado.duplicadas_exatas), (1, 1))
+
+
+class IndiceEntidadesTests(TestCase):
+    def setUp(self):
+        pt = Partido.objects.create(sigla='PT', nome='Partido dos Trabalhadores')
+        pl = Partido.objects.create(sigla='PL', nome='Partido Liberal')
+        self.lula = Politico.objects.create(nome='Luiz Inácio Lula da Silva', slug='lula', partido=pt, uf='SP')
+        self.carlos_sp = Politico.objects.create(nome='Carlos Alberto Souza', slug='carlos-sp', partido=pt, uf='SP')
+        self.carlos_rj = Politico.objects.create(nome='Carlos Eduardo Souza', slug='carlos-rj', partido=pl, uf='RJ')
+        AliasPolitico.objects.create(politico=self.lula, alias='Lula')
+
+    def test_vincula_apelido_variante_e_desempata_pelo_contexto(self):
+        indice = IndiceEntidades.construir()
+        texto = 'Lula (PT-SP) recebeu Carlos Souza; depois falou Luiz Inácio Lula da Silva.'
+        vinculos = indice.vincular(texto)
+        self.assertEqual(
+            [(vinculo.politico_id, vinculo.termo) for vinculo in vinculos],
+            [
+                (self.lula.id, 'lula'),
+                (self.carlos_sp.id, 'carlos souza'),
+                (self.lula.id, 'luiz inacio lula da silva'),
+            ],
+        )
+        # Sem contexto, "Carlos Souza" é ambíguo e fica de fora
+        self.assertEqual(indice.vincular('Carlos Souza discursou'), [])
+        self.assertEqual(indice.vincular('Carlos Souza discursou', uf='RJ')[0].politico_id, self.carlos_rj.id)
+
+    def test_pickle_e_recarregado_ate_o_banco_mudar(self):
+        with tempfile.TemporaryDirectory() as pasta:
+            caminho = os.path.join(pasta, 'indice.pickle')
+            IndiceEntidades.carregar_ou_construir(caminho)
+            indice = IndiceEntidades.carregar(caminho)
+            self.assertIsNotNone(indice)
+            self.assertEqual(indice.vincular('lula')[0].politico_id, self.lula.id)
+
+            Politico.objects.create(nome='Fulano de Tal', slug='fulano-de-tal')
+            self.assertIsNone(IndiceEntidades.carregar(caminho))
+
+
+class BuscaTests(TestCase):
+    def test_busca_ignora_acentos_e_encontra_sobrenome(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Politico.objects.create(nome='José Antônio Araújo', slug='jose-antonio-araujo')
+            Politico.objects.create(nome='Joana Prado', slug='joana-prado')
+
+        resposta = self.client.get('/buscar/', {'q': 'ARAUJO'})
+        self.assertEqual([r['nome'] for r in resposta.json()['resultados']], ['José Antônio Araújo'])
+
+        resposta = self.client.get('/buscar/', {'q': 'jo'})
+        self.assertEqual(len(resposta.json()['resultados']), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Politico.objects.create(nome='Araújo Neto', slug='araujo-neto')
+        resposta = self.client.get('/buscar/', {'q': 'araujo'})
+        self.assertEqual([r['nome'] for r in resposta.json()['resultados']], ['Araújo Neto', 'José Antônio Araújo'])
+
+    def test_ordena_todos_os_candidatos_antes_de_cortar(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(60):
+                Politico.objects.create(nome=f'Alfa {i:02d}', slug=f'alfa-{i}', pontuacao_final=Decimal('1'))
+            Politico.objects.create(nome='Alvaro Souza', slug='alvaro-souza', pontuacao_final=Decimal('9'))
+            Politico.objects.create(nome='Bruno Almeida', slug='bruno-almeida', pontuacao_final=Decimal('10'))
+
+        nomes = [r['nome'] for r in buscar_politicos('al', limite=3)]
+        self.assertEqual(nomes, ['Alvaro Souza', 'Alfa 00', 'Alfa 01'])
+        self.assertEqual(buscar_politicos('almeida')[0]['nome'], 'Bruno Almeida')
+
+        # A pontuação fica no índice: com ele montado, só as linhas escolhidas são lidas
+        alfa = Politico.objects.get(slug='alfa-42')
+        alfa.pontuacao_final = Decimal('5')
+        with self.captureOnCommitCallbacks(execute=True):
+            alfa.save()
+        with self.assertNumQueries(1):
+            nomes = [r['nome'] for r in buscar_politicos('al', limite=3)]
+        self.assertEqual(nomes, ['Alvaro Souza', 'Alfa 42', 'Alfa 00'])
+
+    @skipUnless(connection.vendor != 'postgresql', 'índice em memória só é usado fora do PostgreSQL')
+    def test_salvar_atualiza_so_a_linha_no_indice(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            ana = Politico.objects.create(nome='Ana Lima', slug='ana-lima')
+            bruno = Politico.objects.create(nome='Bruno Reis', slug='bruno-reis')
+        self.assertEqual(len(buscar_politicos('lima')), 1)
+
+        with mock.patch('core.busca.IndicePrefixos', wraps=IndicePrefixos) as construir:
+            with self.captureOnCommitCallbacks(execute=True):
+                ana.nome = 'Ana Paula Souza'
+                ana.save()
+                bruno.delete()
+                Politico.objects.create(nome='Carla Lima', slug='carla-lima')
+            self.assertEqual([r['nome'] for r in buscar_politicos('lima')], ['Carla Lima'])
+            self.assertEqual([r['nome'] for r in buscar_politicos('paula')], ['Ana Paula Souza'])
+            self.assertEqual(buscar_politicos('reis'), [])
+        construir.assert_not_called()
+
+    @skipUnless(connection.vendor == 'postgresql', 'busca por trigramas exige PostgreSQL (pg_trgm)')
+    def test_trigramas_no_postgres(self):
+        Politico.objects.create(nome='José Antônio Araújo', slug='jose-antonio-araujo')
+        Politico.objects.create(nome='Araújo Neto', slug='araujo-neto')
+        Politico.objects.create(nome='Joana Prado', slug='joana-prado')
+
+        # Termo no meio do nome, sem acento: LIKE '%x%' servido pelo índice GIN
+        self.assertEqual([r['nome'] for r in buscar_politicos('tonio')], ['José Antônio Araújo'])
+        # Mais parecido primeiro (similarity)
+        self.assertEqual(
+            [r['nome'] for r in buscar_politicos('ARAUJO')], ['Araújo Neto', 'José Antônio Araújo'],
+        )
+        self.assertEqual([r['nome'] for r in buscar_politicos('jo')], ['Joana Prado', 'José Antônio Araújo'])
+
+
+class TopPorPoderTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for poder in PODERES:
+            cargo = Cargo.objects.create(nome=poder.title(), poder=poder, nivel='FEDERAL')
+            # Criados fora da ordem do ranking, com empates de pontuação
+            for i in (3, 7, 1, 12, 5, 9, 0, 11, 4, 8, 2, 10, 6):
+                Politico.objects.create(
+                    nome=f'{poder.title()} {i:02d}', slug=f'{poder.lower()}-{i}', cargo=cargo,
+                    pontuacao_final=Decimal(i % 5), total_avaliacoes=i % 3, tendencia_30d=Decimal(i % 4),
+                )
+
+    def test_ordem_dentro_de_cada_poder(self):
+        estrategias = [
+            estrategia for estrategia in ESTRATEGIAS
+            if estrategia != 'uniao' or connection.features.supports_slicing_ordering_in_compound
+        ]
+        for estrategia in estrategias:
+            for ordenacao, campos in ORDENACOES.items():
+                with self.subTest(estrategia=estrategia, ordenacao=ordenacao):
+                    ranking = top_por_poder(ordenacao=ordenacao, estrategia=estrategia)
+                    for poder in PODERES:
+                        esperado = list(
+                            Politico.objects.filter(cargo__poder=poder).order_by(*campos, 'nome')
+                            .values_list('slug', flat=True)[:10]
+                        )
+                        self.assertEqual([politico.slug for politico in ranking[poder]], esperado)
+
+
+class RankingPaginadoTests(TestCase):
+    def setUp(self):
+        deputado = Cargo.objects.create(nome='Deputado Federal', poder='LEGISLATIVO', nivel='FEDERAL')
+        senador = Cargo.objects.create(nome='Senador', poder='LEGISLATIVO', nivel='FEDERAL')
+        prefeito = Cargo.objects.create(nome='Prefeito', poder='EXECUTIVO', nivel='MUNICIPAL')
+        # Dois cargos no mesmo Poder e empates de pontuação e de nome para exercitar todas as colunas da chave
+        for i in range(23):
+            Politico.objects.create(
+                nome=f'Deputado {i % 7}', slug=f'deputado-{i}', cargo=deputado if i % 3 else senador,
+                pontuacao_final=Decimal(i % 4),
+            )
+        Politico.objects.create(nome='Prefeita', slug='prefeita', cargo=prefeito)
+
+    def test_percorre_todas_as_paginas_sem_repetir(self):
+        esperado = list(
+            Politico.objects.filter(cargo__poder='LEGISLATIVO')
+            .order_by('-pontuacao_final', 'nome', 'id').values_list('slug', flat=True)
+        )
+        vistos = []
+        posicoes = []
+        cursor = ''
+        while True:
+            resposta = self.client.get('/api/ranking/legislativo/', {'tamanho': 5, 'cursor': cursor}).json()
+            vistos += [politico['slug'] for politico in resposta['resultados']]
+            posicoes += [politico['posicao'] for politico in resposta['resultados']]
+            cursor = resposta['proximo']
+            if not cursor:
+                break
+        self.assertEqual(vistos, esperado)
+        self.assertEqual(posicoes, list(range(1, len(esperado) + 1)))
+
+    def test_cursor_invalido(self):
+        self.assertEqual(self.client.get('/api/ranking/legislativo/', {'cursor': 'xyz'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/ranking/moderador/').status_code, 404)
+        self.assertEqual(self.client.get('/ranking/executivo/').status_code, 200)
+
+
+class APITests(PoliticosMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        Nota.objects.create(politico=cls.politico, periodo_ref='2026-01-01', nota_ia=Decimal('7.5'))
+
+    def test_etag_e_resposta_304(self):
+        url = '/api/v1/politicos/ana-lima/'
+        resposta = self.client.get(url)
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(resposta.json()['nota_ia'], 7.5)
+        etag = resposta['ETag']
+
+        with self.assertNumQueries(0):
+            resposta = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resposta.status_code, 304)
+
+        # Mudança de nota troca a versão (no commit) e, com ela, o ETag
+        with self.captureOnCommitCallbacks(execute=True):
+            Nota.objects.create(politico=self.politico, periodo_ref='2026-02-01', nota_ia=9)
+        resposta = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resposta.status_code, 200)
+        self.assertNotEqual(resposta['ETag'], etag)
+
+    def test_endpoints(self):
+        lista = self.client.get('/api/v1/politicos/', {'tamanho': 1}).json()
+        self.assertEqual([p['slug'] for p in lista['resultados']], ['ana-lima'])
+        self.assertEqual(self.client.get(lista['proximo']).json()['resultados'][0]['slug'], 'bruno-reis')
+
+        notas = self.client.get('/api/v1/politicos/ana-lima/notas/').json()['resultados']
+        self.assertEqual(notas[0]['periodo_ref'], '2026-01-01')
+
+        avaliacoes = self.client.get('/api/v1/politicos/ana-lima/avaliacoes/').json()
+        self.assertEqual(avaliacoes['total_avaliacoes'], 0)
+        self.assertEqual(len(avaliacoes['distribuicao']), 11)
+
+        ranking = self.client.get('/api/v1/ranking/legislativo/', {'tamanho': 1}).json()
+        self.assertEqual(ranking['resultados'][0]['posicao'], 1)
+        self.assertEqual(self.client.get(ranking['proximo']).json()['resultados'][0]['posicao'], 2)
+
+        self.assertEqual(self.client.get('/api/v1/ranking/legislativo/', {'cursor': 'xyz'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/v1/politicos/inexistente/').status_code, 404)
+
+    def test_distribuicao_em_cache_por_politico(self):
+        url = '/api/v1/politicos/ana-lima/avaliacoes/'
+        outro_usuario = criar_usuario('outro', '11144477735')
+        with self.captureOnCommitCallbacks(execute=True):
+            AvaliacaoUsuario.objects.create(politico=self.politico, usuario=self.usuario, nota=8)
+        self.assertEqual(self.client.get(url).json()['distribuicao']['8'], 1)
+
+        # Voto em outro político troca o ETag, mas a contagem dela continua no cache
+        etag = self.client.get(url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            AvaliacaoUsuario.objects.create(politico=self.outro, usuario=outro_usuario, nota=2)
+        with self.assertNumQueries(1):
+            resposta = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(resposta.json()['distribuicao']['2'], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            AvaliacaoUsuario.objects.create(politico=self.politico, usuario=outro_usuario, nota=3)
+        avaliacoes = self.client.get(url).json()
+        self.assertEqual(avaliacoes['total_avaliacoes'], 2)
+        self.assertEqual((avaliacoes['distribuicao']['3'], avaliacoes['distribuicao']['8']), (1, 1))
+
+    def test_foto_com_url_absoluta(self):
+        Politico.objects.filter(pk=self.politico.pk).update(foto='politicos/ana.jpg')
+        Politico.objects.filter(pk=self.outro.pk).update(foto_url='https://example.org/bruno.jpg')
+        self.assertEqual(
+            self.client.get('/api/v1/politicos/ana-lima/').json()['foto'],
+            f'http://testserver{settings.MEDIA_URL}politicos/ana.jpg',
+        )
+        self.assertEqual(self.client.get('/api/v1/politicos/bruno-reis/').json()['foto'], 'https://example.org/bruno.jpg')
+
+
+class OrcamentoConsultasTests(TestCase):
+    """Cada página tem um número máximo de consultas, independente do número de políticos"""
+
+    @classmethod
+    def setUpTestData(cls):
+        partido = Partido.objects.create(sigla='PX', nome='Partido X')
+        for poder in ('EXECUTIVO', 'LEGISLATIVO', 'JUDICIARIO'):
+            cargo = Cargo.objects.create(nome=poder.title(), poder=poder, nivel='FEDERAL')
+            for i in range(12):
+                Politico.objects.create(
+                    nome=f'{poder.title()} {i}', slug=f'{poder.lower()}-{i}', cargo=cargo, partido=partido,
+                )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_paginas_dentro_do_orcamento(self):
+        orcamentos = [
+            ('/', 6),
+            ('/politico/executivo-1/', 1),
+            ('/ranking/legislativo/', 2),
+            ('/api/v1/ranking/legislativo/', 2),
+            ('/buscar/?q=le', 2),
+        ]
+        for url, maximo in orcamentos:
+            with self.subTest(url=url), orcamento_consultas(maximo, url):
+                self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_voto_sincrono_dentro_do_orcamento(self):
+        self.client.force_login(criar_usuario('eleitor', '52998224725'))
+        self.client.get('/')
+        for nota in (7, 9):
+            with self.subTest(nota=nota), orcamento_consultas(settings.IIP_ORCAMENTO_CONSULTAS):
+                resposta = self.client.post('/politico/executivo-1/avaliar/', {'nota': nota})
+            self.assertEqual(resposta.status_code, 200)
+            self.assertEqual(resposta.json()['media_usuarios'], nota)
+            self.assertEqual(resposta.json()['total_avaliacoes'], 1)
+            # Libera o revoto: a próxima volta percorre o caminho de atualização
+            AvaliacaoUsuario.objects.update(votado_em=timezone.now() - timedelta(days=60))
+            cache.clear()
+
+    def test_orcamento_detecta_n_mais_1(self):
+        with self.assertRaisesMessage(AssertionError, 'orçamento: 2'):
+            with orcamento_consultas(2):
+                [politico.partido.sigla for politico in Politico.objects.all()]
+
+    def test_cabecalhos_do_middleware(self):
+        with self.settings(IIP_PERFIL_CONSULTAS=True):
+            resposta = self.client.get('/politico/executivo-1/')
+        self.assertEqual(resposta['X-DB-Consultas'], '1')
+        self.assertIn('X-DB-Tempo-ms', resposta)
+        with self.settings(IIP_PERFIL_CONSULTAS=False):
+            self.assertNotIn('X-DB-Consultas', self.client.get('/politico/executivo-1/'))
+
+
+class IndicesTests(PoliticosMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        Nota.objects.create(politico=cls.politico, periodo_ref='2026-01-01', nota_ia=7)
+
+    def test_um_voto_por_usuario(self):
+        AvaliacaoUsuario.objects.create(politico=self.politico, usuario=self.usuario, nota=5)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            AvaliacaoUsuario.objects.create(politico=self.politico, usuario=self.usuario, nota=7)
+        # Votos sem usuário (ex.: conta removida) não entram na restrição
+        AvaliacaoUsuario.objects.create(politico=self.politico, nota=3)
+        AvaliacaoUsuario.objects.create(politico=self.politico, nota=4)
+
+    @skipUnless(connection.vendor == 'postgresql', 'Planos de execução verificados só no PostgreSQL')
+    def test_planos_usam_os_indices(self):
+        with connection.cursor() as cursor:
+            # Com tabelas minúsculas o planejador preferiria ler a tabela inteira
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        consultas = [
+            (
+                filtrar_politicos(Politico.objects.all(), uf='SP').order_by('-pontuacao_final', 'nome')[:10],
+                'core_politico_uf_idx',
+            ),
+            (
+                filtrar_politicos(Politico.objects.all(), esfera='FEDERAL').order_by('-pontuacao_final', 'nome')[:10],
+                'core_politico_esfera_idx',
+            ),
+            (
+                Politico.objects.filter(partido_id=1).order_by('-pontuacao_final', 'nome')[:10],
+                'core_politico_partido_idx',
+            ),
+            (
+                Nota.objects.filter(politico=self.politico).order_by('-periodo_ref').values('nota_ia')[:1],
+                'core_nota_recente_idx',
+            ),
+            (
+                AvaliacaoUsuario.objects.filter(politico=self.politico, usuario=self.usuario),
+                'core_avaliacao_unica_por_usuario',
+            ),
+        ]
+        for queryset, indice in consultas:
+            with self.subTest(indice=indice):
+                self.assertIn(indice, queryset.explain())
+
+
+class PerfilCacheTests(PoliticosMixin, TestCase):
+    def _aquecer(self, url):
+        # A primeira visita descobre o id; a segunda grava com as versões
+        self.client.get(url)
+        self.client.get(url)
+
+    def test_perfil_quente_sem_consultas(self):
+        self._aquecer('/politico/ana-lima/')
+        with self.assertNumQueries(0):
+            resposta = self.client.get('/politico/ana-lima/')
+        self.assertContains(resposta, 'PX - Partido X')
+
+        # Voto em outro político não descarta o perfil
+        self._aquecer('/politico/bruno-reis/')
+        AvaliacaoUsuario.objects.create(politico=self.outro, usuario=self.usuario, nota=9)
+        with self.assertNumQueries(0):
+            self.client.get('/politico/ana-lima/')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            AvaliacaoUsuario.objects.create(politico=self.politico, usuario=self.usuario, nota=8)
+            # Antes do commit o perfil anterior continua valendo
+            with self.assertNumQueries(0):
+                self.client.get('/politico/ana-lima/')
+        with self.assertNumQueries(1):
+            resposta = self.client.get('/politico/ana-lima/')
+        self.assertEqual(resposta.context['total_avaliacoes'], 1)
+
+    def test_voto_do_usuario_fora_do_cache(self):
+        self._aquecer('/politico/ana-lima/')
+        AvaliacaoUsuario.objects.create(politico=self.outro, usuario=self.usuario, nota=9)
+        self.client.force_login(self.usuario)
+        self.assertIsNone(self.client.get('/politico/ana-lima/').context['avaliacao_usuario'])
+        self.assertEqual(self.client.get('/politico/bruno-reis/').context['avaliacao_usuario'].nota, 9)
+
+    def test_partido_alterado_descarta_todos(self):
+        self._aquecer('/politico/ana-lima/')
+        self.partido.nome = 'Partido Renomeado'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.partido.save()
+        self.assertContains(self.client.get('/politico/ana-lima/'), 'PX - Partido Renomeado')
+
+
+class ReferenciasTests(PoliticosMixin, TestCase):
+    """Opções dos filtros servidas da memória e recarregadas quando mudam"""
+
+    def test_pagina_inicial_quente_sem_consultas(self):
+        self.client.get('/')
+        with self.assertNumQueries(0):
+            resposta = self.client.get('/')
+        self.assertEqual([p.sigla for p in resposta.context['partidos']], ['PX'])
+        self.assertEqual(resposta.context['ufs'], ['RJ', 'SP'])
+
+    def test_partido_e_cargo_novos_ou_renomeados(self):
+        opcoes_filtros()
+        with self.captureOnCommitCallbacks(execute=True):
+            Partido.objects.create(sigla='PY', nome='Partido Y')
+            Cargo.objects.create(nome='Deputado', poder='LEGISLATIVO', nivel='FEDERAL')
+        opcoes = opcoes_filtros()
+        self.assertEqual([p.sigla for p in opcoes['partidos']], ['PX', 'PY'])
+        self.assertEqual([c.nome for c in opcoes['cargos']], ['Deputado', 'Senador'])
+
+        self.partido.nome = 'Partido Renomeado'
+        self.cargo.nome = 'Senadora'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.partido.save()
+            self.cargo.save()
+        opcoes = opcoes_filtros()
+        self.assertEqual(opcoes['partidos'][0].nome, 'Partido Renomeado')
+        self.assertEqual([c.nome for c in opcoes['cargos']], ['Deputado', 'Senadora'])
+
+    def test_mudanca_de_uf_atualiza_a_lista(self):
+        self.assertEqual(opcoes_filtros()['ufs'], ['RJ', 'SP'])
+        politico = Politico.objects.get(pk=self.politico.pk)
+        politico.uf = 'RJ'
+        with self.captureOnCommitCallbacks(execute=True):
+            politico.save()
+        # SP ficou sem políticos
+        self.assertEqual(opcoes_filtros()['ufs'], ['RJ'])
+
+        politico.uf = 'MG'
+        with self.captureOnCommitCallbacks(execute=True):
+            politico.save()
+        self.assertEqual(opcoes_filtros()['ufs'], ['MG', 'RJ'])
+
+        # De volta a uma UF já listada: é a saída de MG que recarrega
+        politico.uf = 'RJ'
+        with self.captureOnCommitCallbacks(execute=True):
+            politico.save()
+        self.assertEqual(opcoes_filtros()['ufs'], ['RJ'])
+
+
+class EvolucaoTests(PoliticosMixin, TestCase):
+    def _fotografar(self, dias, valores):
+        inicio = datetime.date(2026, 1, 1)
+        for dia, valor in zip(dias, valores):
+            data = inicio + timedelta(days=dia)
+            HistoricoPontuacao.objects.create(politico=self.politico, data=data, pontuacao_final=Decimal(valor))
+            with self.captureOnCommitCallbacks(execute=True):
+                atualizar_series(data)
+
+    def test_lttb_preserva_extremos(self):
+        pontos = [(x, 5.0) for x in range(1000)]
+        pontos[500] = (500, 9.5)
+        pontos[700] = (700, 0.5)
+        reduzidos = lttb(pontos, 50)
+        self.assertEqual(len(reduzidos), 50)
+        self.assertEqual((reduzidos[0], reduzidos[-1]), (pontos[0], pontos[-1]))
+        self.assertIn((500, 9.5), reduzidos)
+        self.assertIn((700, 0.5), reduzidos)
+
+    def test_serie_incremental_limitada(self):
+        # Patamar: dias com o mesmo valor só estendem o último ponto
+        self._fotografar(range(5), [7] * 5)
+        self.assertEqual(SerieEvolucao.objects.get().pontos, [['2026-01-01', 7.0], ['2026-01-05', 7.0]])
+
+        self._fotografar(range(5, 5 + 3 * LIMITE), [i % 10 for i in range(3 * LIMITE)])
+        pontos = SerieEvolucao.objects.get().pontos
+        self.assertLessEqual(len(pontos), 2 * LIMITE)
+        self.assertEqual(pontos[0][0], '2026-01-01')
+
+    def test_endpoint_com_etag(self):
+        self._fotografar(range(3), [5, 6, 7])
+        url = '/api/v1/politicos/ana-lima/evolucao/'
+        resposta = self.client.get(url)
+        self.assertEqual(resposta.json()['pontos'][-1], ['2026-01-03', 7.0])
+        self.assertIn('max-age', resposta['Cache-Control'])
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=resposta['ETag']).status_code, 304)
+        self._fotografar([3], [8])
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=resposta['ETag']).status_code, 200)
+        self.assertEqual(self.client.get('/api/v1/politicos/inexistente/evolucao/').status_code, 404)
+
+
+class ComentariosTests(PoliticosMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cpfs = ['11144477735', '39053344705', '15350946056', '86288366757', '71428793860']
+        usuarios = [cls.usuario] + [criar_usuario(f'eleitor{i}', cpf) for i, cpf in enumerate(cpfs, 1)]
+        cls.avaliacoes = [
+            AvaliacaoUsuario.objects.create(
+                politico=cls.politico, usuario=usuario, nota=i + 1, comentario=f'Comentário {i}',
+            )
+            for i, usuario in enumerate(usuarios)
+        ]
+        # Mesmo instante para todos: o id desempata
+        AvaliacaoUsuario.objects.update(criado_em=cls.avaliacoes[0].criado_em, moderacao='APROVADO')
+        AvaliacaoUsuario.objects.filter(id=cls.avaliacoes[0].id).update(moderacao='PENDENTE')
+
+    def _todas(self, url, **parametros):
+        comentarios = []
+        while url:
+            resposta = self.client.get(url, parametros).json()
+            parametros = {}
+            comentarios += [comentario['comentario'] for comentario in resposta['resultados']]
+            url = resposta['proximo']
+        return comentarios
+
+    def test_paginas_so_com_aprovados(self):
+        url = '/api/v1/politicos/ana-lima/comentarios/'
+        self.assertEqual(self._todas(url, tamanho=2), [f'Comentário {i}' for i in range(5, 0, -1)])
+        self.assertEqual(self.client.get(url, {'cursor': 'xyz'}).status_code, 400)
+
+    def test_pagina_em_cache_e_edicao_volta_para_moderacao(self):
+        obter_comentarios(self.politico.id)
+        with self.assertNumQueries(0):
+            obter_comentarios(self.politico.id)
+
+        avaliacao = self.avaliacoes[5]
+        avaliacao.refresh_from_db()
+        avaliacao.comentario = 'Editado'
+        avaliacao.save()
+        avaliacao.refresh_from_db()
+        self.assertEqual(avaliacao.moderacao, 'PENDENTE')
+        self.assertNotIn('Editado', [c['comentario'] for c in obter_comentarios(self.politico.id)[0]])
+
+    def test_moderacao_no_admin(self):
+        obter_comentarios(self.politico.id)
+        admin = criar_usuario('admin', '27100429049', is_staff=True, is_superuser=True)
+        self.client.force_login(admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/admin/core/avaliacaousuario/', {
+                'action': 'aprovar_comentarios', '_selected_action': [self.avaliacoes[0].id],
+            })
+        self.assertEqual(len(obter_comentarios(self.politico.id)[0]), 6)
+
+
+class LimitesVotoTests(PoliticosMixin, TestCase):
+    url = '/politico/ana-lima/avaliar/'
+
+    def test_janela_deslizante(self):
+        janela = JanelaDeslizante('teste', limite=3, janela=60)
+        self.assertEqual([janela.registrar('x', agora=120 + i) for i in range(3)], [0, 0, 0])
+        self.assertGreater(janela.registrar('x', agora=125), 0)
+        # Na metade da janela seguinte, metade das 3 anteriores ainda pesa (1,5)
+        self.assertEqual([janela.registrar('x', agora=210) for _ in range(2)], [0, 0])
+        self.assertGreater(janela.registrar('x', agora=210), 0)
+        self.assertEqual(janela.registrar('outro', agora=125), 0)
+
+    def test_um_voto_a_cada_30_dias(self):
+        self.client.force_login(self.usuario)
+        self.assertEqual(self.client.post(self.url, {'nota': 'x'}).status_code, 400)
+        self.assertEqual(self.client.post(self.url, {'nota': 7}).status_code, 200)
+        resposta = self.client.post(self.url, {'nota': 9})
+        self.assertEqual(resposta.status_code, 429)
+        self.assertGreater(int(resposta['Retry-After']), 29 * 86400)
+
+        # Sem a chave no cache, o voto gravado continua valendo
+        cache.clear()
+        self.assertEqual(self.client.post(self.url, {'nota': 9}).status_code, 429)
+
+        cache.clear()
+        AvaliacaoUsuario.objects.update(votado_em=timezone.now() - timedelta(days=31))
+        self.assertEqual(self.client.post(self.url, {'nota': 9}).status_code, 200)
+        self.assertEqual(AvaliacaoUsuario.objects.get().nota, 9)
+
+    def test_ip_do_cliente_atras_de_proxy_confiavel(self):
+        def votar(remoto, encaminhado):
+            return self.client.post(self.url, {'nota': 5}, REMOTE_ADDR=remoto, HTTP_X_FORWARDED_FOR=encaminhado)
+
+        with self.settings(IIP_LIMITES_VOTO={'ip': (2, 60)}, IIP_PROXIES_CONFIAVEIS=['10.0.0.0/8']):
+            for _ in range(2):
+                votar('10.0.0.2', '203.0.113.5, 10.0.0.7')
+            self.assertEqual(votar('10.0.0.2', '203.0.113.5, 10.0.0.7').status_code, 429)
+            # Outro cliente atrás do mesmo proxy tem o seu próprio limite
+            self.assertNotEqual(votar('10.0.0.2', '203.0.113.9').status_code, 429)
+            # Fora dos proxies confiáveis o cabeçalho é ignorado
+            for encaminhado in ('198.51.100.1', '198.51.100.2'):
+                votar('192.0.2.1', encaminhado)
+            self.assertEqual(votar('192.0.2.1', '198.51.100.3').status_code, 429)
+
+    def test_limite_por_ip_antes_do_banco(self):
+        with self.settings(IIP_LIMITES_VOTO={'ip': (2, 60)}):
+            self.client.post(self.url, {'nota': 5})
+            self.client.post(self.url, {'nota': 5})
+            with self.assertNumQueries(0):
+                self.assertEqual(self.client.post(self.url, {'nota': 5}).status_code, 429)
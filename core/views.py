@@ -1,12 +1,19 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.views.generic import TemplateView
 from django.contrib import messages
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse
-from django.db.models import Avg, Count, Case, When, Value, DecimalField, Q
-from django.db import models
-from .models import Politico, AvaliacaoUsuario, Nota, Partido, Cargo
+from django.http import Http404, JsonResponse
+from django.urls import reverse
+from django.utils import timezone
+from .models import Politico, Cargo, AvaliacaoUsuario
 from .forms import PoliticoForm
+from .ranking import PODERES, pagina_ranking, top_por_poder
+from .cache import obter_perfil, obter_ranking
+from .referencias import opcoes_filtros
+from .votos import enfileirar_voto
+from .busca import buscar_politicos
+from .limites import limitar_votos
 
 class HomeView(TemplateView):
     template_name = 'home.html'
@@ -21,79 +28,28 @@ class HomeView(TemplateView):
         uf_filtro = self.request.GET.get('uf')
         ordenacao = self.request.GET.get('ordenacao', 'pontuacao')  # padrão: ordenar por pontuação
         
-        # Query base com anotações para calcular pontuação
-        queryset = Politico.objects.select_related('partido', 'cargo').annotate(
-            # Média das avaliações dos usuários
-            media_usuarios=Avg('avaliacoes__nota'),
-            total_avaliacoes=Count('avaliacoes'),
-            
-            # Nota da IA mais recente
-            nota_ia_recente=models.Subquery(
-                Nota.objects.filter(politico=models.OuterRef('pk'))
-                .order_by('-periodo_ref')
-                .values('nota_ia')[:1]
-            ),
-            
-            # Calcular pontuação final (50% usuários + 50% IA)
-            pontuacao_final=Case(
-                # Se tem ambas as notas
-                When(
-                    Q(media_usuarios__isnull=False) & Q(nota_ia_recente__isnull=False),
-                    then=(models.F('media_usuarios') + models.F('nota_ia_recente')) / 2
-                ),
-                # Se tem apenas nota dos usuários
-                When(
-                    Q(media_usuarios__isnull=False) & Q(nota_ia_recente__isnull=True),
-                    then=models.F('media_usuarios')
-                ),
-                # Se tem apenas nota da IA
-                When(
-                    Q(media_usuarios__isnull=True) & Q(nota_ia_recente__isnull=False),
-                    then=models.F('nota_ia_recente')
-                ),
-                # Se não tem nenhuma nota
-                default=Value(0),
-                output_field=DecimalField(max_digits=5, decimal_places=2)
-            )
-        )
-        
-        # Aplicar filtros
-        if partido_filtro:
-            queryset = queryset.filter(partido__sigla=partido_filtro)
-        if cargo_filtro:
-            queryset = queryset.filter(cargo__nome=cargo_filtro)
-        if esfera_filtro:
-            queryset = queryset.filter(esfera=esfera_filtro)
-        if uf_filtro:
-            queryset = queryset.filter(uf=uf_filtro)
-        
-        # Aplicar ordenação
-        if ordenacao == 'pontuacao':
-            queryset = queryset.order_by('-pontuacao_final', 'nome')
-        elif ordenacao == 'nome':
-            queryset = queryset.order_by('nome')
-        elif ordenacao == 'avaliacoes':
-            queryset = queryset.order_by('-total_avaliacoes', '-pontuacao_final')
-        
-        # Separar por poder e limitar a 10 cada
-        context['executivo'] = queryset.filter(cargo__poder='EXECUTIVO')[:10]
-        context['legislativo'] = queryset.filter(cargo__poder='LEGISLATIVO')[:10]
-        context['judiciario'] = queryset.filter(cargo__poder='JUDICIARIO')[:10]
-        
-        # Dados para os filtros
-        context['partidos'] = Partido.objects.all().order_by('sigla')
-        context['cargos'] = Cargo.objects.all().order_by('nome')
-        context['esferas'] = Politico.ESFERA_CHOICES
-        context['ufs'] = Politico.objects.exclude(uf='').values_list('uf', flat=True).distinct().order_by('uf')
-        
-        # Valores atuais dos filtros
-        context['filtros'] = {
+        # Top 10 de cada poder, em cache por combinação de filtros (ver core.cache)
+        filtros = {
             'partido': partido_filtro,
             'cargo': cargo_filtro,
             'esfera': esfera_filtro,
             'uf': uf_filtro,
-            'ordenacao': ordenacao
+            'ordenacao': ordenacao,
         }
+        ranking = obter_ranking(filtros, lambda: top_por_poder(**filtros))
+        context['executivo'] = ranking['EXECUTIVO']
+        context['legislativo'] = ranking['LEGISLATIVO']
+        context['judiciario'] = ranking['JUDICIARIO']
+        
+        # Dados para os filtros, servidos da memória do processo (ver core.referencias)
+        opcoes = opcoes_filtros()
+        context['partidos'] = opcoes['partidos']
+        context['cargos'] = opcoes['cargos']
+        context['esferas'] = Politico.ESFERA_CHOICES
+        context['ufs'] = opcoes['ufs']
+        
+        # Valores atuais dos filtros
+        context['filtros'] = filtros
         
         return context
 
@@ -136,51 +92,37 @@ def deletar_politico(request, politico_id):
     
     return render(request, 'confirmar_delete.html', {'politico': politico})
 
-def detalhes_politico(request, slug):
-    """View para exibir detalhes do político com sistema de avaliação"""
-    politico = get_object_or_404(Politico, slug=slug)
-    
-    # Buscar avaliação do usuário atual (se logado)
-    avaliacao_usuario = None
-    if request.user.is_authenticated:
-        try:
-            avaliacao_usuario = AvaliacaoUsuario.objects.get(
-                politico=politico, 
-                usuario=request.user
-            )
-        except AvaliacaoUsuario.DoesNotExist:
-            pass
-    
-    # Calcular médias das avaliações
-    avaliacoes_stats = AvaliacaoUsuario.objects.filter(politico=politico).aggregate(
-        media_usuarios=Avg('nota'),
-        total_avaliacoes=Count('id')
-    )
+def _perfil_politico(slug):
+    """Parte do perfil igual para todos os visitantes, montada em uma consulta"""
+    politico = get_object_or_404(Politico.objects.select_related('partido', 'cargo'), slug=slug)
     
-    # Buscar nota da IA mais recente
-    nota_ia_recente = Nota.objects.filter(politico=politico).first()
-    nota_ia = nota_ia_recente.nota_ia if nota_ia_recente else None
+    # Notas já calculadas e gravadas em Politico (ver core.pontuacao)
+    tem_nota = politico.media_usuarios is not None or politico.nota_ia_recente is not None
     
-    # Calcular nota final (50% usuários + 50% IA)
-    nota_final = None
-    if avaliacoes_stats['media_usuarios'] and nota_ia:
-        nota_final = (avaliacoes_stats['media_usuarios'] + nota_ia) / 2
-    elif avaliacoes_stats['media_usuarios']:
-        nota_final = avaliacoes_stats['media_usuarios']
-    elif nota_ia:
-        nota_final = nota_ia
-    
-    context = {
+    return {
         'politico': politico,
-        'avaliacao_usuario': avaliacao_usuario,
-        'media_usuarios': avaliacoes_stats['media_usuarios'],
-        'total_avaliacoes': avaliacoes_stats['total_avaliacoes'],
-        'nota_ia': nota_ia,
-        'nota_final': nota_final,
+        'media_usuarios': politico.media_usuarios,
+        'total_avaliacoes': politico.total_avaliacoes,
+        'nota_ia': politico.nota_ia_recente,
+        'nota_final': politico.pontuacao_final if tem_nota else None,
     }
+
+def detalhes_politico(request, slug):
+    """View para exibir detalhes do político com sistema de avaliação"""
+    # Em cache por slug, descartado quando o político muda (ver core.cache)
+    context = dict(obter_perfil(slug, lambda: _perfil_politico(slug)))
+    
+    # Só o voto do usuário atual (se logado) é buscado a cada requisição
+    context['avaliacao_usuario'] = None
+    if request.user.is_authenticated:
+        context['avaliacao_usuario'] = AvaliacaoUsuario.objects.filter(
+            politico_id=context['politico'].id,
+            usuario=request.user
+        ).order_by().first()
     
     return render(request, 'detalhes_politico.html', context)
 
+@limitar_votos
 @login_required
 def avaliar_politico(request, slug):
     """View para processar avaliação do usuário via AJAX"""
@@ -196,27 +138,40 @@ def avaliar_politico(request, slug):
         if not (1 <= nota <= 10):
             return JsonResponse({'error': 'Nota deve estar entre 1 e 10'}, status=400)
         
+        if settings.VOTOS_ASSINCRONOS:
+            # Grava só na fila; o comando processar_votos aplica em lote
+            enfileirar_voto(politico, request.user, nota, comentario)
+            return JsonResponse({
+                'success': True,
+                'message': 'Avaliação recebida! Ela será contabilizada em instantes.',
+                'pendente': True,
+            }, status=202)
+        
         # Criar ou atualizar avaliação
         avaliacao, created = AvaliacaoUsuario.objects.update_or_create(
             politico=politico,
             usuario=request.user,
             defaults={
                 'nota': nota,
-                'comentario': comentario
+                'comentario': comentario,
+                'votado_em': timezone.now(),
             }
         )
         
-        # Recalcular estatísticas
-        avaliacoes_stats = AvaliacaoUsuario.objects.filter(politico=politico).aggregate(
-            media_usuarios=Avg('nota'),
-            total_avaliacoes=Count('id')
-        )
+        # Os contadores do político já foram atualizados por diferença, na mesma
+        # transação do voto (ver core.signals); só relê quando o voto não os mudou
+        estatisticas = avaliacao._estatisticas_politico
+        if estatisticas is None:
+            estatisticas = Politico.objects.filter(pk=politico.pk).values_list(
+                'media_usuarios', 'total_avaliacoes'
+            ).get()
+        media_usuarios, total_avaliacoes = estatisticas
         
         return JsonResponse({
             'success': True,
             'message': 'Avaliação salva com sucesso!',
-            'media_usuarios': round(avaliacoes_stats['media_usuarios'], 1) if avaliacoes_stats['media_usuarios'] else None,
-            'total_avaliacoes': avaliacoes_stats['total_avaliacoes'],
+            'media_usuarios': round(float(media_usuarios), 1) if media_usuarios else None,
+            'total_avaliacoes': total_avaliacoes,
             'created': created
         })
         
@@ -224,3 +179,89 @@ def avaliar_politico(request, slug):
         return JsonResponse({'error': 'Dados inválidos'}, status=400)
     except Exception as e:
         return JsonResponse({'error': 'Erro interno do servidor'}, status=500)
+
+def buscar(request):
+    """Busca de políticos por nome para o autocompletar (JSON)"""
+    termo = request.GET.get('q', '').strip()[:100]
+    resultados = buscar_politicos(termo) if len(termo) >= 2 else []
+    
+    return JsonResponse({
+        'resultados': [
+            {
+                'nome': politico['nome'],
+                'url': reverse('detalhes_politico', args=[politico['slug']]),
+                'partido': politico['partido__sigla'],
+                'uf': politico['uf'],
+                'cargo': politico['cargo__nome'],
+                'pontuacao_final': float(politico['pontuacao_final']),
+            }
+            for politico in resultados
+        ]
+    })
+
+def _pagina_ranking(request, poder):
+    """Página do ranking completo de um Poder conforme os parâmetros da URL"""
+    poder = poder.upper()
+    if poder not in PODERES:
+        raise Http404('Poder desconhecido')
+    
+    filtros = {
+        'partido': request.GET.get('partido'),
+        'cargo': request.GET.get('cargo'),
+        'esfera': request.GET.get('esfera'),
+        'uf': request.GET.get('uf'),
+    }
+    try:
+        tamanho = int(request.GET.get('tamanho', 50))
+    except ValueError:
+        tamanho = 50
+    
+    politicos, proximo, posicao = pagina_ranking(
+        poder,
+        cursor=request.GET.get('cursor'),
+        tamanho=tamanho,
+        cargos=opcoes_filtros()['cargos'],
+        **filtros,
+    )
+    return poder, filtros, politicos, proximo, posicao
+
+def ranking_poder(request, poder):
+    """Ranking completo de um Poder, paginado por cursor"""
+    try:
+        poder, filtros, politicos, proximo, posicao = _pagina_ranking(request, poder)
+    except ValueError:
+        return redirect('ranking_poder', poder=poder.lower())
+    
+    return render(request, 'ranking_poder.html', {
+        'poder': poder,
+        'poder_nome': dict(Cargo.PODER_CHOICES)[poder],
+        'politicos': politicos,
+        'posicao_inicial': posicao,
+        'proximo': proximo,
+        'filtros': {chave: valor for chave, valor in filtros.items() if valor},
+    })
+
+def api_ranking_poder(request, poder):
+    """Ranking completo de um Poder em JSON, paginado por cursor"""
+    try:
+        poder, filtros, politicos, proximo, posicao = _pagina_ranking(request, poder)
+    except ValueError:
+        return JsonResponse({'error': 'Cursor inválido'}, status=400)
+    
+    return JsonResponse({
+        'poder': poder,
+        'resultados': [
+            {
+                'posicao': posicao + indice,
+                'nome': politico.nome,
+                'slug': politico.slug,
+                'partido': politico.partido.sigla if politico.partido else None,
+                'cargo': politico.cargo.nome if politico.cargo else None,
+                'uf': politico.uf,
+                'pontuacao_final': float(politico.pontuacao_final),
+                'total_avaliacoes': politico.total_avaliacoes,
+            }
+            for indice, politico in enumerate(politicos)
+        ],
+        'proximo': proximo,
+    })
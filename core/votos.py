@@ -0,0 +1,118 @@
+"""Aplicação em lote dos votos enfileirados em ``VotoPendente``.
+
+Cada lote é processado em uma transação: os votos repetidos do mesmo
+usuário para o mesmo político são reduzidos ao último, as avaliações são
+gravadas com ``bulk_create``/``bulk_update`` e os contadores de cada
+político recebem uma única atualização por diferença.
+
+Vários workers podem drenar a fila ao mesmo tempo (``skip_locked``). Para
+que dois deles nunca gravem o mesmo par (político, usuário), o par fica
+com o worker que travou o voto pendente mais antigo dele; os demais deixam
+os votos do par na fila e os aplicam numa próxima rodada, depois do
+primeiro, o que também mantém a ordem de chegada.
+"""
+from collections import defaultdict
+
+from django.db import connection, transaction
+from django.db.models import Min, Q
+
+from .cache import invalidar_perfil, invalidar_ranking
+from .models import AvaliacaoUsuario, VotoPendente
+from .pontuacao import aplicar_delta_avaliacao
+
+
+def enfileirar_voto(politico, usuario, nota, comentario=''):
+    return VotoPendente.objects.create(politico=politico, usuario=usuario, nota=nota, comentario=comentario)
+
+
+def _filtro_pares(pares):
+    filtro = Q()
+    for politico_id, usuario_id in pares:
+        filtro |= Q(politico_id=politico_id, usuario_id=usuario_id)
+    return filtro
+
+
+def processar_lote(tamanho=1000):
+    """Aplica até ``tamanho`` votos pendentes; retorna quantos foram consumidos"""
+    with transaction.atomic():
+        pendentes = VotoPendente.objects.order_by('id')
+        if connection.features.has_select_for_update_skip_locked:
+            # Permite vários workers drenando a fila ao mesmo tempo
+            pendentes = pendentes.select_for_update(skip_locked=True)
+        votos = list(pendentes[:tamanho])
+        if not votos:
+            return 0
+        politico_ids = aplicar_votos(votos)
+
+    if politico_ids:
+        invalidar_ranking()
+        for politico_id in politico_ids:
+            invalidar_perfil(politico_id)
+    return len(votos) - sum(1 for voto in votos if voto.adiado)
+
+
+def aplicar_votos(votos):
+    """Aplica ``votos`` (já travados pelo chamador, em ordem de id) e os remove da fila.
+
+    Pares com um voto pendente mais antigo fora de ``votos`` (travado por
+    outro worker) ficam na fila e recebem ``adiado = True``. Deve rodar
+    dentro de uma transação; retorna os ids dos políticos alterados.
+    """
+    primeiros = {}
+    for voto in votos:
+        primeiros.setdefault((voto.politico_id, voto.usuario_id), voto.id)
+    de_outro_worker = {
+        (linha['politico_id'], linha['usuario_id'])
+        for linha in VotoPendente.objects.filter(_filtro_pares(primeiros))
+        .values('politico_id', 'usuario_id').annotate(primeiro=Min('id')).order_by()
+        if linha['primeiro'] < primeiros[(linha['politico_id'], linha['usuario_id'])]
+    }
+
+    # O último voto de cada (político, usuário) prevalece
+    ultimos = {}
+    for voto in votos:
+        chave = (voto.politico_id, voto.usuario_id)
+        voto.adiado = chave in de_outro_worker
+        if not voto.adiado:
+            ultimos[chave] = voto
+    if not ultimos:
+        return set()
+
+    # A trava serializa com edições feitas fora da fila (admin, voto síncrono)
+    existentes = {}
+    for avaliacao in AvaliacaoUsuario.objects.select_for_update().filter(_filtro_pares(ultimos)).order_by('id'):
+        existentes.setdefault((avaliacao.politico_id, avaliacao.usuario_id), avaliacao)
+
+    novas = []
+    alteradas = []
+    deltas = defaultdict(lambda: [0, 0])
+    for chave, voto in ultimos.items():
+        avaliacao = existentes.get(chave)
+        if avaliacao is None:
+            novas.append(AvaliacaoUsuario(
+                politico_id=voto.politico_id, usuario_id=voto.usuario_id,
+                nota=voto.nota, comentario=voto.comentario, votado_em=voto.criado_em,
+            ))
+            deltas[voto.politico_id][0] += voto.nota
+            deltas[voto.politico_id][1] += 1
+        else:
+            deltas[voto.politico_id][0] += voto.nota - avaliacao.nota
+            avaliacao.nota = voto.nota
+            avaliacao.votado_em = voto.criado_em
+            if avaliacao.comentario != voto.comentario:
+                avaliacao.comentario = voto.comentario
+                avaliacao.moderacao = 'PENDENTE'
+            alteradas.append(avaliacao)
+
+    AvaliacaoUsuario.objects.bulk_create(novas, batch_size=500)
+    AvaliacaoUsuario.objects.bulk_update(alteradas, ['nota', 'comentario', 'moderacao', 'votado_em'], batch_size=500)
+
+    # Operações em lote não disparam sinais: uma atualização por político
+    for politico_id, (delta_soma, delta_total) in deltas.items():
+        if delta_soma or delta_total:
+            aplicar_delta_avaliacao(politico_id, delta_soma, delta_total)
+
+    VotoPendente.objects.filter(id__in=[voto.id for voto in votos if not voto.adiado]).delete()
+    # Toda avaliação gravada muda o perfil, mesmo sem mexer nos contadores
+    # (ex.: mesma nota com comentário novo, que volta para a moderação)
+    return {politico_id for politico_id, _ in ultimos}